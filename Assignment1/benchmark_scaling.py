@@ -0,0 +1,235 @@
+'''
+Scaling benchmark of the metric methods of q1.Network and q2.Network on synthetic graphs.
+
+Seeded R-MAT, Barabasi-Albert and Erdos-Renyi graphs (see graph_generators.py) of every size are
+written as edge lists to CONFIG["CACHE_DIR"]/benchmark (made only once per generator, size and seed)
+and loaded as the datasets of q1.Network (undirected) and q2.Network (directed). Every method is run
+on a fresh copy of the network (so the cached statistics of one method don't help another), and the
+best time of the runs and the peak memory (a separate run under tracemalloc, which only sees the
+allocations of python and numpy, not SNAP's) are recorded.
+
+The results are written to a JSON file. If a baseline JSON file exists, every method of every graph
+whose time or peak memory grew by more than the threshold (as a fraction of the baseline) is reported
+as a regression and the script exits with status 1. Run with --save-baseline to store the results as
+the new baseline, and with --help for the other options.
+
+The methods too slow for the largest graphs are only run up to their max_edges.
+'''
+import argparse
+import copy
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from config import CONFIG
+from graph_generators import GENERATORS, get_edges
+from hop_distribution import get_hop_distribution
+import profiling
+import q1
+import q2
+
+SIZES = [10**4, 10**5, 10**6, 10**7]
+SEED = 0
+THRESHOLD = 0.25
+# Times and peak memories below these are too noisy to be compared against the baseline
+MIN_TIME = 0.05
+MIN_MEMORY = 1 << 20
+BENCHMARK_DIR = os.path.join(CONFIG["CACHE_DIR"], "benchmark")
+RESULTS_LOCATION = "benchmark_results.json"
+BASELINE_LOCATION = "benchmark_baseline.json"
+
+
+def _get_view_counts(view):
+    # The counts of a subgraph view are only found when asked for
+    return view.num_nodes, view.num_edges
+
+
+# (name, network, method, max_edges)
+METHODS = [
+    ("q1.get_num_of_nodes", "q1", lambda network: network.get_num_of_nodes(), None),
+    ("q1.get_num_of_edges", "q1", lambda network: network.get_num_of_edges(), None),
+    ("q1.get_view_without_nodeids_divisible_by_3", "q1", lambda network: _get_view_counts(network.get_view_without_nodeids_divisible_by_3()), None),
+    ("q1.get_nodes_with_highest_degree", "q1", lambda network: network.get_nodes_with_highest_degree(), None),
+    ("q1.get_hop_distribution", "q1", lambda network: get_hop_distribution(network.csr_graph), None),
+    ("q1.get_num_articulation_points", "q1", lambda network: network.get_num_articulation_points(), None),
+    ("q1.get_num_weakly_connected_comps", "q1", lambda network: network.get_num_weakly_connected_comps(), None),
+    ("q1.get_num_strongly_connected_comps", "q1", lambda network: network.get_num_strongly_connected_comps(), None),
+    ("q1.get_diameter", "q1", lambda network: network.get_diameter(), None),
+    ("q1.get_exact_diameter", "q1", lambda network: network.get_exact_diameter(), 10**5),
+    ("q2.get_num_of_nodes", "q2", lambda network: network.get_num_of_nodes(), None),
+    ("q2.get_num_of_edges", "q2", lambda network: network.get_num_of_edges(), None),
+    ("q2.get_num_nodes_with_degree_equal_4", "q2", lambda network: network.get_num_nodes_with_degree_equal_4(), None),
+    ("q2.get_num_weakly_connected_comps", "q2", lambda network: network.get_num_weakly_connected_comps(), None),
+    ("q2.get_num_strongly_connected_comps", "q2", lambda network: network.get_num_strongly_connected_comps(), None),
+    ("q2.get_largest_wcc", "q2", lambda network: network.get_largest_wcc(), None),
+    ("q2.get_largest_scc", "q2", lambda network: network.get_largest_scc(), None),
+    ("q2.get_avg_clustering_coeff", "q2", lambda network: network.get_avg_clustering_coeff(), None),
+    ("q2.get_num_triangles", "q2", lambda network: network.get_num_triangles(), None),
+    ("q2.get_triad_census", "q2", lambda network: network.get_triad_census(), 10**5),
+    ("q2.get_num_rectangles", "q2", lambda network: network.get_num_rectangles(), 10**6),
+    ("q2.get_edge_bridges", "q2", lambda network: network.get_edge_bridges(), 10**6),
+    ("q2.get_undirected_edge_bridges", "q2", lambda network: network.get_undirected_edge_bridges(), 10**6),
+]
+NETWORKS = {"q1": q1.Network, "q2": q2.Network}
+
+
+def get_graph_file(generator, num_edges, seed=SEED):
+    '''
+    Get the location of the edge list of a synthetic graph (written on the first call)
+    '''
+    location = os.path.join(BENCHMARK_DIR, "{}-{}-seed{}.txt".format(generator, num_edges, seed))
+    if(not os.path.exists(location)):
+        os.makedirs(BENCHMARK_DIR, exist_ok=True)
+        _, src, dst = get_edges(generator, num_edges, seed)
+        tmp_location = "{}.tmp-{}".format(location, os.getpid())
+        np.savetxt(tmp_location, np.column_stack((src, dst)), fmt="%d", delimiter=" ")
+        os.replace(tmp_location, location)
+    return location
+
+
+def measure(function, repeat=1, trace_memory=True):
+    '''
+    Get the best time (in seconds) of repeat calls of function() and its peak memory in bytes
+    (None if trace_memory is False)
+    '''
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+
+    peak_memory = None
+    if(trace_memory):
+        tracemalloc.start()
+        try:
+            function()
+            _, peak_memory = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return min(times), peak_memory
+
+
+def run_benchmarks(methods=METHODS, sizes=SIZES, generators=GENERATORS, seed=SEED, repeat=1, trace_memory=True, log=sys.stderr):
+    '''
+    Run every method on every synthetic graph
+
+    Returns the list of the records (dicts) of the runs
+    '''
+    records = []
+    for generator in generators:
+        for num_edges in sizes:
+            selected = [m for m in methods if m[3] is None or num_edges <= m[3]]
+            if(not selected):
+                continue
+            graph_file = get_graph_file(generator, num_edges, seed)
+            networks = {}
+            for name, network_name, method, _ in selected:
+                if(network_name not in networks):
+                    start = time.perf_counter()
+                    networks[network_name] = NETWORKS[network_name](graph_file)
+                    print("{} {} {}: loaded in {:.3f} s".format(generator, num_edges, network_name, time.perf_counter() - start), file=log)
+                base_network = networks[network_name]
+                run = lambda: method(copy.copy(base_network))
+                time_taken, peak_memory = measure(run, repeat, trace_memory)
+                records.append({
+                    "generator": generator,
+                    "num_edges": num_edges,
+                    "num_graph_nodes": base_network.csr_graph.num_nodes,
+                    "num_graph_edges": base_network.csr_graph.num_edges,
+                    "method": name,
+                    "time": time_taken,
+                    "peak_memory": peak_memory,
+                })
+                print("{} {} {}: {:.4f} s{}".format(generator, num_edges, name, time_taken,
+                      "" if peak_memory is None else ", {:.1f} MB".format(peak_memory/2**20)), file=log)
+    return records
+
+
+def _get_record_key(record):
+    return (record["generator"], record["num_edges"], record["method"])
+
+
+def get_regressions(records, baseline_records, threshold=THRESHOLD):
+    '''
+    Get the (record, measure, baseline value) of every time or peak memory which grew by more than
+    threshold (as a fraction) against the baseline record of the same generator, size and method
+    '''
+    baseline = {_get_record_key(record): record for record in baseline_records}
+    regressions = []
+    for record in records:
+        base = baseline.get(_get_record_key(record))
+        if(base is None):
+            continue
+        for measure_name, min_value in (("time", MIN_TIME), ("peak_memory", MIN_MEMORY)):
+            value, base_value = record[measure_name], base[measure_name]
+            if(value is None or base_value is None or max(value, base_value) < min_value):
+                continue
+            if(value > base_value*(1 + threshold)):
+                regressions.append((record, measure_name, base_value))
+    return regressions
+
+
+def get_environment():
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scaling benchmark of the q1.py and q2.py metric methods on synthetic graphs")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="Numbers of edges of the graphs")
+    parser.add_argument("--generators", nargs="+", default=list(GENERATORS), choices=GENERATORS)
+    parser.add_argument("--methods", nargs="+", default=None, help="Only run the methods whose names contain one of these")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--repeat", type=int, default=1, help="Number of timed runs of every method (the best is kept)")
+    parser.add_argument("--no-memory", action="store_true", help="Don't measure the peak memory (saves one run of every method)")
+    parser.add_argument("--output", default=RESULTS_LOCATION)
+    parser.add_argument("--baseline", default=BASELINE_LOCATION)
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="Allowed growth over the baseline (0.25 = 25%%)")
+    parser.add_argument("--save-baseline", action="store_true", help="Store the results as the new baseline")
+    args = parser.parse_args(argv)
+
+    # The methods are timed without the profiling records (see profiling.py)
+    profiling.set_enabled(False)
+    methods = METHODS
+    if(args.methods):
+        methods = [m for m in METHODS if any(pattern in m[0] for pattern in args.methods)]
+    records = run_benchmarks(methods, args.sizes, args.generators, args.seed, args.repeat, not args.no_memory)
+    results = {"seed": args.seed, "environment": get_environment(), "records": records}
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=1)
+    print("Results written to {}".format(args.output))
+
+    if(args.save_baseline):
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=1)
+        print("Baseline saved to {}".format(args.baseline))
+        return 0
+    if(not os.path.exists(args.baseline)):
+        print("No baseline found at {}, nothing to compare".format(args.baseline))
+        return 0
+
+    with open(args.baseline, "r") as f:
+        baseline_records = json.load(f)["records"]
+    regressions = get_regressions(records, baseline_records, args.threshold)
+    for record, measure_name, base_value in regressions:
+        print("REGRESSION {} {} {}: {} {:.4g} (baseline {:.4g}, +{:.0f}%)".format(
+            record["generator"], record["num_edges"], record["method"], measure_name,
+            record[measure_name], base_value, 100*(record[measure_name]/base_value - 1)))
+    if(regressions):
+        return 1
+    print("No regressions beyond {:.0f}% of the baseline".format(100*args.threshold))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
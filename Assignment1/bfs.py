@@ -0,0 +1,54 @@
+import numpy as np
+
+from profiling import count
+from components import get_edge_components
+
+
+def get_frontier_neighbors(graph, frontier):
+    '''
+    Get the neighbours of all the nodes of the frontier (with repetitions) from the CSR arrays
+    '''
+    starts = graph.offsets[frontier]
+    counts = graph.offsets[frontier + 1] - starts
+    total = int(counts.sum())
+    if(total == 0):
+        return np.zeros(0, dtype=np.int64)
+    # Position of every neighbour in the targets array
+    positions = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(total)
+    return graph.targets[positions]
+
+
+def get_bfs_distances(graph, source):
+    '''
+    Get the BFS distances from a source node index to all the nodes (-1 for the unreachable nodes)
+
+    The BFS goes level by level, expanding the whole frontier at once over the CSR arrays.
+    '''
+    dist = np.full(graph.num_nodes, -1, dtype=np.int64)
+    dist[source] = 0
+    frontier = np.array([source], dtype=np.int64)
+    level = 0
+    count("bfs_runs")
+    while(len(frontier) > 0):
+        level += 1
+        nbrs = get_frontier_neighbors(graph, frontier)
+        count("bfs_edges_scanned", len(nbrs))
+        nbrs = np.unique(nbrs[dist[nbrs] < 0])
+        dist[nbrs] = level
+        frontier = nbrs
+    return dist
+
+
+def get_component_labels(graph):
+    '''
+    Get the connected component label of every node (directions are not considered)
+
+    The labels come from one pass of the union-find of components.py over the edges (numbered in the
+    order of the smallest node index of every component), so many small components cost no more
+    than one large one.
+
+    Returns:
+    (labels, sizes): labels[i] is the component of the node index i and sizes[label] its number of nodes
+    '''
+    src_idx, dst_idx = graph.edges()
+    return get_edge_components(graph.num_nodes, src_idx, dst_idx)
@@ -0,0 +1,374 @@
+'''
+Bridge finding in (near) linear time.
+
+* Undirected bridges: An edge is a bridge if, when removed, increases the number of connected
+  components. These are found with a single iterative low-link DFS (Tarjan).
+
+* Strong bridges: In a directed graph an edge is a strong bridge if, when removed, increases the
+  number of strongly connected components. An edge joining two different SCCs can never be a strong
+  bridge, and inside an SCC with root r the strong bridges are exactly the bridges of the flow graphs
+  G(r) and G_reverse(r) (Italiano, Laura and Santaroni). The bridges of a flow graph are found from its
+  dominator tree (Lengauer-Tarjan): an edge (u, v) is a bridge iff u is the only predecessor of v
+  which is not dominated by v.
+
+All the DFS here are iterative, so there is no recursion limit on large graphs.
+'''
+import random
+
+from csr_graph import CSRGraph
+from profiling import count
+
+
+def get_scc_labels(adj):
+    '''
+    Get the strongly connected component of every node (iterative Tarjan)
+
+    adj: Adjacency lists (out-neighbours) of the nodes 0..n-1
+
+    Returns:
+    (labels, num_sccs)
+    '''
+    count("scc_computations")
+    n = len(adj)
+    index = [-1]*n
+    low = [0]*n
+    on_stack = [False]*n
+    labels = [-1]*n
+    next_nbr = [0]*n
+    stack = []
+    counter = 0
+    num_sccs = 0
+
+    for root in range(n):
+        if(index[root] != -1):
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        call_stack = [root]
+        while(call_stack):
+            u = call_stack[-1]
+            nbrs = adj[u]
+            if(next_nbr[u] < len(nbrs)):
+                v = nbrs[next_nbr[u]]
+                next_nbr[u] += 1
+                if(index[v] == -1):
+                    index[v] = low[v] = counter
+                    counter += 1
+                    stack.append(v)
+                    on_stack[v] = True
+                    call_stack.append(v)
+                elif(on_stack[v] and index[v] < low[u]):
+                    low[u] = index[v]
+            else:
+                call_stack.pop()
+                if(call_stack):
+                    parent = call_stack[-1]
+                    if(low[u] < low[parent]):
+                        low[parent] = low[u]
+                if(low[u] == index[u]):
+                    # u is the root of an SCC, so popping the whole SCC from the stack
+                    while(True):
+                        w = stack.pop()
+                        on_stack[w] = False
+                        labels[w] = num_sccs
+                        if(w == u):
+                            break
+                    num_sccs += 1
+    return labels, num_sccs
+
+
+def get_bridges(graph):
+    '''
+    Get the list of bridges of an undirected graph
+
+    graph: CSRGraph (a directed graph is taken as undirected)
+
+    Returns the list of bridges as (node_id1, node_id2) tuples of original node IDs (node_id1 < node_id2)
+    '''
+    adj = graph.to_undirected().adjacency_lists()
+    n = len(adj)
+    disc = [-1]*n
+    low = [0]*n
+    parent = [-1]*n
+    next_nbr = [0]*n
+    timer = 0
+    bridges = []
+
+    for root in range(n):
+        if(disc[root] != -1):
+            continue
+        disc[root] = low[root] = timer
+        timer += 1
+        stack = [root]
+        while(stack):
+            u = stack[-1]
+            nbrs = adj[u]
+            if(next_nbr[u] < len(nbrs)):
+                v = nbrs[next_nbr[u]]
+                next_nbr[u] += 1
+                # The graph is simple, so the edge back to the parent is the tree edge itself
+                if(v == u or v == parent[u]):
+                    continue
+                if(disc[v] == -1):
+                    parent[v] = u
+                    disc[v] = low[v] = timer
+                    timer += 1
+                    stack.append(v)
+                elif(disc[v] < low[u]):
+                    low[u] = disc[v]
+            else:
+                stack.pop()
+                p = parent[u]
+                if(p != -1):
+                    if(low[u] < low[p]):
+                        low[p] = low[u]
+                    if(low[u] > disc[p]):
+                        bridges.append((p, u))
+
+    node_ids = graph.node_ids.tolist()
+    return sorted((node_ids[min(u, v)], node_ids[max(u, v)]) for u, v in bridges)
+
+
+def _get_immediate_dominators(succ, pred, root):
+    '''
+    Get the immediate dominators of all the nodes reachable from root (Lengauer-Tarjan)
+
+    Returns the list of immediate dominators (-1 for the unreachable nodes)
+    '''
+    count("dominator_trees")
+    n = len(succ)
+    dfnum = [-1]*n
+    parent = [-1]*n
+    vertex = []
+
+    # Numbering the nodes in DFS preorder
+    next_nbr = [0]*n
+    dfnum[root] = 0
+    vertex.append(root)
+    stack = [root]
+    while(stack):
+        u = stack[-1]
+        nbrs = succ[u]
+        if(next_nbr[u] < len(nbrs)):
+            v = nbrs[next_nbr[u]]
+            next_nbr[u] += 1
+            if(dfnum[v] == -1):
+                dfnum[v] = len(vertex)
+                vertex.append(v)
+                parent[v] = u
+                stack.append(v)
+        else:
+            stack.pop()
+
+    semi = dfnum[:]
+    ancestor = [-1]*n
+    label = list(range(n))
+    idom = [-1]*n
+    bucket = [[] for _ in range(n)]
+
+    def eval_node(v):
+        if(ancestor[v] == -1):
+            return v
+        # Path compression, done iteratively from the top of the path
+        path = []
+        x = v
+        while(ancestor[ancestor[x]] != -1):
+            path.append(x)
+            x = ancestor[x]
+        for y in reversed(path):
+            a = ancestor[y]
+            if(semi[label[a]] < semi[label[y]]):
+                label[y] = label[a]
+            ancestor[y] = ancestor[a]
+        return label[v]
+
+    for i in range(len(vertex) - 1, 0, -1):
+        w = vertex[i]
+        for v in pred[w]:
+            if(dfnum[v] == -1):
+                continue
+            u = eval_node(v)
+            if(semi[u] < semi[w]):
+                semi[w] = semi[u]
+        bucket[vertex[semi[w]]].append(w)
+        p = parent[w]
+        ancestor[w] = p
+        for v in bucket[p]:
+            u = eval_node(v)
+            idom[v] = u if semi[u] < semi[v] else p
+        bucket[p] = []
+
+    for i in range(1, len(vertex)):
+        w = vertex[i]
+        if(idom[w] != vertex[semi[w]]):
+            idom[w] = idom[idom[w]]
+    idom[root] = root
+    return idom
+
+
+def _get_flow_graph_bridges(succ, pred, root):
+    '''
+    Get the bridges (u, v) of the flow graph with the given root
+
+    An edge (u, v) is a bridge iff u is the only predecessor of v not dominated by v.
+    '''
+    n = len(succ)
+    idom = _get_immediate_dominators(succ, pred, root)
+
+    # Preorder and postorder numbers of the dominator tree for O(1) dominance checks
+    children = [[] for _ in range(n)]
+    for v in range(n):
+        if(idom[v] != -1 and v != root):
+            children[idom[v]].append(v)
+    pre = [0]*n
+    post = [0]*n
+    counter = 0
+    next_child = [0]*n
+    pre[root] = counter
+    counter += 1
+    stack = [root]
+    while(stack):
+        u = stack[-1]
+        if(next_child[u] < len(children[u])):
+            v = children[u][next_child[u]]
+            next_child[u] += 1
+            pre[v] = counter
+            counter += 1
+            stack.append(v)
+        else:
+            post[u] = counter
+            counter += 1
+            stack.pop()
+
+    bridges = []
+    for v in range(n):
+        if(v == root or idom[v] == -1):
+            continue
+        not_dominated = []
+        for w in pred[v]:
+            if(idom[w] == -1):
+                continue
+            # Checking whether v dominates w
+            if(not (pre[v] <= pre[w] and post[w] <= post[v])):
+                not_dominated.append(w)
+                if(len(not_dominated) > 1):
+                    break
+        if(len(not_dominated) == 1):
+            bridges.append((not_dominated[0], v))
+    return bridges
+
+
+def get_strong_bridges(graph):
+    '''
+    Get the list of strong bridges of a directed graph
+
+    graph: Directed CSRGraph
+
+    Returns the list of strong bridges as (src_id, dest_id) tuples of original node IDs
+    '''
+    adj = graph.adjacency_lists()
+    n = len(adj)
+    labels, num_sccs = get_scc_labels(adj)
+
+    # Keeping only the edges inside the SCCs, and adding a virtual root (node n) connected in both
+    # directions to one root node of every SCC, so that all the SCCs (and both the flow graphs
+    # G(r) and G_reverse(r)) can be handled in a single pass each
+    succ = [[] for _ in range(n + 1)]
+    pred = [[] for _ in range(n + 1)]
+    scc_root = [-1]*num_sccs
+    for u in range(n):
+        if(scc_root[labels[u]] == -1):
+            scc_root[labels[u]] = u
+        for v in adj[u]:
+            if(u != v and labels[u] == labels[v]):
+                succ[u].append(v)
+                pred[v].append(u)
+    virtual_root = n
+    for r in scc_root:
+        succ[virtual_root].append(r)
+        pred[r].append(virtual_root)
+        pred[virtual_root].append(r)
+        succ[r].append(virtual_root)
+
+    bridges = set()
+    for u, v in _get_flow_graph_bridges(succ, pred, virtual_root):
+        if(u != virtual_root):
+            bridges.add((u, v))
+    for v, u in _get_flow_graph_bridges(pred, succ, virtual_root):
+        if(v != virtual_root):
+            bridges.add((u, v))
+
+    node_ids = graph.node_ids.tolist()
+    return sorted((node_ids[u], node_ids[v]) for u, v in bridges)
+
+
+def get_bridges_brute_force(graph):
+    '''
+    Get the bridges of an undirected graph by removing every edge and recounting the components
+
+    Only meant for checking the results of get_bridges() on small graphs.
+    '''
+    undirected = graph.to_undirected()
+    adj = undirected.adjacency_lists()
+    edges = [(u, v) for u in range(len(adj)) for v in adj[u] if u < v]
+
+    def num_components(removed_edge):
+        count("component_recounts")
+        seen = [False]*len(adj)
+        num_comps = 0
+        for s in range(len(adj)):
+            if(seen[s]):
+                continue
+            num_comps += 1
+            seen[s] = True
+            stack = [s]
+            while(stack):
+                u = stack.pop()
+                for v in adj[u]:
+                    if((u, v) == removed_edge or (v, u) == removed_edge or seen[v]):
+                        continue
+                    seen[v] = True
+                    stack.append(v)
+        return num_comps
+
+    comp_count = num_components(None)
+    node_ids = undirected.node_ids.tolist()
+    return sorted((node_ids[u], node_ids[v]) for u, v in edges if num_components((u, v)) > comp_count)
+
+
+def get_strong_bridges_brute_force(graph):
+    '''
+    Get the strong bridges by removing every edge and recounting the SCCs (the old O(E.(V+E)) method)
+
+    Only meant for checking the results of get_strong_bridges() on small graphs.
+    '''
+    adj = graph.adjacency_lists()
+    _, scc_count = get_scc_labels(adj)
+    bridges = []
+    for u in range(len(adj)):
+        for i, v in enumerate(adj[u]):
+            adj[u] = adj[u][:i] + adj[u][i+1:]
+            count("scc_recomputations")
+            if(get_scc_labels(adj)[1] > scc_count):
+                bridges.append((u, v))
+            adj[u] = adj[u][:i] + [v] + adj[u][i:]
+    node_ids = graph.node_ids.tolist()
+    return sorted((node_ids[u], node_ids[v]) for u, v in bridges)
+
+
+if __name__ == "__main__":
+    # Checking the linear time methods against the brute force methods on small random graphs
+    rng = random.Random(0)
+    for trial in range(300):
+        num_nodes = rng.randint(1, 12)
+        num_edges = rng.randint(0, 3*num_nodes)
+        # Node IDs are kept sparse to check that arbitrary node IDs work
+        src = [3*rng.randrange(num_nodes) for _ in range(num_edges)]
+        dst = [3*rng.randrange(num_nodes) for _ in range(num_edges)]
+        directed_graph = CSRGraph.from_edges(src, dst, directed=True)
+        undirected_graph = CSRGraph.from_edges(src, dst, directed=False)
+        assert get_strong_bridges(directed_graph) == get_strong_bridges_brute_force(directed_graph), trial
+        assert get_bridges(undirected_graph) == get_bridges_brute_force(undirected_graph), trial
+    print("Bridges match the brute force method on all the random graphs")
@@ -0,0 +1,171 @@
+'''
+Connected components with an array-backed union-find, streamed from a text (or .gz) edge list.
+
+The edge list is read in chunks (see degree_stats.py) and every chunk of edges is merged into the
+union-find at once, so only the arrays over the node IDs (parent, size) are kept in memory and no
+adjacency is built. The directions of the edges are not considered (weakly connected components for
+the directed graphs, which are also the strongly connected components for the undirected ones).
+
+* find() follows the parent pointers of all the nodes at once with path halving (every node on the
+  way is pointed to its grandparent).
+* union() links the edges of a chunk in rounds. In every round, the root of the smaller component of
+  every edge (by the sizes at the start of the round, the larger ID on ties) is linked under the root of
+  the other one. As the roots only get linked under larger ones in this order, no cycles are made, and
+  the roots left are found again for the next round.
+'''
+import numpy as np
+
+from degree_stats import CHUNK_BYTES, iter_edge_chunks
+from profiling import count
+
+
+class UnionFind:
+    '''
+    Union-find over the node IDs 0..n-1, growing with the largest node ID seen
+    '''
+
+    def __init__(self, num_nodes=0):
+        self.parent = np.arange(num_nodes, dtype=np.int64)
+        self.size = np.ones(num_nodes, dtype=np.int64)
+        # Nodes seen in the edges (the IDs missing from an edge list are not nodes)
+        self.present = np.zeros(num_nodes, dtype=bool)
+
+    def _grow(self, num_nodes):
+        old_num_nodes = len(self.parent)
+        if(num_nodes <= old_num_nodes):
+            return
+        num_nodes = max(num_nodes, 2*old_num_nodes)
+        self.parent = np.concatenate((self.parent, np.arange(old_num_nodes, num_nodes, dtype=np.int64)))
+        self.size = np.concatenate((self.size, np.ones(num_nodes - old_num_nodes, dtype=np.int64)))
+        self.present = np.concatenate((self.present, np.zeros(num_nodes - old_num_nodes, dtype=bool)))
+
+    def find(self, nodes):
+        '''
+        Get the roots of the components of an array of nodes (halving the paths on the way)
+        '''
+        parent = self.parent
+        roots = np.array(nodes, dtype=np.int64)
+        active = np.flatnonzero(parent[roots] != roots)
+        while(len(active)):
+            grandparents = parent[parent[roots[active]]]
+            parent[roots[active]] = grandparents
+            roots[active] = grandparents
+            active = active[parent[grandparents] != grandparents]
+        return roots
+
+    def union(self, src, dst):
+        '''
+        Merge the components of the ends of every edge (src[i], dst[i])
+        '''
+        src = np.asarray(src, dtype=np.int64)
+        dst = np.asarray(dst, dtype=np.int64)
+        if(len(src) == 0):
+            return
+        if(min(src.min(), dst.min()) < 0):
+            raise ValueError("Negative node IDs")
+        self._grow(int(max(src.max(), dst.max())) + 1)
+        self.present[src] = True
+        self.present[dst] = True
+
+        src, dst = self.find(src), self.find(dst)
+        while(True):
+            differ = src != dst
+            if(not differ.any()):
+                break
+            src, dst = src[differ], dst[differ]
+            count("union_find_rounds")
+
+            # Linking the root of the smaller component under the other root (union by size)
+            src_size, dst_size = self.size[src], self.size[dst]
+            src_smaller = (src_size < dst_size) | ((src_size == dst_size) & (src > dst))
+            children = np.where(src_smaller, src, dst)
+            self.parent[children] = np.where(src_smaller, dst, src)
+
+            # Every linked root adds its size (at the start of the round) to the root it ends up under
+            children = np.sort(children)
+            children = children[np.concatenate(([True], children[1:] != children[:-1]))]
+            np.add.at(self.size, self.find(children), self.size[children])
+            src, dst = self.find(src), self.find(dst)
+
+    def get_components(self):
+        '''
+        Get the components of the nodes seen so far
+
+        Returns a dict with:
+        node_ids: Sorted array of the node IDs
+        labels: Array of the component of every node of node_ids (numbered in the order of their smallest node ID)
+        sizes: Array of the number of nodes of every component
+        num_components: Number of components
+        largest_fraction: Fraction of the nodes in the largest component
+        '''
+        node_ids = np.flatnonzero(self.present)
+        roots = self.find(node_ids)
+        _, first, labels = np.unique(roots, return_index=True, return_inverse=True)
+        rank = np.empty(len(first), dtype=np.int64)
+        rank[np.argsort(first)] = np.arange(len(first))
+        labels = rank[labels]
+        sizes = np.bincount(labels, minlength=len(first))
+        return {
+            "node_ids": node_ids,
+            "labels": labels,
+            "sizes": sizes,
+            "num_components": len(sizes),
+            "largest_fraction": int(sizes.max())/len(node_ids) if len(node_ids) else 0.0,
+        }
+
+
+def get_streamed_components(dataset, chunk_bytes=CHUNK_BYTES):
+    '''
+    Get the connected components (see UnionFind.get_components) of a text or gzipped edge list in one
+    streaming pass
+    '''
+    union_find = UnionFind()
+    for src, dst in iter_edge_chunks(dataset, chunk_bytes):
+        union_find.union(src, dst)
+    return union_find.get_components()
+
+
+def get_edge_components(num_nodes, src, dst):
+    '''
+    Get the connected components of the nodes 0..num_nodes-1 from the arrays of the ends of the edges
+
+    Returns:
+    (labels, sizes): labels[i] is the component of the node i and sizes[label] its number of nodes (same
+    numbering as a BFS from every unlabelled node in order)
+    '''
+    union_find = UnionFind(num_nodes)
+    union_find.present[:] = True
+    union_find.union(src, dst)
+    components = union_find.get_components()
+    return components["labels"], components["sizes"]
+
+
+if __name__ == "__main__":
+    # Checking the components against a BFS from every unlabelled node on random graphs
+    import random
+
+    from bfs import get_bfs_distances
+    from csr_graph import CSRGraph
+
+    def get_bfs_component_labels(graph):
+        undirected = graph.to_undirected()
+        labels = np.full(undirected.num_nodes, -1, dtype=np.int64)
+        sizes = []
+        for node in range(undirected.num_nodes):
+            if(labels[node] == -1):
+                reached = get_bfs_distances(undirected, node) >= 0
+                labels[reached] = len(sizes)
+                sizes.append(int(np.count_nonzero(reached)))
+        return labels, np.array(sizes, dtype=np.int64)
+
+    rng = random.Random(0)
+    for trial in range(300):
+        num_nodes = rng.randint(1, 40)
+        num_edges = rng.randint(0, 2*num_nodes)
+        src = np.array([rng.randrange(num_nodes) for _ in range(num_edges)], dtype=np.int64)
+        dst = np.array([rng.randrange(num_nodes) for _ in range(num_edges)], dtype=np.int64)
+        graph = CSRGraph.from_edges(src, dst, directed=False, node_ids=np.arange(num_nodes))
+        labels, sizes = get_edge_components(num_nodes, src, dst)
+        expected_labels, expected_sizes = get_bfs_component_labels(graph)
+        assert np.array_equal(labels, expected_labels) and np.array_equal(sizes, expected_sizes), trial
+    print("Union-find components match the BFS components on all the random graphs")
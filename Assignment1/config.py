@@ -4,6 +4,11 @@ from pathlib import Path
 DATASET_DIR = Path("./datasets")
 PLOT_DIR = Path("./plots")
 ANSWER_LOCATION = Path("./answers.txt")
+CACHE_DIR = Path("./cache")
+PROFILE_LOCATION = Path("./profile.jsonl")
+# Set the environment variable PROFILING=1 to profile the metrics when running q1.py, q2.py or
+# run_assignment.py (off by default, and importing the modules never turns it on, see profiling.py)
+PROFILING = os.environ.get("PROFILING", "0") == "1"
 
 if not os.path.exists(DATASET_DIR):
     os.mkdir(DATASET_DIR)
@@ -11,8 +16,14 @@ if not os.path.exists(DATASET_DIR):
 if not os.path.exists(PLOT_DIR):
     os.mkdir(PLOT_DIR)
 
+if not os.path.exists(CACHE_DIR):
+    os.mkdir(CACHE_DIR)
+
 CONFIG = {
     "DATASET_DIR": DATASET_DIR,
     "PLOT_DIR": PLOT_DIR,
-    "ANSWER_LOCATION": ANSWER_LOCATION
+    "ANSWER_LOCATION": ANSWER_LOCATION,
+    "CACHE_DIR": CACHE_DIR,
+    "PROFILE_LOCATION": PROFILE_LOCATION,
+    "PROFILING": PROFILING
 }
\ No newline at end of file
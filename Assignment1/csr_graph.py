@@ -0,0 +1,133 @@
+import numpy as np
+
+
+class CSRGraph:
+    '''
+    Compact array-backed graph in CSR (compressed sparse row) form.
+
+    Nodes are stored by their index (0..num_nodes-1) and `node_ids` maps an index back to the
+    original node ID of the dataset, so the node IDs don't have to be contiguous.
+    For directed graphs the CSR arrays hold the out-neighbours of every node, for undirected
+    graphs every edge is stored in both directions.
+    '''
+
+    def __init__(self, node_ids, offsets, targets, directed):
+        self.node_ids = node_ids
+        self.offsets = offsets
+        self.targets = targets
+        self.directed = directed
+        self._sources = None
+
+    @classmethod
+    def from_edges(cls, src, dst, directed=True, node_ids=None):
+        '''
+        Make a graph from the arrays of source and destination node IDs of the edges
+
+        node_ids: Optional array of all the node IDs (to keep the isolated nodes also)
+        '''
+        src = np.asarray(src, dtype=np.int64)
+        dst = np.asarray(dst, dtype=np.int64)
+        all_ids = np.concatenate((src, dst))
+        if(node_ids is not None):
+            all_ids = np.concatenate((all_ids, np.asarray(node_ids, dtype=np.int64)))
+        node_ids = np.unique(all_ids)
+
+        src_idx = np.searchsorted(node_ids, src)
+        dst_idx = np.searchsorted(node_ids, dst)
+        if(not directed):
+            # Storing every edge in both the directions (self loops only once)
+            not_loop = src_idx != dst_idx
+            src_idx, dst_idx = (np.concatenate((src_idx, dst_idx[not_loop])),
+                                np.concatenate((dst_idx, src_idx[not_loop])))
+        return cls._from_index_edges(node_ids, src_idx, dst_idx, directed)
+
+    @classmethod
+    def from_snap_graph(cls, graph, directed=True):
+        '''
+        Make a graph from a SNAP graph (PNGraph or PUNGraph)
+        '''
+        node_ids = [node.GetId() for node in graph.Nodes()]
+        edges = [edge.GetId() for edge in graph.Edges()]
+        src = [src for src, _ in edges]
+        dst = [dst for _, dst in edges]
+        return cls.from_edges(src, dst, directed=directed, node_ids=node_ids)
+
+    @classmethod
+    def _from_index_edges(cls, node_ids, src_idx, dst_idx, directed):
+        num_nodes = len(node_ids)
+        # Sorting the edges by (source, target) and removing the duplicate edges
+        keys = np.unique(src_idx.astype(np.int64) * max(num_nodes, 1) + dst_idx)
+        src_idx = keys // max(num_nodes, 1)
+        dst_idx = keys % max(num_nodes, 1)
+        offsets = np.zeros(num_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src_idx, minlength=num_nodes), out=offsets[1:])
+        return cls(node_ids, offsets, dst_idx.astype(np.int64), directed)
+
+    @property
+    def num_nodes(self):
+        return len(self.node_ids)
+
+    @property
+    def num_edges(self):
+        if(self.directed):
+            return len(self.targets)
+        src_idx, dst_idx = self.edges()
+        num_self_loops = int(np.count_nonzero(src_idx == dst_idx))
+        return (len(self.targets) + num_self_loops) // 2
+
+    def degrees(self):
+        '''
+        Get the array of (out) degrees of all the nodes
+        '''
+        return np.diff(self.offsets)
+
+    def neighbors(self, index):
+        return self.targets[self.offsets[index]:self.offsets[index + 1]]
+
+    def edges(self):
+        '''
+        Get the (source, target) index arrays of all the stored edges
+        '''
+        # The sources are expanded from the offsets only once, as many views reuse them
+        if(self._sources is None):
+            self._sources = np.repeat(np.arange(self.num_nodes, dtype=np.int64), self.degrees())
+        return self._sources, self.targets
+
+    def reverse(self):
+        '''
+        Get the graph with all the edges reversed (in-neighbours of the original graph)
+        '''
+        if(not self.directed):
+            return self
+        src_idx, dst_idx = self.edges()
+        return CSRGraph._from_index_edges(self.node_ids, dst_idx, src_idx, True)
+
+    def to_undirected(self):
+        '''
+        Get the undirected version of the graph
+        '''
+        if(not self.directed):
+            return self
+        src_idx, dst_idx = self.edges()
+        not_loop = src_idx != dst_idx
+        return CSRGraph._from_index_edges(self.node_ids,
+                                          np.concatenate((src_idx, dst_idx[not_loop])),
+                                          np.concatenate((dst_idx, src_idx[not_loop])),
+                                          False)
+
+    def adjacency_lists(self):
+        '''
+        Get the adjacency as a list of python lists (faster to walk in pure python loops)
+        '''
+        targets = self.targets.tolist()
+        offsets = self.offsets.tolist()
+        return [targets[offsets[i]:offsets[i + 1]] for i in range(self.num_nodes)]
+
+    def index_of(self, node_id):
+        '''
+        Get the index of a node from its original node ID
+        '''
+        index = int(np.searchsorted(self.node_ids, node_id))
+        if(index >= self.num_nodes or self.node_ids[index] != node_id):
+            raise KeyError(node_id)
+        return index
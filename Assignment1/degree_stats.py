@@ -0,0 +1,107 @@
+'''
+Streaming degree statistics of a text (or .gz) edge list, without building the graph.
+
+The edge list is read in chunks of lines, and the out and in degrees are accumulated with np.bincount
+over the node IDs of every chunk, so only the degree arrays (and not the edges) are kept in memory.
+All the statistics (highest degree nodes, number of nodes of a degree, degree distribution) are then
+found from these arrays, so the file is read only once.
+
+Every line of the edge list is counted as one edge (as in the SNAP datasets, where every edge is listed
+once), and the total degree of a node is its out degree + its in degree, as SNAP's GetDeg.
+'''
+import gzip
+
+import numpy as np
+
+from profiling import count
+
+CHUNK_BYTES = 1 << 24
+
+
+def open_edge_list(dataset):
+    '''
+    Open a text or gzipped edge list for reading
+    '''
+    if(str(dataset).endswith(".gz")):
+        return gzip.open(dataset, "rt")
+    return open(dataset, "r")
+
+
+def iter_edge_chunks(dataset, chunk_bytes=CHUNK_BYTES):
+    '''
+    Generate the (src, dst) arrays of the edge list, about chunk_bytes of the file at a time
+    '''
+    with open_edge_list(dataset) as f:
+        while(True):
+            lines = f.readlines(chunk_bytes)
+            if(not lines):
+                break
+            edges = np.loadtxt(lines, dtype=np.int64, comments="#", usecols=(0, 1), ndmin=2)
+            count("edge_list_chunks")
+            if(len(edges)):
+                yield edges[:, 0], edges[:, 1]
+
+
+def _add_counts(counts, node_ids):
+    # Adding the bincount of the node IDs, growing the counts array if needed
+    new_counts = np.bincount(node_ids)
+    if(len(new_counts) > len(counts)):
+        new_counts[:len(counts)] += counts
+        return new_counts
+    counts[:len(new_counts)] += new_counts
+    return counts
+
+
+def get_streamed_degrees(dataset, chunk_bytes=CHUNK_BYTES):
+    '''
+    Get the degrees of all the nodes of an edge list in one streaming pass
+
+    Returns:
+    (node_ids, out_degrees, in_degrees): Arrays over the nodes present in the edge list (sorted by ID)
+    '''
+    out_counts = np.zeros(0, dtype=np.int64)
+    in_counts = np.zeros(0, dtype=np.int64)
+    for src, dst in iter_edge_chunks(dataset, chunk_bytes):
+        if(src.min() < 0 or dst.min() < 0):
+            raise ValueError("Negative node IDs in {}".format(dataset))
+        out_counts = _add_counts(out_counts, src)
+        in_counts = _add_counts(in_counts, dst)
+
+    size = max(len(out_counts), len(in_counts))
+    out_counts = np.pad(out_counts, (0, size - len(out_counts)))
+    in_counts = np.pad(in_counts, (0, size - len(in_counts)))
+    node_ids = np.flatnonzero((out_counts + in_counts) > 0)
+    return node_ids, out_counts[node_ids], in_counts[node_ids]
+
+
+def get_degree_summary(node_ids, degrees, degree=4):
+    '''
+    Get the statistics of an array of node degrees
+
+    Returns a dict with the highest degree, the node IDs with the highest degree, the number of nodes
+    with the given degree and the degree distribution (degrees, counts)
+    '''
+    node_ids = np.asarray(node_ids)
+    highest_degree = int(degrees.max()) if len(degrees) else 0
+    distribution_degrees, distribution_counts = np.unique(degrees, return_counts=True)
+    return {
+        "highest_degree": highest_degree,
+        "highest_degree_node_ids": node_ids[degrees == highest_degree].tolist(),
+        "degree": degree,
+        "num_nodes_with_degree": int(np.count_nonzero(degrees == degree)),
+        "distribution": (distribution_degrees, distribution_counts),
+    }
+
+
+def get_streamed_degree_stats(dataset, degree=4, chunk_bytes=CHUNK_BYTES):
+    '''
+    Get the degree statistics (see get_degree_summary) of the total, out and in degrees of an edge list
+
+    Returns a dict {"total": ..., "out": ..., "in": ...} of the statistics
+    '''
+    node_ids, out_degrees, in_degrees = get_streamed_degrees(dataset, chunk_bytes)
+    return {
+        "total": get_degree_summary(node_ids, out_degrees + in_degrees, degree),
+        "out": get_degree_summary(node_ids, out_degrees, degree),
+        "in": get_degree_summary(node_ids, in_degrees, degree),
+    }
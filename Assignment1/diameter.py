@@ -0,0 +1,102 @@
+'''
+Exact diameter of the largest connected component using the iFUB method (Crescenzi et al.).
+
+1. A double sweep (BFS from the highest degree node, then from the node farthest from it) gives a
+   lower bound of the diameter, and the node u in the middle of the longest path found.
+2. With F_i being the nodes at the distance i from u, every node at the distance <= i-1 from u has
+   eccentricity <= 2(i-1). So going over the levels from the farthest one, the eccentricities of the
+   nodes of F_i are found by BFS, and the search stops as soon as the largest eccentricity seen is
+   more than 2(i-1), which then is the diameter.
+
+Usually only a small number of BFS are needed. With a time budget, the current lower and upper
+bounds are returned when the budget runs out.
+'''
+import time
+
+import numpy as np
+
+from bfs import get_bfs_distances, get_component_labels
+from profiling import profiled
+
+
+@profiled
+def get_exact_diameter(graph, time_budget=None):
+    '''
+    Get the diameter of the largest connected component of the graph (directions are not considered)
+
+    graph: CSRGraph
+    time_budget: Optional time limit in seconds, after which the current bounds are returned
+
+    Returns a dict with:
+    diameter: The diameter (the lower bound if the time budget ran out)
+    exact: Whether the diameter is exact
+    lower_bound, upper_bound: The final bounds of the diameter
+    num_bfs: Number of BFS runs
+    bounds_history: List of (num_bfs, lower_bound, upper_bound) as the bounds converged
+    '''
+    start_time = time.perf_counter()
+    undirected = graph.to_undirected()
+    labels, sizes = get_component_labels(undirected)
+    result = {"num_bfs": 0, "bounds_history": []}
+
+    def bfs(source):
+        result["num_bfs"] += 1
+        return get_bfs_distances(undirected, source)
+
+    def finish(lower_bound, upper_bound):
+        result["lower_bound"] = lower_bound
+        result["upper_bound"] = upper_bound
+        result["diameter"] = lower_bound
+        result["exact"] = lower_bound == upper_bound
+        return result
+
+    def record(lower_bound, upper_bound):
+        entry = (result["num_bfs"], lower_bound, upper_bound)
+        if(not result["bounds_history"] or result["bounds_history"][-1] != entry):
+            result["bounds_history"].append(entry)
+        return time_budget is not None and time.perf_counter() - start_time > time_budget
+
+    if(len(sizes) == 0):
+        return finish(0, 0)
+    largest_component = int(np.argmax(sizes))
+
+    # Double sweep from the highest degree node of the largest component
+    degrees = np.where(labels == largest_component, undirected.degrees(), -1)
+    root = int(np.argmax(degrees))
+    dist_root = bfs(root)
+    a = int(np.argmax(dist_root))
+    dist_a = bfs(a)
+    b = int(np.argmax(dist_a))
+    lower_bound = int(dist_a[b])
+    upper_bound = 2*int(dist_root.max())
+    if(record(lower_bound, upper_bound) or lower_bound >= upper_bound):
+        return finish(lower_bound, upper_bound)
+
+    # Middle node of the shortest path from a to b
+    dist_b = bfs(b)
+    on_path = (dist_a + dist_b == lower_bound) & (dist_b == lower_bound // 2)
+    u = int(np.flatnonzero(on_path)[0])
+
+    dist_u = bfs(u)
+    ecc_u = int(dist_u.max())
+    lower_bound = max(lower_bound, ecc_u)
+    upper_bound = min(upper_bound, 2*ecc_u)
+    if(record(lower_bound, upper_bound)):
+        return finish(lower_bound, upper_bound)
+
+    # Going over the levels (fringes) of the BFS from u, from the farthest one
+    level = ecc_u
+    while(upper_bound > lower_bound):
+        for node in np.flatnonzero(dist_u == level).tolist():
+            lower_bound = max(lower_bound, int(bfs(node).max()))
+            if(record(lower_bound, upper_bound) or lower_bound >= upper_bound):
+                return finish(lower_bound, upper_bound)
+        if(lower_bound > 2*(level - 1)):
+            break
+        upper_bound = max(lower_bound, 2*(level - 1))
+        level -= 1
+        if(record(lower_bound, upper_bound)):
+            return finish(lower_bound, upper_bound)
+    upper_bound = lower_bound
+    record(lower_bound, upper_bound)
+    return finish(lower_bound, upper_bound)
@@ -0,0 +1,101 @@
+'''
+Seeded synthetic graph generators for the scaling benchmarks.
+
+All the generators are vectorized with numpy and give the same graph for the same arguments and seed.
+They return (num_nodes, src, dst): the arrays of the edges between the nodes 0..num_nodes-1, without
+self loops and duplicate edges, so the number of edges can be a little less than requested.
+
+* R-MAT: Every edge falls recursively in one of the 4 quadrants of the adjacency matrix with the
+  probabilities (a, b, c, 1-a-b-c), as in Graph500 (the node IDs are then shuffled).
+* Barabasi-Albert: Preferential attachment, every new node is linked to edges_per_node older nodes,
+  with the linear time method of Batagelj and Brandes (the chains of the copied edge ends are
+  resolved with pointer jumping instead of one node at a time).
+* Erdos-Renyi: G(n, m), uniformly random node pairs.
+'''
+import numpy as np
+
+GENERATORS = ("rmat", "ba", "er")
+
+
+def _get_unique_edges(num_nodes, src, dst):
+    # Removing the self loops and the duplicate edges (keeping the first occurrence)
+    not_loop = src != dst
+    src, dst = src[not_loop], dst[not_loop]
+    _, first = np.unique(src*num_nodes + dst, return_index=True)
+    first.sort()
+    return src[first], dst[first]
+
+
+def get_rmat_edges(num_edges, edge_factor=16, a=0.57, b=0.19, c=0.19, seed=0):
+    '''
+    Generate an R-MAT graph with about num_edges edges and num_edges/edge_factor nodes (rounded up to a power of 2)
+    '''
+    rng = np.random.default_rng(seed)
+    scale = max(1, int(np.ceil(np.log2(max(num_edges//edge_factor, 2)))))
+    src = np.zeros(num_edges, dtype=np.int64)
+    dst = np.zeros(num_edges, dtype=np.int64)
+    for bit in range(scale):
+        r = rng.random(num_edges)
+        # Quadrants: a (0, 0), b (0, 1), c (1, 0), d (1, 1)
+        src |= (r >= a + b).astype(np.int64) << bit
+        dst |= (((r >= a) & (r < a + b)) | (r >= a + b + c)).astype(np.int64) << bit
+    num_nodes = 1 << scale
+    permutation = rng.permutation(num_nodes)
+    src, dst = _get_unique_edges(num_nodes, permutation[src], permutation[dst])
+    return num_nodes, src, dst
+
+
+def get_ba_edges(num_edges, edges_per_node=8, seed=0):
+    '''
+    Generate a Barabasi-Albert graph with about num_edges edges (num_edges/edges_per_node nodes)
+    '''
+    rng = np.random.default_rng(seed)
+    num_nodes = max(2, num_edges//edges_per_node)
+    num_slots = 2*num_nodes*edges_per_node
+    # Slot 2i is the new node of the edge i and slot 2i+1 copies the node of a random earlier slot
+    ends = np.empty(num_slots, dtype=np.int64)
+    ends[0::2] = np.arange(num_nodes*edges_per_node)//edges_per_node
+    pointers = np.arange(num_slots, dtype=np.int64)
+    odd = np.arange(1, num_slots, 2)
+    pointers[odd] = (rng.random(len(odd))*odd).astype(np.int64)
+    # Following the copies until they reach a new node slot
+    while(True):
+        unresolved = pointers[odd] % 2 == 1
+        if(not unresolved.any()):
+            break
+        pointers[odd[unresolved]] = pointers[pointers[odd[unresolved]]]
+    ends[odd] = ends[pointers[odd]]
+    src, dst = _get_unique_edges(num_nodes, ends[0::2], ends[1::2])
+    return num_nodes, src, dst
+
+
+def get_er_edges(num_edges, edge_factor=8, seed=0):
+    '''
+    Generate an Erdos-Renyi G(n, m) graph with about num_edges edges and num_edges/edge_factor nodes
+    '''
+    rng = np.random.default_rng(seed)
+    num_nodes = max(2, num_edges//edge_factor)
+    src = rng.integers(0, num_nodes, num_edges, dtype=np.int64)
+    dst = rng.integers(0, num_nodes, num_edges, dtype=np.int64)
+    src, dst = _get_unique_edges(num_nodes, src, dst)
+    return num_nodes, src, dst
+
+
+def get_undirected_edges(num_nodes, src, dst):
+    '''
+    Get every undirected edge of the generated edges once, as (smaller node, larger node)
+    '''
+    return _get_unique_edges(num_nodes, np.minimum(src, dst), np.maximum(src, dst))
+
+
+def get_edges(generator, num_edges, seed=0):
+    '''
+    Generate the edges of a graph with the named generator ("rmat", "ba" or "er")
+    '''
+    if(generator == "rmat"):
+        return get_rmat_edges(num_edges, seed=seed)
+    if(generator == "ba"):
+        return get_ba_edges(num_edges, seed=seed)
+    if(generator == "er"):
+        return get_er_edges(num_edges, seed=seed)
+    raise ValueError("Unknown generator: {} (use one of {})".format(generator, ", ".join(GENERATORS)))
@@ -0,0 +1,191 @@
+'''
+Loading the edge list datasets through a binary CSR snapshot cache.
+
+The first load of a text (or .gz) edge list parses it once and saves the node IDs and the directed
+and undirected CSR arrays as .npy files in CONFIG["CACHE_DIR"]. The later loads memory-map these
+arrays instead of parsing the text again. A snapshot is used only if the size and the modification
+time of the dataset file are the same as when it was made; if these changed, the hash of the file
+is compared before parsing it again (so just touching a file doesn't rebuild the snapshot).
+
+Every write of a snapshot goes to a new data directory, and meta.json (replaced atomically) points to
+it last, as in the GML cache of Assignment2. So several processes (the task runner, q1.py and q2.py)
+can load the same dataset at once: the last writer wins, and a reader never sees a half written or
+deleted version.
+'''
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+
+import numpy as np
+import snap
+
+from config import CONFIG
+from csr_graph import CSRGraph
+
+SNAPSHOT_VERSION = 2
+# Age after which a snapshot directory still being written is taken as left by a failed write
+STALE_WRITE_SECONDS = 3600
+SNAPSHOT_ARRAYS = ["node_ids", "directed_offsets", "directed_targets", "undirected_offsets", "undirected_targets"]
+
+
+def get_file_hash(file_location):
+    '''
+    Get the sha256 hash of a file (read in chunks)
+    '''
+    file_hash = hashlib.sha256()
+    with open(file_location, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+
+def read_edge_list(dataset):
+    '''
+    Read the (src, dest) arrays from a text or gzipped edge list (lines starting with # are comments)
+    '''
+    edges = np.loadtxt(dataset, dtype=np.int64, comments="#", usecols=(0, 1), ndmin=2)
+    return edges[:, 0], edges[:, 1]
+
+
+def get_snapshot_dir(dataset, cache_dir):
+    return os.path.join(cache_dir, os.path.basename(dataset) + ".csr")
+
+
+def _read_snapshot_meta(snapshot_dir):
+    meta_location = os.path.join(snapshot_dir, "meta.json")
+    if(not os.path.exists(meta_location)):
+        return None
+    with open(meta_location, "r") as f:
+        return json.load(f)
+
+
+def _write_snapshot_meta(snapshot_dir, meta):
+    # Written to a temporary file and renamed, so meta.json is always complete
+    tmp_location = os.path.join(snapshot_dir, "meta.json.tmp-{}-{}".format(os.getpid(), uuid.uuid4().hex))
+    with open(tmp_location, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp_location, os.path.join(snapshot_dir, "meta.json"))
+
+
+def _write_snapshot(dataset, snapshot_dir, meta):
+    src, dst = read_edge_list(dataset)
+    directed_graph = CSRGraph.from_edges(src, dst, directed=True)
+    undirected_graph = directed_graph.to_undirected()
+    arrays = {
+        "node_ids": directed_graph.node_ids,
+        "directed_offsets": directed_graph.offsets,
+        "directed_targets": directed_graph.targets,
+        "undirected_offsets": undirected_graph.offsets,
+        "undirected_targets": undirected_graph.targets,
+    }
+
+    # Every write goes to its own data directory (renamed from tmp- to data- once complete), so the
+    # arrays of another process (being written, or memory-mapped by a reader) are never touched
+    version_id = "{}-{}".format(os.getpid(), uuid.uuid4().hex)
+    tmp_dir = os.path.join(snapshot_dir, "tmp-" + version_id)
+    data_dir = "data-" + version_id
+    os.makedirs(tmp_dir)
+    for name in SNAPSHOT_ARRAYS:
+        np.save(os.path.join(tmp_dir, name + ".npy"), arrays[name])
+    os.replace(tmp_dir, os.path.join(snapshot_dir, data_dir))
+    meta["data_dir"] = data_dir
+
+    old_meta = _read_snapshot_meta(snapshot_dir)
+    _write_snapshot_meta(snapshot_dir, meta)
+
+    # Removing the versions older than the one just replaced (a reader may still be opening that one),
+    # the directories of the writes which never finished, and the arrays of the first snapshot layout
+    keep = {data_dir, (old_meta or {}).get("data_dir")}
+    for name in os.listdir(snapshot_dir):
+        path = os.path.join(snapshot_dir, name)
+        try:
+            if(name.startswith("data-") and name not in keep):
+                shutil.rmtree(path, ignore_errors=True)
+            elif(name.startswith("tmp-") and time.time() - os.path.getmtime(path) > STALE_WRITE_SECONDS):
+                shutil.rmtree(path, ignore_errors=True)
+            elif(name.endswith(".npy")):
+                os.remove(path)
+        except FileNotFoundError:
+            # Removed by another process at the same time
+            pass
+
+
+def get_snapshot(dataset, cache_dir=CONFIG["CACHE_DIR"]):
+    '''
+    Get the meta data of an up to date snapshot of the dataset, making it if needed
+
+    Returns the dict of meta.json, with the directory of the arrays of the snapshot in "location"
+    '''
+    snapshot_dir = get_snapshot_dir(dataset, cache_dir)
+    stat = os.stat(dataset)
+    meta = _read_snapshot_meta(snapshot_dir)
+    # A data directory removed by hand (or by another writer) is made again
+    if(meta is not None and meta.get("version") == SNAPSHOT_VERSION and os.path.isdir(os.path.join(snapshot_dir, meta["data_dir"]))):
+        if(meta["size"] == stat.st_size and meta["mtime"] == stat.st_mtime_ns):
+            meta["location"] = os.path.join(snapshot_dir, meta["data_dir"])
+            return meta
+        if(meta["size"] == stat.st_size and meta["sha256"] == get_file_hash(dataset)):
+            # Only the modification time changed
+            meta["mtime"] = stat.st_mtime_ns
+            _write_snapshot_meta(snapshot_dir, meta)
+            meta["location"] = os.path.join(snapshot_dir, meta["data_dir"])
+            return meta
+
+    os.makedirs(snapshot_dir, exist_ok=True)
+    meta = {
+        "version": SNAPSHOT_VERSION,
+        "source": os.path.abspath(dataset),
+        "size": stat.st_size,
+        "mtime": stat.st_mtime_ns,
+        "sha256": get_file_hash(dataset),
+    }
+    _write_snapshot(dataset, snapshot_dir, meta)
+    meta["location"] = os.path.join(snapshot_dir, meta["data_dir"])
+    return meta
+
+
+def get_dataset_hash(dataset, cache_dir=CONFIG["CACHE_DIR"]):
+    '''
+    Get the sha256 hash of the dataset file (kept in its snapshot, so the file is hashed only when it changed)
+    '''
+    return get_snapshot(dataset, cache_dir)["sha256"]
+
+
+def load_graph(dataset, directed=True, cache_dir=CONFIG["CACHE_DIR"]):
+    '''
+    Load a CSRGraph of the dataset with its arrays memory-mapped from the snapshot
+
+    dataset: Location of the text or .gz edge list
+    directed: Whether to get the directed or the undirected view of the edges
+    '''
+    prefix = "directed" if directed else "undirected"
+    while(True):
+        location = get_snapshot(dataset, cache_dir)["location"]
+
+        def load_array(name):
+            return np.load(os.path.join(location, name + ".npy"), mmap_mode="r")
+
+        try:
+            return CSRGraph(load_array("node_ids"), load_array(prefix + "_offsets"), load_array(prefix + "_targets"), directed)
+        except FileNotFoundError:
+            # The version was removed by other processes writing the snapshot at the same time
+            continue
+
+
+def to_snap_graph(graph):
+    '''
+    Make a new SNAP graph (PNGraph or PUNGraph) from a CSRGraph, without reading the dataset again
+    '''
+    snap_graph = snap.TNGraph.New() if graph.directed else snap.TUNGraph.New()
+    node_ids = graph.node_ids.tolist()
+    for node_id in node_ids:
+        snap_graph.AddNode(node_id)
+    src_idx, dst_idx = graph.edges()
+    for src, dst in zip(src_idx.tolist(), dst_idx.tolist()):
+        # The undirected edges are stored in both the directions, so adding them only once
+        if(graph.directed or src <= dst):
+            snap_graph.AddEdge(node_ids[src], node_ids[dst])
+    return snap_graph
@@ -0,0 +1,170 @@
+'''
+Shortest path length (hop) distribution of a graph, computed in memory.
+
+The neighbourhood function N(t) is the number of (ordered) node pairs (x, y) with d(x, y) <= t.
+From it the histogram of the shortest path lengths, the average distance and the effective diameter
+(90th percentile of the distances) are found.
+
+* "exact" method: One BFS from every node, only meant for small graphs.
+* "hyperanf" method (Boldi, Rosa and Vigna): Every node keeps a HyperLogLog counter of the nodes within
+  the distance t from it. The counter of a node for t+1 is the union (register wise max) of its own
+  counter and the counters of its neighbours, so one iteration is one vectorized pass over the edges.
+  The relative standard error of every counter is about 1.04/sqrt(2^log2m).
+'''
+import numpy as np
+
+from bfs import get_bfs_distances, get_frontier_neighbors
+from profiling import count, profiled
+
+EFFECTIVE_DIAMETER_QUANTILE = 0.9
+
+
+def _hash_nodes(num_nodes, seed):
+    # splitmix64 hash of the node indices (the uint64 arithmetic wraps around)
+    x = np.arange(num_nodes, dtype=np.uint64) + np.uint64(seed)*np.uint64(0x9E3779B97F4A7C15)
+    x = x + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30)))*np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27)))*np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def _get_hll_estimates(registers):
+    # HyperLogLog estimates (with the small range correction) of the counters, one per row
+    num_registers = registers.shape[1]
+    if(num_registers >= 128):
+        alpha = 0.7213/(1 + 1.079/num_registers)
+    else:
+        alpha = {16: 0.673, 32: 0.697, 64: 0.709}[num_registers]
+    raw = alpha*num_registers**2/np.ldexp(1.0, -registers.astype(np.int64)).sum(axis=1)
+    num_zeros = np.count_nonzero(registers == 0, axis=1)
+    small = (raw <= 2.5*num_registers) & (num_zeros > 0)
+    raw[small] = num_registers*np.log(num_registers/num_zeros[small])
+    return raw
+
+
+def get_neighbourhood_function_hyperanf(graph, log2m=6, seed=0, max_dist=None, chunk_bytes=1 << 26):
+    '''
+    Estimate the neighbourhood function with HyperANF
+
+    graph: CSRGraph (directions are not considered)
+    log2m: log2 of the number of registers of every counter (4 to 16)
+    max_dist: Optional limit on the number of iterations
+    chunk_bytes: Maximum size of the neighbour registers gathered at once (bounds the memory used)
+    '''
+    undirected = graph.to_undirected()
+    num_nodes = undirected.num_nodes
+    num_registers = 1 << log2m
+    degrees = undirected.degrees()
+
+    # Initial counters: every node added to its own counter
+    hashes = _hash_nodes(num_nodes, seed)
+    register_index = (hashes & np.uint64(num_registers - 1)).astype(np.int64)
+    rest = hashes >> np.uint64(log2m)
+    rank = np.full(num_nodes, 64 - log2m + 1, dtype=np.uint8)
+    for bit in range(64 - log2m - 1, -1, -1):
+        rank[((rest >> np.uint64(bit)) & np.uint64(1)) == 1] = bit + 1
+    registers = np.zeros((num_nodes, num_registers), dtype=np.uint8)
+    registers[np.arange(num_nodes), register_index] = rank
+    estimates = _get_hll_estimates(registers)
+
+    has_nbrs = np.flatnonzero(degrees > 0)
+    starts = undirected.offsets[has_nbrs]
+    chunk_edges = max(1, chunk_bytes // num_registers)
+    changed = np.ones(num_nodes, dtype=bool)
+    neighbourhood_function = [float(num_nodes)]
+    while(max_dist is None or len(neighbourhood_function) <= max_dist):
+        # Only the counters of the nodes with a neighbour changed in the last iteration can change
+        active = np.zeros(num_nodes, dtype=bool)
+        if(len(has_nbrs) > 0):
+            active[has_nbrs] = np.logical_or.reduceat(changed[undirected.targets], starts)
+        active = np.flatnonzero(active)
+        if(len(active) == 0):
+            break
+
+        # Register wise max over the neighbours, for chunks of nodes with about chunk_edges edges.
+        # All the new counters are found from the old ones before any of them is updated.
+        updates = []
+        edge_ends = np.cumsum(degrees[active])
+        chunk_start = 0
+        while(chunk_start < len(active)):
+            edges_before = edge_ends[chunk_start - 1] if chunk_start > 0 else 0
+            chunk_end = max(chunk_start + 1, int(np.searchsorted(edge_ends, edges_before + chunk_edges, side="right")))
+            nodes = active[chunk_start:chunk_end]
+            nbrs = get_frontier_neighbors(undirected, nodes)
+            count("hyperanf_edges_scanned", len(nbrs))
+            segment_starts = np.concatenate(([0], np.cumsum(degrees[nodes])[:-1]))
+            new_registers = np.maximum.reduceat(registers[nbrs], segment_starts, axis=0)
+            np.maximum(new_registers, registers[nodes], out=new_registers)
+            node_changed = (new_registers != registers[nodes]).any(axis=1)
+            updates.append((nodes[node_changed], new_registers[node_changed]))
+            chunk_start = chunk_end
+
+        count("hyperanf_iterations")
+        changed = np.zeros(num_nodes, dtype=bool)
+        for nodes, new_registers in updates:
+            registers[nodes] = new_registers
+            estimates[nodes] = _get_hll_estimates(new_registers)
+            changed[nodes] = True
+        if(not changed.any()):
+            break
+        neighbourhood_function.append(float(estimates.sum()))
+
+    # The estimates are made non decreasing, as the neighbourhood function is
+    return np.maximum.accumulate(np.array(neighbourhood_function))
+
+
+def get_neighbourhood_function_exact(graph):
+    '''
+    Get the exact neighbourhood function with one BFS from every node (for small graphs)
+    '''
+    undirected = graph.to_undirected()
+    histogram = np.zeros(1, dtype=np.int64)
+    for node in range(undirected.num_nodes):
+        dist = get_bfs_distances(undirected, node)
+        counts = np.bincount(dist[dist >= 0])
+        if(len(counts) > len(histogram)):
+            histogram = np.concatenate((histogram, np.zeros(len(counts) - len(histogram), dtype=np.int64)))
+        histogram[:len(counts)] += counts
+    return np.cumsum(histogram).astype(float)
+
+
+@profiled
+def get_hop_distribution(graph, method="hyperanf", log2m=6, seed=0):
+    '''
+    Get the shortest path length distribution of a graph
+
+    graph: CSRGraph (directions are not considered)
+    method: "hyperanf" (approximate, for large graphs) or "exact" (one BFS per node, for small graphs)
+
+    Returns a dict with:
+    neighbourhood_function: Array with N(t) for t = 0, 1, ...
+    distance_histogram: Array with the number of (ordered) node pairs at every distance t (t >= 1)
+    average_distance: Average shortest path length over the connected pairs
+    effective_diameter: 90th percentile of the shortest path lengths (linearly interpolated)
+    '''
+    if(method == "hyperanf"):
+        neighbourhood_function = get_neighbourhood_function_hyperanf(graph, log2m, seed)
+    elif(method == "exact"):
+        neighbourhood_function = get_neighbourhood_function_exact(graph)
+    else:
+        raise ValueError("Unknown method for the hop distribution: {}".format(method))
+
+    distance_histogram = np.diff(neighbourhood_function, prepend=neighbourhood_function[0])
+    num_pairs = distance_histogram.sum()
+    distances = np.arange(len(distance_histogram))
+    average_distance = float((distances*distance_histogram).sum()/num_pairs) if num_pairs > 0 else 0.0
+
+    # Effective diameter, interpolating between the two distances around the quantile
+    effective_diameter = 0.0
+    if(num_pairs > 0):
+        cumulative = np.cumsum(distance_histogram)/num_pairs
+        t = int(np.searchsorted(cumulative, EFFECTIVE_DIAMETER_QUANTILE))
+        previous = cumulative[t - 1] if t > 0 else 0.0
+        effective_diameter = (t - 1) + (EFFECTIVE_DIAMETER_QUANTILE - previous)/(cumulative[t] - previous)
+
+    return {
+        "neighbourhood_function": neighbourhood_function,
+        "distance_histogram": distance_histogram,
+        "average_distance": average_distance,
+        "effective_diameter": float(effective_diameter),
+    }
@@ -0,0 +1,112 @@
+'''
+Metrics of a graph as the tasks of the task runner (see task_runner.py).
+
+Every metric is a module level function (so it can be run in a worker process) taking the CSRGraph of
+the dataset, then the results of its input tasks (in the declared order), then its parameters. The
+results are plain python values and numpy arrays, so they can be pickled to the result cache.
+'''
+import numpy as np
+
+from graph_loader import to_snap_graph
+from profiling import profiled
+from subgraph_view import SubgraphView
+from components import get_edge_components
+from bridges import get_scc_labels, get_strong_bridges
+from rectangles import get_rectangle_counts
+from degree_stats import get_degree_summary
+from triangles import get_triangle_stats
+
+
+@profiled
+def get_counts(graph):
+    '''
+    Get the number of nodes and edges
+    '''
+    return {"num_nodes": graph.num_nodes, "num_edges": graph.num_edges}
+
+
+@profiled
+def get_filtered_counts(graph, divisor=3):
+    '''
+    Get the number of nodes and edges left after removing the nodes with node_id divisible by divisor
+    '''
+    view = SubgraphView.from_predicate(graph, lambda node_ids: node_ids % divisor != 0)
+    return {"num_nodes": view.num_nodes, "num_edges": view.num_edges}
+
+
+@profiled
+def get_degree_stats(graph, degree=4):
+    '''
+    Get the degree statistics (in + out degree for the directed graphs, as SNAP's GetDeg)
+
+    Returns a dict with the highest degree, the node IDs with the highest degree, the number of nodes
+    with the given degree and the degree distribution (degrees, counts)
+    '''
+    degrees = graph.degrees()
+    if(graph.directed):
+        degrees = degrees + np.bincount(graph.targets, minlength=graph.num_nodes)
+    return get_degree_summary(graph.node_ids, degrees, degree)
+
+
+@profiled
+def get_components(graph):
+    '''
+    Get the (weakly) connected components
+
+    Returns a dict with the component label of every node and the sizes of the components (found with
+    the union-find of components.py over the edges)
+    '''
+    src_idx, dst_idx = graph.edges()
+    labels, sizes = get_edge_components(graph.num_nodes, src_idx, dst_idx)
+    return {"labels": labels, "sizes": sizes}
+
+
+@profiled
+def get_strong_components(graph):
+    '''
+    Get the strongly connected components (the same as the components for undirected graphs)
+    '''
+    labels, num_sccs = get_scc_labels(graph.adjacency_lists())
+    labels = np.array(labels, dtype=np.int64)
+    return {"labels": labels, "sizes": np.bincount(labels, minlength=num_sccs)}
+
+
+@profiled
+def get_largest_component_counts(graph, components):
+    '''
+    Get the number of nodes and edges of the largest component
+
+    components: Result of get_components or get_strong_components
+    '''
+    if(len(components["sizes"]) == 0):
+        return {"num_nodes": 0, "num_edges": 0, "fraction_of_nodes": 0.0}
+    largest = int(np.argmax(components["sizes"]))
+    view = SubgraphView(graph, components["labels"] == largest)
+    return {"num_nodes": view.num_nodes, "num_edges": view.num_edges, "fraction_of_nodes": view.num_nodes/graph.num_nodes}
+
+
+@profiled
+def get_num_articulation_points(graph):
+    return len(to_snap_graph(graph).GetArtPoints())
+
+
+@profiled
+def get_avg_clustering_coeff(graph):
+    return get_triangle_stats(graph, num_workers=1)["avg_clustering"]
+
+
+@profiled
+def get_num_triangles(graph):
+    return get_triangle_stats(graph, num_workers=1)["num_triangles"]
+
+
+@profiled
+def get_num_rectangles(graph, method="wedge"):
+    num_rectangles, _ = get_rectangle_counts(graph, method)
+    return num_rectangles
+
+
+@profiled
+def get_num_edge_bridges(graph):
+    return len(get_strong_bridges(graph))
+
@@ -0,0 +1,117 @@
+'''
+Profiling of the metric methods, written as JSON lines next to the answers.
+
+Every method decorated with @profiled writes one record (a JSON object on one line) to
+CONFIG["PROFILE_LOCATION"] with its wall time, CPU time, peak allocation (tracemalloc) and the
+hot-path counters incremented with count() while it ran, for example:
+
+{"metric": "q2.Network.get_num_rectangles", "wall_time": 0.41, "cpu_time": 0.41, "peak_memory": 1048576,
+ "counters": {"rectangle_wedges": 1254380, "rectangle_common_neighbour_counts": 592106}, ...}
+
+* A profiled method called from another one gets its own record, and its counters are also added to
+  the counters of the caller. The peak allocation is only measured for the outermost call (and not
+  if tracemalloc was already started by someone else, as in benchmark_scaling.py).
+* Profiling is off by default. The entry points (q1.py, q2.py and run_assignment.py) call
+  set_enabled(CONFIG["PROFILING"]), so it is turned on there with the environment variable PROFILING=1,
+  and importing the modules never turns it on. When it is off, a profiled method only costs one extra
+  function call and a flag check, and count() returns at once.
+'''
+import collections
+import functools
+import json
+import os
+import time
+import tracemalloc
+
+from config import CONFIG
+
+_enabled = False
+_location = CONFIG["PROFILE_LOCATION"]
+# Records of the profiled calls running now (the innermost last)
+_running = []
+
+
+def set_enabled(enabled, location=None):
+    '''
+    Turn the profiling on or off, and optionally change the location of the records
+    '''
+    global _enabled, _location
+    _enabled = enabled
+    if(location is not None):
+        _location = location
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    '''
+    Remove the records written so far
+    '''
+    if(_enabled):
+        open(_location, "w").close()
+
+
+def count(name, amount=1):
+    '''
+    Add amount to the hot-path counter name of the profiled method running now (if any)
+    '''
+    if(_running):
+        _running[-1]["counters"][name] += amount
+
+
+def _get_metric_name(function):
+    # The file name is used instead of __module__, which is "__main__" for the script being run
+    module = os.path.splitext(os.path.basename(function.__code__.co_filename))[0]
+    return "{}.{}".format(module, function.__qualname__)
+
+
+def _write_record(record):
+    with open(_location, "a") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+def profiled(function):
+    '''
+    Decorator writing a profiling record for every call of function (when the profiling is on)
+    '''
+    name = _get_metric_name(function)
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if(not _enabled):
+            return function(*args, **kwargs)
+
+        trace_memory = not _running and not tracemalloc.is_tracing()
+        record = {"metric": name, "parent": _running[-1]["metric"] if _running else None,
+                  "counters": collections.Counter()}
+        _running.append(record)
+        if(trace_memory):
+            tracemalloc.start()
+        status = "error"
+        start_wall, start_cpu = time.perf_counter(), time.process_time()
+        try:
+            result = function(*args, **kwargs)
+            status = "ok"
+            return result
+        finally:
+            wall_time, cpu_time = time.perf_counter() - start_wall, time.process_time() - start_cpu
+            peak_memory = None
+            if(trace_memory):
+                _, peak_memory = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+            _running.pop()
+            if(_running):
+                _running[-1]["counters"].update(record["counters"])
+            record.update({
+                "status": status,
+                "wall_time": wall_time,
+                "cpu_time": cpu_time,
+                "peak_memory": peak_memory,
+                "counters": dict(record["counters"]),
+                "pid": os.getpid(),
+                "timestamp": time.time(),
+            })
+            _write_record(record)
+    return wrapper
@@ -1,138 +1,206 @@
 import os
 import sys
-import snap
+import numpy as np
+import matplotlib.pyplot as plt
 
 from config import CONFIG
+import profiling
+from profiling import profiled
+from components import get_streamed_components
+from degree_stats import get_streamed_degree_stats
+from graph_loader import load_graph, to_snap_graph
+from subgraph_view import SubgraphView
+from diameter import get_exact_diameter
+from hop_distribution import get_hop_distribution
 
 dataset = os.path.join(CONFIG["DATASET_DIR"], "facebook_combined.txt")
 plot_dir = CONFIG["PLOT_DIR"]
 answer_loc = CONFIG["ANSWER_LOCATION"]
 
+def plot_hop_distribution(hop_distribution, network_name):
+    '''
+    Plot the shortest path length distribution (from get_hop_distribution) to
+    “shortest_path_<network_name>.png” in the "plots" directory
+    '''
+    distance_histogram = hop_distribution["distance_histogram"]
+    plt.figure()
+    plt.plot(range(1, len(distance_histogram)), distance_histogram[1:], marker="o")
+    plt.yscale("log")
+    plt.xlabel("Shortest path length")
+    plt.ylabel("Number of shortest paths")
+    plt.title("{} - shortest path distribution".format(network_name))
+    fig_destination = os.path.join(plot_dir, "shortest_path_{}.png".format(network_name))
+    plt.savefig(fig_destination)
+    plt.close()
+
+def plot_component_size_distribution(component_sizes, network_name):
+    '''
+    Plot the distribution of the sizes of the connected components to
+    “connected_comp_<network_name>.png” in the "plots" directory
+    '''
+    sizes, counts = np.unique(component_sizes, return_counts=True)
+    plt.figure()
+    plt.plot(sizes, counts, marker="o", linestyle="none")
+    plt.xscale("log")
+    plt.yscale("log")
+    plt.xlabel("Size of the connected component")
+    plt.ylabel("Number of components")
+    plt.title("{} - connected component distribution".format(network_name))
+    fig_destination = os.path.join(plot_dir, "connected_comp_{}.png".format(network_name))
+    plt.savefig(fig_destination)
+    plt.close()
+
 class Network:
 
     def __init__(self, dataset):
-        # Loading original (without removing any node) undirected graph from the facebook dataset text file
+        # Loading original (without removing any node) undirected graph from the binary snapshot of the
+        # facebook dataset text file (the text file is parsed only once, see graph_loader.py)
         self.dataset = dataset
-        self.graph = snap.LoadEdgeList(snap.PUNGraph, dataset, 0, 1)
+        self.csr_graph = load_graph(dataset, directed=False)
+        self.graph = to_snap_graph(self.csr_graph)
         self.network_name = ""
+        self._components = None
     
+    @profiled
     def get_num_of_nodes(self):
         try:
             return self.graph.GetNodes()
         except Exception as e:
             print(e)
 
+    @profiled
     def get_num_of_edges(self):
         try:
             return self.graph.GetEdges()
         except Exception as e:
             print(e)
         
+    @profiled
+    def get_view_without_nodeids_divisible_by_3(self):
+        '''
+        Get a view of the graph with all the nodes with node_id divisible by 3 removed
+
+        The view only keeps a mask over the nodes of the graph (no copy of the graph is made), and
+        gives the number of nodes (num_nodes) and edges (num_edges) of the remaining graph.
+        '''
+        return SubgraphView.from_predicate(self.csr_graph, lambda node_ids: node_ids%3 != 0)
+
+    @profiled
     def get_network_without_nodeids_divisible_by_3(self):
         '''
-        Get a new graph with all the nodes with node_id divisible by 3 removed
+        Get a new SNAP graph with all the nodes with node_id divisible by 3 removed
+
+        The graph is built from the view of get_view_without_nodeids_divisible_by_3 (copying the
+        remaining nodes and edges). Callers that only need the number of nodes and edges should use
+        that view instead, as main does.
         '''
-        new_graph = snap.LoadEdgeList(snap.PUNGraph, self.dataset, 0, 1)
-        for node in new_graph.Nodes():
-            if(node.GetId()%3==0):
-                new_graph.DelNode(node.GetId())
-        return new_graph
+        return to_snap_graph(self.get_view_without_nodeids_divisible_by_3().to_graph())
 
+    @profiled
     def get_nodes_with_highest_degree(self):
         '''
         Calculates the number of nodes with the highest degree and also get the node IDs with the highest degree in the network.
 
+        The degrees are counted in one streaming pass over the edge list (see degree_stats.py).
+
         Return:
         (num_nodes_with_highest_degree, list_of_nodeids_with_highest_deg)
 
         '''
-        highest_deg = 0
-        for node in self.graph.Nodes():
-            highest_deg = max(highest_deg, node.GetDeg())
-        
-        num_nodes_with_highest_degree = 0
-        list_of_nodeids_with_highest_deg = []
-        for node in self.graph.Nodes():
-            if(node.GetDeg() == highest_deg):
-                num_nodes_with_highest_degree += 1
-                list_of_nodeids_with_highest_deg.append(node.GetId())
-        
+        degree_stats = get_streamed_degree_stats(self.dataset)["total"]
+        list_of_nodeids_with_highest_deg = degree_stats["highest_degree_node_ids"]
+        num_nodes_with_highest_degree = len(list_of_nodeids_with_highest_deg)
         return (num_nodes_with_highest_degree, list_of_nodeids_with_highest_deg)
     
-    def plot_shortest_path_distribution(self):
+    @profiled
+    def plot_shortest_path_distribution(self, method="hyperanf"):
         '''
         Plot the distribution of the shortest path lengths in the network
-        '''
-        self.graph.PlotShortPathDistr(self.network_name, "{} - shortest path distribution".format(self.network_name))
 
-        '''
-        Here all the files will be generated in this directory only. So the files have to moved to "plots"
-        directory. Also files will be having default snap generated name, so that also needs to be changed to 
-        “shortest_path_<network_name>.png”
-        '''
-        for file in os.listdir(os.getcwd()):
-            if((file.endswith(".png") or file.endswith(".plt") or file.endswith(".tab")) and (self.network_name in file)):
-                file_location = os.path.join(os.getcwd(), file)
-                file_format = file[file.rfind(".")+1:]
+        The distribution is computed in memory (see hop_distribution.py) and plotted directly to
+        “shortest_path_<network_name>.png” in the "plots" directory, so no intermediate files are made.
 
-                # Only saving .png files and removing others
-                if(file_format!="png"):
-                    os.remove(file_location)
-                    continue
-                
-                file_name = "shortest_path_{}.{}".format(self.network_name, file_format)
-                new_file_location = os.path.join(plot_dir, file_name)
-                os.replace(file_location, new_file_location)
+        method: "hyperanf" (approximate, for large graphs) or "exact" (one BFS per node)
+
+        Returns a dict with the neighbourhood function, the histogram of the shortest path lengths,
+        the average distance and the effective diameter
+        '''
+        hop_distribution = get_hop_distribution(self.csr_graph, method)
+        plot_hop_distribution(hop_distribution, self.network_name)
+        return hop_distribution
     
+    @profiled
     def get_num_articulation_points(self):
         '''
         Get the number of articulation points in the network'''
         list_articulation_points = self.graph.GetArtPoints()
         return len(list_articulation_points)
     
+    @profiled
+    def get_components(self):
+        '''
+        Get the connected components of the network, streamed from the edge list only once with a
+        union-find (see components.py), so the graph is not needed
+
+        Returns a dict with the node IDs, their component labels, the sizes of the components, the
+        number of components and the fraction of nodes in the largest one
+        '''
+        if(self._components is None):
+            self._components = get_streamed_components(self.dataset)
+        return self._components
+
+    @profiled
     def get_num_weakly_connected_comps(self):
         '''
         Get the number of weakly connected components of the network'''
-        list_weakly_connected_comps = self.graph.GetWccs()
-        return len(list_weakly_connected_comps)
+        return self.get_components()["num_components"]
 
+    @profiled
     def get_num_strongly_connected_comps(self):
         '''
-        Get the number of strongly connected components of the network'''
-        list_strongly_connected_comps = self.graph.GetSccs()
-        return len(list_strongly_connected_comps)
-    
-    def plot_connected_components_distribution(self):
-        '''
-        Plot the distribution of sizes of connected components in the network
-        '''
-        self.graph.PlotSccDistr(self.network_name, "{} - connected component distribution".format(self.network_name))
+        Get the number of strongly connected components of the network (the same as the weakly
+        connected components, as the network is undirected)'''
+        return self.get_components()["num_components"]
 
+    @profiled
+    def get_largest_component_fraction(self):
         '''
-        Here all the files will be generated in this directory only. So the files have to moved to "plots"
-        directory. Also files will be having default snap generated name, so that also needs to be changed to 
-        “connected_comp_<network_name>.png”
+        Get the fraction of nodes in the largest connected component of the network'''
+        return self.get_components()["largest_fraction"]
+    
+    @profiled
+    def plot_connected_components_distribution(self, component_sizes=None):
         '''
-        for file in os.listdir(os.getcwd()):
-            if((file.endswith(".png") or file.endswith(".plt") or file.endswith(".tab")) and (self.network_name in file)):
-                file_location = os.path.join(os.getcwd(), file)
-                file_format = file[file.rfind(".")+1:]
+        Plot the distribution of sizes of connected components in the network
 
-                # Only saving .png files and removing others
-                if(file_format!="png"):
-                    os.remove(file_location)
-                    continue
+        The plot is saved directly to “connected_comp_<network_name>.png” in the "plots" directory.
 
-                file_name = "connected_comp_{}.{}".format(self.network_name, file_format)
-                new_file_location = os.path.join(plot_dir, file_name)
-                os.replace(file_location, new_file_location)
+        component_sizes: Optional array of the sizes of all the components (the streamed components if not given)
+        '''
+        if(component_sizes is None):
+            component_sizes = self.get_components()["sizes"]
+        plot_component_size_distribution(component_sizes, self.network_name)
     
+    @profiled
     def get_diameter(self, num_test_nodes=100):
         '''
         Get the diameter of the longest connected component
         '''
         return self.graph.GetBfsFullDiam(num_test_nodes)
 
+    @profiled
+    def get_exact_diameter(self, time_budget=None):
+        '''
+        Get the exact diameter of the largest connected component using the double sweep and iFUB
+        bounds (see diameter.py), instead of approximating it with BFS from sampled test nodes
+
+        time_budget: Optional time limit in seconds, after which the current bounds are returned
+
+        Returns a dict with the diameter, whether it is exact, the lower and upper bounds, the number
+        of BFS runs and the history of the bounds
+        '''
+        return get_exact_diameter(self.csr_graph, time_budget)
+
 class Tee(object):
     def __init__(self, *files):
         self.files = files
@@ -148,6 +216,9 @@ if __name__ == "__main__":
     backup = sys.stdout
     sys.stdout = Tee(sys.stdout, f)
 
+    # Profiling the metrics of this run (see profiling.py)
+    profiling.set_enabled(CONFIG["PROFILING"])
+
     print()
     print("Question 1")
     print("-----------")
@@ -165,12 +236,12 @@ if __name__ == "__main__":
     print("1. Number of nodes present in the network: {}".format(network.get_num_of_nodes()))
 
     # Getting new network with all nodes with ids divisible by 3 removed
-    new_network = network.get_network_without_nodeids_divisible_by_3()
-    print("2. Number of nodes present in the new network after removing specified nodes: {}".format(new_network.GetNodes()))
+    new_network = network.get_view_without_nodeids_divisible_by_3()
+    print("2. Number of nodes present in the new network after removing specified nodes: {}".format(new_network.num_nodes))
 
     print("3. Number of edges present in the network: {}".format(network.get_num_of_edges()))
 
-    print("4. Number of edges present in the new network after removing specified nodes: {}".format(new_network.GetEdges()))
+    print("4. Number of edges present in the new network after removing specified nodes: {}".format(new_network.num_edges))
 
     num_nodes_with_highest_degree, list_of_nodeids_with_highest_deg = network.get_nodes_with_highest_degree()
     print("5. Number of nodes with the highest degree in the network: {}".format(num_nodes_with_highest_degree))
@@ -178,30 +249,31 @@ if __name__ == "__main__":
     print(*list_of_nodeids_with_highest_deg)
 
     print("6. Plotting the distribution of shortest path lengths...")
-    network.plot_shortest_path_distribution()
+    hop_distribution = network.plot_shortest_path_distribution()
     print("   Plotting Done.")
+    print("   Average shortest path length: {:.4f}, effective diameter: {:.4f}".format(hop_distribution["average_distance"], hop_distribution["effective_diameter"]))
 
     print()
 
     # Part B
     print("B. Components of the network")
 
-    print("1. The fraction of nodes in the largest connected component of the network: {:.4f}".format(network.graph.GetMxSccSz()))
+    print("1. The fraction of nodes in the largest connected component of the network: {:.4f}".format(network.get_largest_component_fraction()))
 
     print("2. The number of articulation points in the network: {}".format(network.get_num_articulation_points()))
 
     # Since the graph is undirected, the number of connected components will be equal to number of SCCs and WCCs
-    print("3. The number of connected components in the network: {}".format(network.get_num_strongly_connected_comps()))
-    print("   The number of strongly connected components (SCC) in the network: {}".format(network.get_num_strongly_connected_comps()))
+    num_components = network.get_num_strongly_connected_comps()
+    print("3. The number of connected components in the network: {}".format(num_components))
+    print("   The number of strongly connected components (SCC) in the network: {}".format(num_components))
     print("   The number of weakly connected components (WCC) in the network: {}".format(network.get_num_weakly_connected_comps()))
 
     print("4. Plotting the distribution of sizes of connected components...")
     network.plot_connected_components_distribution()
     print("   Plotting Done.")
 
-    print("5. The approximated diameter of the largest connected component of the network taking {} test nodes: {}".format(10, network.get_diameter(10)))
-    print("   The approximated diameter of the largest connected component of the network taking {} test nodes: {}".format(100, network.get_diameter(100)))
-    print("   The approximated diameter of the largest connected component of the network taking {} test nodes: {}".format(1000, network.get_diameter(1000)))
+    diameter_result = network.get_exact_diameter()
+    print("5. The diameter of the largest connected component of the network: {} (exact, found with {} BFS runs)".format(diameter_result["diameter"], diameter_result["num_bfs"]))
     
     print()
     print("#################")
\ No newline at end of file
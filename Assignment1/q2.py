@@ -1,104 +1,162 @@
 import os
-import snap
 import sys
 import matplotlib.pyplot as plt
 
 from config import CONFIG
+import profiling
+from profiling import profiled
+from graph_loader import load_graph, to_snap_graph
+from bridges import get_bridges, get_strong_bridges
+from rectangles import get_rectangle_counts
+from triangles import get_triangle_stats, get_triad_census
+from degree_stats import get_streamed_degree_stats
+from components import get_streamed_components
 
 dataset = os.path.join(CONFIG["DATASET_DIR"], "email-Eu-core.txt")
 plot_dir = CONFIG["PLOT_DIR"]
 answer_loc = CONFIG["ANSWER_LOCATION"]
 
+def plot_degree_distribution(degrees, counts, network_name):
+    '''
+    Plot the degree distribution (number of nodes of every degree) to “deg-dist.jpg” in the "plots" directory
+    '''
+    plt.plot(degrees, counts)
+    plt.xlabel("Degree")
+    plt.ylabel("Frequency")
+    plt.title("Degree distribution of {} network".format(network_name))
+    fig_destination = os.path.join(plot_dir, "deg-dist.jpg")
+    plt.savefig(fig_destination)
+
 class Network:
 
     def __init__(self, dataset):
-        # Loading original (without removing any node) directed graph from the dataset text file
+        # Loading original (without removing any node) directed graph from the binary snapshot of the
+        # dataset text file (the text file is parsed only once, see graph_loader.py)
         self.dataset = dataset
-        self.graph = snap.LoadEdgeList(snap.PNGraph, dataset, 0, 1)
+        self.csr_graph = load_graph(dataset, directed=True)
+        self.graph = to_snap_graph(self.csr_graph)
         
         # Getting an undirected version of the graph
-        self.undirected_graph = snap.LoadEdgeList(snap.PUNGraph, dataset, 0, 1)
+        self.undirected_graph = to_snap_graph(load_graph(dataset, directed=False))
         self.network_name = ""
+        self._degree_stats = None
+        self._triangle_stats = None
+        self._components = None
     
+    @profiled
     def get_num_of_nodes(self):
         try:
             return self.graph.GetNodes()
         except Exception as e:
             print(e)
 
+    @profiled
     def get_num_of_edges(self):
         try:
             return self.graph.GetEdges()
         except Exception as e:
             print(e)
     
+    @profiled
     def get_num_nodes_with_degree_equal_4(self):
         '''
         Calculates the number of nodes which have degree = 4 in the network.
 
+        The degrees (in + out) are counted in one streaming pass over the edge list (see degree_stats.py).
         '''
-        num_nodes_with_deqree_4 = 0
-        for node in self.graph.Nodes():
-            if(node.GetDeg() == 4):
-                num_nodes_with_deqree_4 += 1
-        
-        return num_nodes_with_deqree_4
+        return self.get_degree_stats()["num_nodes_with_degree"]
+
+    @profiled
+    def get_degree_stats(self):
+        '''
+        Get the statistics of the total degrees, streamed from the edge list only once
+        '''
+        if(self._degree_stats is None):
+            self._degree_stats = get_streamed_degree_stats(self.dataset, degree=4)["total"]
+        return self._degree_stats
     
+    @profiled
     def get_num_weakly_connected_comps(self):
         '''
-        Get the number of weakly connected components of the network'''
-        list_weakly_connected_comps = self.graph.GetWccs()
-        return len(list_weakly_connected_comps)
+        Get the number of weakly connected components of the network
 
+        The components are streamed from the edge list only once with a union-find (see components.py),
+        which does not consider the directions of the edges.'''
+        if(self._components is None):
+            self._components = get_streamed_components(self.dataset)
+        return self._components["num_components"]
+
+    @profiled
     def get_num_strongly_connected_comps(self):
         '''
         Get the number of strongly connected components of the network'''
         list_strongly_connected_comps = self.graph.GetSccs()
         return len(list_strongly_connected_comps)
     
+    @profiled
     def plot_degree_distribution(self):
         '''
         Plot the degree distribution
         '''
 
-        deg_dist = self.graph.GetDegCnt()
-        x, y = [], []
-        for elem in deg_dist:
-            x.append(elem.GetVal1())
-            y.append(elem.GetVal2())
-
-        plt.plot(x, y)
-        plt.xlabel("Degree")
-        plt.ylabel("Frequency")
-        plt.title("Degree distribution of {} network".format(self.network_name))
-        fig_destination = os.path.join(plot_dir, "deg-dist.jpg")
-        plt.savefig(fig_destination)
+        degrees, counts = self.get_degree_stats()["distribution"]
+        plot_degree_distribution(degrees, counts, self.network_name)
     
+    @profiled
+    def get_triangle_stats(self):
+        '''
+        Get the triangles and clustering coefficients of all the nodes, found in one pass (see triangles.py)
+        '''
+        if(self._triangle_stats is None):
+            self._triangle_stats = get_triangle_stats(self.csr_graph)
+        return self._triangle_stats
+
+    @profiled
     def get_avg_clustering_coeff(self):
         '''
         Get the average Clustering Coefficient
         '''
-        return self.graph.GetClustCf()
+        return self.get_triangle_stats()["avg_clustering"]
+
+    @profiled
+    def get_node_clustering_coeffs(self):
+        '''
+        Get the local clustering coefficient of every node
+
+        Returns a dict of {node_id: clustering_coefficient}
+        '''
+        local_clustering = self.get_triangle_stats()["local_clustering"]
+        return dict(zip(self.csr_graph.node_ids.tolist(), local_clustering.tolist()))
     
+    @profiled
+    def get_edge_bridges(self):
+        '''
+        Get the list of edge bridges as (src, dest) tuples
+        '''
+
+        '''
+        An edge is a bridge if, when removed, increases the number of connected components. 
+        Here only the strong edges are considered which when removed, increase the number of strongly connected components.
+        These are found in near linear time from the dominator trees of every SCC (see bridges.py)
+        instead of removing every edge and recounting the SCCs.
+        '''
+        return get_strong_bridges(self.csr_graph)
+
+    @profiled
     def get_num_edge_bridges(self):
         '''
         Get the number of edge bridges
         '''
-        
+        return len(self.get_edge_bridges())
+
+    @profiled
+    def get_undirected_edge_bridges(self):
         '''
-        An edge is a bridge if, when removed, increases the number of connected components. 
-        Here only the strong edges are considered which when removed, increase the number of strongly connected components
-        '''
-        count = 0
-        scc_count = self.get_num_strongly_connected_comps()
-        for edge in self.graph.Edges():
-            src, dest = edge.GetId()
-            self.graph.DelEdge(src, dest)
-            if(self.get_num_strongly_connected_comps() > scc_count):
-                count += 1
-            self.graph.AddEdge(src, dest)
-        return count
+        Get the list of edge bridges of the undirected version of the graph
+        '''
+        return get_bridges(self.csr_graph)
 
+    @profiled
     def get_num_triangles(self):
         '''
         Get the number of triangles
@@ -107,43 +165,61 @@ class Network:
         '''
         Here the different directions are not being considered
         '''
-        return self.graph.GetTriads()
+        return self.get_triangle_stats()["num_triangles"]
 
-    def get_num_rectangles(self):
+    @profiled
+    def get_node_triangle_counts(self):
         '''
-        Get the number of rectangles
+        Get the number of triangles every node is a part of
+
+        Returns a dict of {node_id: number_of_triangles}
         '''
+        node_triangles = self.get_triangle_stats()["node_triangles"]
+        return dict(zip(self.csr_graph.node_ids.tolist(), node_triangles.tolist()))
 
+    @profiled
+    def get_triad_census(self):
         '''
-        Using the same concept of getting the number of triangles, this function is being implemented without considering the direction.
+        Get the number of triads of each of the 16 types (directions are considered)
 
+        Returns a dict of {triad_type: number_of_triads}
         '''
-        # Making a copy of the graph
-        graph_copy = snap.LoadEdgeList(snap.PNGraph, self.dataset, 0, 1)
-        count_rectangles = 0
-        tot_nodes = graph_copy.GetNodes()
+        return get_triad_census(self.csr_graph)
 
-        for node1_id in range(tot_nodes):
-            for node2_id in range(node1_id+1, tot_nodes):
+    @profiled
+    def get_num_rectangles(self, method="wedge"):
+        '''
+        Get the number of rectangles
+        '''
 
-                # Getting the common neighbours of this diagonal containing nodes (node1, node2)
-                numNbrs = graph_copy.GetCmnNbrs(node1_id, node2_id)
+        '''
+        Using the same concept of getting the number of triangles, this function is being implemented without considering the direction.
+        The rectangles are counted from the degree ordered wedges (see rectangles.py), so every rectangle
+        is counted exactly once without making a copy of the graph and deleting the visited nodes.
 
-                # Counting all the rectangles being formed from all the other diagonal pairs
-                count_rectangles += (numNbrs*(numNbrs-1))//2
+        method: "wedge" or "sparse" (needs scipy)
+        '''
+        num_rectangles, _ = get_rectangle_counts(self.csr_graph, method)
+        return num_rectangles
 
-            # Since node1 has been visited, so it has to be removed from the
-            # graph otherwise, it will be recounted in any other rectangle
-            graph_copy.DelNode(node1_id)
+    @profiled
+    def get_node_rectangle_counts(self, method="wedge"):
+        '''
+        Get the number of rectangles every node is a part of
 
-        return count_rectangles
+        Returns a dict of {node_id: number_of_rectangles}
+        '''
+        _, per_node_rectangles = get_rectangle_counts(self.csr_graph, method)
+        return dict(zip(self.csr_graph.node_ids.tolist(), per_node_rectangles.tolist()))
 
+    @profiled
     def get_largest_wcc(self):
         '''
         Get a graph representing the largest weakly connected component in the original graph
         '''
         return self.graph.GetMxWcc()
     
+    @profiled
     def get_largest_scc(self):
         '''
         Get a graph representing the largest strongly connected component in the original graph
@@ -169,6 +245,9 @@ if __name__ == "__main__":
     backup = sys.stdout
     sys.stdout = Tee(sys.stdout, f)
 
+    # Profiling the metrics of this run (see profiling.py)
+    profiling.set_enabled(CONFIG["PROFILING"])
+
     print()
     print("Question 2")
     print("-----------")
@@ -0,0 +1,125 @@
+'''
+Counting the rectangles (4-cycles) of a graph without considering the direction of the edges.
+
+* "wedge" method: The nodes are ranked by degree, and for every node u only the wedges u - v - w with
+  both v and w ranked below u are enumerated, accumulating the number of such wedges for every end
+  node w in an array. Every rectangle is then counted exactly once, from its highest ranked node u
+  and the opposite node w, as C(number_of_wedges(u, w), 2).
+
+* "sparse" method: With A being the adjacency matrix, (A^2)[i][j] is the number of common neighbours
+  of i and j, so the node i is a corner of sum_j C((A^2)[i][j], 2) rectangles. Needs scipy.
+
+Both methods also give the number of rectangles every node is a part of, work with arbitrary node IDs
+and never modify the graph.
+'''
+import numpy as np
+
+from profiling import count
+
+try:
+    from scipy import sparse
+except ImportError:
+    sparse = None
+
+
+def _get_simple_undirected_adjacency(graph):
+    # Undirected adjacency lists without the self loops
+    adj = graph.to_undirected().adjacency_lists()
+    return [[v for v in nbrs if v != u] for u, nbrs in enumerate(adj)]
+
+
+def _count_rectangles_wedge(graph):
+    adj = _get_simple_undirected_adjacency(graph)
+    n = len(adj)
+
+    # Ranking the nodes by (degree, index)
+    order = sorted(range(n), key=lambda u: (len(adj[u]), u))
+    rank = [0]*n
+    for r, u in enumerate(order):
+        rank[u] = r
+    # Neighbours sorted by rank, so that a scan can stop at the first neighbour ranked above u
+    adj = [sorted(nbrs, key=rank.__getitem__) for nbrs in adj]
+
+    wedge_count = [0]*n
+    per_node = [0]*n
+    total = 0
+    num_wedges = 0
+    num_pairs = 0
+    for u in range(n):
+        rank_u = rank[u]
+        touched = []
+        lower_nbrs = []
+        for v in adj[u]:
+            if(rank[v] >= rank_u):
+                break
+            lower_nbrs.append(v)
+            for w in adj[v]:
+                if(rank[w] >= rank_u):
+                    break
+                if(wedge_count[w] == 0):
+                    touched.append(w)
+                wedge_count[w] += 1
+
+        num_pairs += len(touched)
+        for w in touched:
+            c = wedge_count[w]
+            num_wedges += c
+            num_rectangles = c*(c-1)//2
+            total += num_rectangles
+            per_node[u] += num_rectangles
+            per_node[w] += num_rectangles
+
+        # Every middle node v of a wedge u - v - w is in (wedges(u, w) - 1) of these rectangles
+        for v in lower_nbrs:
+            for w in adj[v]:
+                if(rank[w] >= rank_u):
+                    break
+                per_node[v] += wedge_count[w] - 1
+
+        for w in touched:
+            wedge_count[w] = 0
+
+    # Every pair (u, w) with common neighbours below u is one count of common neighbours
+    count("rectangle_wedges", num_wedges)
+    count("rectangle_common_neighbour_counts", num_pairs)
+    return total, np.array(per_node, dtype=np.int64)
+
+
+def _count_rectangles_sparse(graph):
+    if(sparse is None):
+        raise ImportError("scipy is needed for the sparse method of counting rectangles")
+    undirected = graph.to_undirected()
+    src_idx, dst_idx = undirected.edges()
+    not_loop = src_idx != dst_idx
+    n = undirected.num_nodes
+    adj_matrix = sparse.csr_matrix((np.ones(np.count_nonzero(not_loop), dtype=np.int64),
+                                    (src_idx[not_loop], dst_idx[not_loop])), shape=(n, n))
+
+    common_nbrs = (adj_matrix @ adj_matrix).tocsr()
+    common_nbrs.setdiag(0)
+    common_nbrs.eliminate_zeros()
+    count("rectangle_common_neighbour_counts", common_nbrs.nnz)
+    common_nbrs.data = common_nbrs.data*(common_nbrs.data - 1)//2
+
+    per_node = np.asarray(common_nbrs.sum(axis=1), dtype=np.int64).ravel()
+    # Every rectangle has 4 corners
+    total = int(per_node.sum())//4
+    return total, per_node
+
+
+def get_rectangle_counts(graph, method="wedge"):
+    '''
+    Count the rectangles of a graph (directions are not considered)
+
+    graph: CSRGraph
+    method: "wedge" (pure python, degree ordered wedges) or "sparse" (scipy sparse matrix product)
+
+    Returns:
+    (num_rectangles, per_node_rectangles) where per_node_rectangles[i] is the number of rectangles
+    the node graph.node_ids[i] is a part of
+    '''
+    if(method == "wedge"):
+        return _count_rectangles_wedge(graph)
+    elif(method == "sparse"):
+        return _count_rectangles_sparse(graph)
+    raise ValueError("Unknown method for counting rectangles: {}".format(method))
@@ -1,13 +1,148 @@
-import os
-from pathlib import Path
-from config import CONFIG
+'''
+Runs all the metrics of both the questions as one graph of tasks (see task_runner.py) and writes the
+answers of both the questions to answers.txt (and STDOUT).
+
+The metrics which don't depend on each other are run concurrently in a process pool, and their results
+are memoized in the cache folder, so a re-run only computes the metrics whose dataset, code or
+parameters changed (--no-cache computes all of them again, --clear-cache removes the memoized results
+first). The plots are drawn from the results. With PROFILING=1, the profiling records of the computed
+metrics (see profiling.py) are written to CONFIG["PROFILE_LOCATION"].
+'''
+import argparse
+import io
+import sys
 
-q1 = Path("./q1.py")
-q2 = Path("./q2.py")
+from config import CONFIG
+from task_runner import Task, TaskRunner
+from diameter import get_exact_diameter
+from hop_distribution import get_hop_distribution
+import metrics
+import profiling
+import q1
+import q2
 
 answer_loc = CONFIG["ANSWER_LOCATION"]
-with open(answer_loc, "w") as f:
-    f.write("")
 
-os.system("python {}".format(q1))
-os.system("python {}".format(q2))
+
+def add_tasks(runner):
+    '''
+    Add the tasks of both the questions to the runner
+    '''
+    # Question 1: facebook network (undirected)
+    for name, function, inputs, params in [
+        ("counts", metrics.get_counts, [], {}),
+        ("filtered_counts", metrics.get_filtered_counts, [], {"divisor": 3}),
+        ("degree_stats", metrics.get_degree_stats, [], {}),
+        ("hop_distribution", get_hop_distribution, [], {"method": "hyperanf"}),
+        ("components", metrics.get_components, [], {}),
+        ("largest_component", metrics.get_largest_component_counts, ["q1/components"], {}),
+        ("articulation_points", metrics.get_num_articulation_points, [], {}),
+        ("diameter", get_exact_diameter, [], {}),
+    ]:
+        runner.add(Task("q1/" + name, function, q1.dataset, False, inputs, params))
+
+    # Question 2: email-Eu-core network (directed)
+    for name, function, inputs, params in [
+        ("counts", metrics.get_counts, [], {}),
+        ("degree_stats", metrics.get_degree_stats, [], {"degree": 4}),
+        ("components", metrics.get_components, [], {}),
+        ("largest_wcc", metrics.get_largest_component_counts, ["q2/components"], {}),
+        ("strong_components", metrics.get_strong_components, [], {}),
+        ("largest_scc", metrics.get_largest_component_counts, ["q2/strong_components"], {}),
+        ("clustering", metrics.get_avg_clustering_coeff, [], {}),
+        ("triangles", metrics.get_num_triangles, [], {}),
+        ("rectangles", metrics.get_num_rectangles, [], {"method": "wedge"}),
+        ("edge_bridges", metrics.get_num_edge_bridges, [], {}),
+    ]:
+        runner.add(Task("q2/" + name, function, q2.dataset, True, inputs, params))
+
+
+def get_answers(results):
+    '''
+    Get the answers of both the questions (in the format of q1.py and q2.py) and draw the plots
+    '''
+    r = results
+    answers = io.StringIO()
+    out = lambda *args, **kwargs: print(*args, file=answers, **kwargs)
+
+    out()
+    out("Question 1")
+    out("-----------")
+    out()
+    out("A. Structure of the network")
+    out("1. Number of nodes present in the network: {}".format(r["q1/counts"]["num_nodes"]))
+    out("2. Number of nodes present in the new network after removing specified nodes: {}".format(r["q1/filtered_counts"]["num_nodes"]))
+    out("3. Number of edges present in the network: {}".format(r["q1/counts"]["num_edges"]))
+    out("4. Number of edges present in the new network after removing specified nodes: {}".format(r["q1/filtered_counts"]["num_edges"]))
+    out("5. Number of nodes with the highest degree in the network: {}".format(len(r["q1/degree_stats"]["highest_degree_node_ids"])))
+    out("   The node IDs with the highest degree in the network is/are:", end=" ")
+    out(*r["q1/degree_stats"]["highest_degree_node_ids"])
+    out("6. Plotting the distribution of shortest path lengths...")
+    q1.plot_hop_distribution(r["q1/hop_distribution"], "facebook")
+    out("   Plotting Done.")
+    out("   Average shortest path length: {:.4f}, effective diameter: {:.4f}".format(r["q1/hop_distribution"]["average_distance"], r["q1/hop_distribution"]["effective_diameter"]))
+    out()
+    out("B. Components of the network")
+    out("1. The fraction of nodes in the largest connected component of the network: {:.4f}".format(r["q1/largest_component"]["fraction_of_nodes"]))
+    out("2. The number of articulation points in the network: {}".format(r["q1/articulation_points"]))
+    # Since the graph is undirected, the number of connected components will be equal to number of SCCs and WCCs
+    num_components = len(r["q1/components"]["sizes"])
+    out("3. The number of connected components in the network: {}".format(num_components))
+    out("   The number of strongly connected components (SCC) in the network: {}".format(num_components))
+    out("   The number of weakly connected components (WCC) in the network: {}".format(num_components))
+    out("4. Plotting the distribution of sizes of connected components...")
+    q1.plot_component_size_distribution(r["q1/components"]["sizes"], "facebook")
+    out("   Plotting Done.")
+    out("5. The diameter of the largest connected component of the network: {} (exact, found with {} BFS runs)".format(r["q1/diameter"]["diameter"], r["q1/diameter"]["num_bfs"]))
+    out()
+    out("#################")
+
+    out()
+    out("Question 2")
+    out("-----------")
+    out()
+    out("A.")
+    out("  (a) Number of nodes: {}".format(r["q2/counts"]["num_nodes"]))
+    out("  (b) Number of edges: {}".format(r["q2/counts"]["num_edges"]))
+    out("B.")
+    out("  (a) Number of nodes with degree=4: {}".format(r["q2/degree_stats"]["num_nodes_with_degree"]))
+    out("  (b) Plotting the Degree distribution...")
+    q2.plot_degree_distribution(*r["q2/degree_stats"]["distribution"], "email-Eu-core")
+    out("      Plotting Done.")
+    out("C.")
+    out("  (a) Number of nodes in largest weakly connected component (WCC): {}".format(r["q2/largest_wcc"]["num_nodes"]))
+    out("      Number of edges in largest weakly connected component (WCC): {}".format(r["q2/largest_wcc"]["num_edges"]))
+    out("  (b) Number of nodes in largest strongly connected component (SCC): {}".format(r["q2/largest_scc"]["num_nodes"]))
+    out("      Number of edges in largest strongly connected component (SCC): {}".format(r["q2/largest_scc"]["num_edges"]))
+    out("D. Average Clustering Coefficient: {:.4f}".format(r["q2/clustering"]))
+    out("E. Number of triangles: {}".format(r["q2/triangles"]))
+    out("   Number of rectangles: {}".format(r["q2/rectangles"]))
+    out("F. Number of edge bridges: {}".format(r["q2/edge_bridges"]))
+    out()
+    out("#################")
+    return answers.getvalue()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the metrics of both the questions and write the answers")
+    parser.add_argument("--no-cache", action="store_true", help="Compute all the metrics again instead of reading the memoized results")
+    parser.add_argument("--clear-cache", action="store_true", help="Remove all the memoized results before running")
+    args = parser.parse_args()
+
+    # The profiling records of the metrics computed in this run (see profiling.py)
+    profiling.set_enabled(CONFIG["PROFILING"])
+    profiling.reset()
+    runner = TaskRunner(use_cache=not args.no_cache)
+    if(args.clear_cache):
+        runner.clear_cache()
+    add_tasks(runner)
+    results = runner.run()
+    for name, status in runner.status.items():
+        print("{}: {}".format(name, status if status == "cached" else "{:.3f} s".format(status)), file=sys.stderr)
+
+    answers = get_answers(results)
+    with open(answer_loc, "w") as f:
+        f.write(answers)
+    print(answers, end="")
+    if(profiling.is_enabled()):
+        print("Profiling records of the computed metrics written to {}".format(CONFIG["PROFILE_LOCATION"]), file=sys.stderr)
@@ -0,0 +1,158 @@
+'''
+Node-induced subgraph views over a CSRGraph.
+
+A view is only a boolean mask over the nodes of the graph, the adjacency is never copied. The number
+of nodes, the number of induced edges and the number of boundary edges (with only one end inside)
+are found in a single vectorized pass over the edge arrays. get_label_edge_stats does the same for
+all the groups of a node labelling (e.g. communities) at once.
+
+The views have the same methods and statistics as the ones of Assignment2 (num_nodes and num_edges,
+also as the networkx style number_of_nodes() and number_of_edges(), get_edge_stats and to_graph).
+The only difference is how the nodes are named: the graphs here keep the node IDs of the dataset,
+so the predicate of from_predicate is given the node IDs, and from_node_ids and node_ids work with
+them (from_nodes and nodes work with the node indices in both).
+'''
+import numpy as np
+
+from csr_graph import CSRGraph
+
+
+class SubgraphView:
+    '''
+    Subgraph of a CSRGraph induced by the nodes selected by a boolean mask
+    '''
+
+    def __init__(self, graph, node_mask):
+        self.graph = graph
+        self.node_mask = np.asarray(node_mask, dtype=bool)
+        self._edge_stats = None
+
+    @classmethod
+    def from_predicate(cls, graph, predicate):
+        '''
+        Make a view of the nodes for which predicate(node_ids) is True
+
+        predicate: Function taking the array of the node IDs and returning a boolean array,
+        e.g. lambda node_ids: node_ids % 3 != 0
+        '''
+        return cls(graph, predicate(np.asarray(graph.node_ids)))
+
+    @classmethod
+    def from_nodes(cls, graph, nodes):
+        '''
+        Make a view of the given node indices (e.g. a community)
+        '''
+        node_mask = np.zeros(graph.num_nodes, dtype=bool)
+        node_mask[np.asarray(list(nodes), dtype=np.int64)] = True
+        return cls(graph, node_mask)
+
+    @classmethod
+    def from_node_ids(cls, graph, node_ids):
+        '''
+        Make a view of the given node IDs (e.g. a community)
+        '''
+        return cls(graph, np.isin(graph.node_ids, np.asarray(list(node_ids), dtype=np.int64)))
+
+    @property
+    def nodes(self):
+        return np.flatnonzero(self.node_mask)
+
+    @property
+    def node_ids(self):
+        return np.asarray(self.graph.node_ids)[self.node_mask]
+
+    @property
+    def num_nodes(self):
+        return int(np.count_nonzero(self.node_mask))
+
+    @property
+    def num_edges(self):
+        return self.get_edge_stats()["num_edges"]
+
+    def number_of_nodes(self):
+        return self.num_nodes
+
+    def number_of_edges(self):
+        return self.num_edges
+
+    def get_edge_stats(self):
+        '''
+        Get the statistics of the edges of the view
+
+        Returns a dict with:
+        num_nodes: Number of nodes in the view
+        num_edges: Number of edges with both the ends inside the view
+        num_boundary_edges: Number of edges with exactly one end inside the view
+        avg_degree: Average degree of the nodes inside the induced subgraph
+        density: Number of induced edges / maximum possible number of edges
+        '''
+        if(self._edge_stats is not None):
+            return self._edge_stats
+        src_idx, dst_idx = self.graph.edges()
+        src_inside = self.node_mask[src_idx]
+        dst_inside = self.node_mask[dst_idx]
+        internal = src_inside & dst_inside
+        num_internal = int(np.count_nonzero(internal))
+        num_boundary = int(np.count_nonzero(src_inside != dst_inside))
+        if(not self.graph.directed):
+            # Every edge (except a self loop) is stored in both the directions
+            num_self_loops = int(np.count_nonzero(internal & (src_idx == dst_idx)))
+            num_internal = (num_internal + num_self_loops) // 2
+            num_boundary = num_boundary // 2
+
+        num_nodes = self.num_nodes
+        max_edges = num_nodes*(num_nodes - 1)
+        if(not self.graph.directed):
+            max_edges //= 2
+        self._edge_stats = {
+            "num_nodes": num_nodes,
+            "num_edges": num_internal,
+            "num_boundary_edges": num_boundary,
+            "avg_degree": (num_internal if self.graph.directed else 2*num_internal)/num_nodes if num_nodes else 0,
+            "density": num_internal/max_edges if max_edges else 0,
+        }
+        return self._edge_stats
+
+    def to_graph(self):
+        '''
+        Make the induced subgraph as a new CSRGraph (keeping the node IDs)
+        '''
+        src_idx, dst_idx = self.graph.edges()
+        internal = self.node_mask[src_idx] & self.node_mask[dst_idx]
+        new_index = np.cumsum(self.node_mask) - 1
+        return CSRGraph._from_index_edges(self.node_ids, new_index[src_idx[internal]], new_index[dst_idx[internal]], self.graph.directed)
+
+
+def get_label_edge_stats(graph, labels, num_labels=None):
+    '''
+    Get the node and edge counts of the subgraphs induced by every label, all in one pass
+
+    graph: CSRGraph
+    labels: Array with the label (0..num_labels-1) of every node, or -1 for nodes without a label
+
+    Returns:
+    (num_nodes, num_edges, num_boundary_edges): Arrays indexed by the label
+    '''
+    labels = np.asarray(labels, dtype=np.int64)
+    if(num_labels is None):
+        num_labels = int(labels.max()) + 1 if len(labels) else 0
+    num_nodes = np.bincount(labels[labels >= 0], minlength=num_labels)
+
+    src_idx, dst_idx = graph.edges()
+    src_labels = labels[src_idx]
+    dst_labels = labels[dst_idx]
+    internal = (src_labels == dst_labels) & (src_labels >= 0)
+    num_edges = np.bincount(src_labels[internal], minlength=num_labels)
+
+    cut = src_labels != dst_labels
+    cut_src_labels = src_labels[cut]
+    num_boundary_edges = np.bincount(cut_src_labels[cut_src_labels >= 0], minlength=num_labels)
+    if(graph.directed):
+        # Also counting the edges coming into every label
+        cut_dst_labels = dst_labels[cut]
+        num_boundary_edges += np.bincount(cut_dst_labels[cut_dst_labels >= 0], minlength=num_labels)
+    else:
+        # Every edge (except a self loop) is stored in both the directions
+        loops = internal & (src_idx == dst_idx)
+        num_edges = (num_edges + np.bincount(src_labels[loops], minlength=num_labels)) // 2
+    return num_nodes, num_edges, num_boundary_edges
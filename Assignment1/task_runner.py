@@ -0,0 +1,240 @@
+'''
+Runner of a graph of metric tasks with a result cache on the disk.
+
+Every task is one metric function (see metrics.py) of one dataset, with its parameters and the names
+of its input tasks (whose results are passed to it). The runner:
+
+* runs the tasks whose inputs are ready concurrently in a process pool. Inside a process, the graph of
+  a dataset is loaded once (memory-mapped from its snapshot, see graph_loader.py) and shared by all the
+  tasks run there.
+* memoizes every result in CONFIG["CACHE_DIR"]/results, keyed by the hash of the dataset file, the
+  metric (its name, the source files of its module and of all the local modules it uses, and the
+  version of the task), its parameters and the keys of its inputs. So a re-run only computes the
+  tasks whose dataset, code, parameters or inputs changed, the rest are read back. The cache can
+  also be skipped (use_cache=False) or cleared (clear_cache).
+'''
+import concurrent.futures
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import shutil
+import sys
+import time
+
+from config import CONFIG
+from graph_loader import get_dataset_hash, load_graph
+import profiling
+
+# Graphs loaded in this process, by (dataset, directed)
+_graphs = {}
+# Hashes of the code of the modules, by module name
+_code_hashes = {}
+
+
+class Task:
+    '''
+    One metric of one dataset
+
+    name: Unique name of the task
+    function: Module level function called as function(graph, *input_results, **params)
+    dataset: Location of the edge list of the graph
+    directed: Whether the directed or the undirected graph is given to the function
+    inputs: Names of the tasks whose results are passed to the function (in this order)
+    params: Dict of the keyword parameters of the function (must be JSON serializable)
+    cache: Whether the result is memoized on the disk
+    version: Optional version of the task, to be changed when its results must be computed again
+             although the code is the same (e.g. a change in a dependency outside this folder)
+    '''
+
+    def __init__(self, name, function, dataset, directed=True, inputs=(), params=None, cache=True, version=None):
+        self.name = name
+        self.function = function
+        self.dataset = dataset
+        self.directed = directed
+        self.inputs = list(inputs)
+        self.params = dict(params or {})
+        self.cache = cache
+        self.version = version
+
+
+def _get_local_modules(module, local_dir, found):
+    # Adding the module and the modules of its globals (modules, functions, classes) which are in local_dir
+    if(module is None or module.__name__ in found):
+        return
+    location = getattr(module, "__file__", None)
+    if(location is None or os.path.dirname(os.path.abspath(location)) != local_dir):
+        return
+    found[module.__name__] = location
+    for value in list(vars(module).values()):
+        if(inspect.ismodule(value)):
+            _get_local_modules(value, local_dir, found)
+        elif(inspect.isfunction(value) or inspect.isclass(value)):
+            _get_local_modules(sys.modules.get(value.__module__), local_dir, found)
+
+
+def get_code_hash(function):
+    '''
+    Get the hash of the source files of the module of a function and of all the modules of its folder
+    which it uses (directly or through the other modules), so a change in any helper of a metric
+    changes the hash
+    '''
+    module_name = function.__module__
+    if(module_name not in _code_hashes):
+        module = sys.modules[module_name]
+        found = {}
+        _get_local_modules(module, os.path.dirname(os.path.abspath(module.__file__)), found)
+        code_hash = hashlib.sha256()
+        for name in sorted(found):
+            code_hash.update(name.encode("utf-8"))
+            with open(found[name], "rb") as f:
+                code_hash.update(f.read())
+        _code_hashes[module_name] = code_hash.hexdigest()
+    return _code_hashes[module_name]
+
+def _get_graph(dataset, directed, cache_dir):
+    key = (dataset, directed)
+    if(key not in _graphs):
+        _graphs[key] = load_graph(dataset, directed, cache_dir)
+    return _graphs[key]
+
+
+def _run_task(function, dataset, directed, cache_dir, input_results, params):
+    '''
+    Run a task function (in a worker process), returns (result, time taken in seconds)
+    '''
+    graph = _get_graph(dataset, directed, cache_dir)
+    start = time.perf_counter()
+    result = function(graph, *input_results, **params)
+    return result, time.perf_counter() - start
+
+
+class TaskRunner:
+    '''
+    Runs a graph of tasks, reusing the results memoized on the disk
+
+    num_workers: Number of worker processes (by default the number of CPUs); with 1 all the tasks are
+    run in this process
+    use_cache: Whether the memoized results are read (the computed results are memoized anyway)
+    '''
+
+    def __init__(self, cache_dir=CONFIG["CACHE_DIR"], num_workers=None, use_cache=True):
+        self.cache_dir = cache_dir
+        self.use_cache = use_cache
+        self.results_dir = os.path.join(cache_dir, "results")
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.tasks = {}
+        self.results = {}
+        self.status = {}
+        self._dataset_hashes = {}
+
+    def add(self, task):
+        if(task.name in self.tasks):
+            raise ValueError("Duplicate task name: {}".format(task.name))
+        self.tasks[task.name] = task
+        return task.name
+
+    def get_key(self, task, input_keys):
+        '''
+        Get the key of the result of a task from the dataset, metric (with its code and version),
+        parameters and input keys
+        '''
+        if(task.dataset not in self._dataset_hashes):
+            self._dataset_hashes[task.dataset] = get_dataset_hash(task.dataset, self.cache_dir)
+        description = {
+            "dataset": self._dataset_hashes[task.dataset],
+            "directed": task.directed,
+            "metric": "{}.{}".format(task.function.__module__, task.function.__name__),
+            "code": get_code_hash(task.function),
+            "version": task.version,
+            "params": task.params,
+            "inputs": input_keys,
+        }
+        return hashlib.sha256(json.dumps(description, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def clear_cache(self):
+        '''
+        Remove all the memoized results
+        '''
+        shutil.rmtree(self.results_dir, ignore_errors=True)
+
+    def _get_result_location(self, task, key):
+        file_name = "{}-{}.pkl".format("".join(c if c.isalnum() else "_" for c in task.name), key[:32])
+        return os.path.join(self.results_dir, file_name)
+
+    def _load_result(self, task, key):
+        location = self._get_result_location(task, key)
+        if(not self.use_cache or not task.cache or not os.path.exists(location)):
+            return None
+        with open(location, "rb") as f:
+            return pickle.load(f)
+
+    def _save_result(self, task, key, result):
+        if(not task.cache):
+            return
+        os.makedirs(self.results_dir, exist_ok=True)
+        location = self._get_result_location(task, key)
+        # Writing to a temporary file first, so that a half written result is never read
+        tmp_location = "{}.tmp-{}".format(location, os.getpid())
+        with open(tmp_location, "wb") as f:
+            pickle.dump({"result": result}, f)
+        os.replace(tmp_location, location)
+
+    def run(self):
+        '''
+        Run all the tasks
+
+        Returns the dict {task name: result}. self.status has for every task "cached" or the time
+        taken (in seconds) to compute it.
+        '''
+        for task in self.tasks.values():
+            for name in task.inputs:
+                if(name not in self.tasks):
+                    raise ValueError("Unknown input {} of the task {}".format(name, task.name))
+
+        keys = {}
+        pending = list(self.tasks)
+        executor = None
+        if(self.num_workers > 1):
+            # The workers profile the tasks only if the profiling was turned on here
+            executor = concurrent.futures.ProcessPoolExecutor(self.num_workers, initializer=profiling.set_enabled,
+                                                              initargs=(profiling.is_enabled(),))
+        running = {}
+        try:
+            while(pending or running):
+                # Starting (or reading from the cache) every task with all its inputs done
+                ready = [name for name in pending if all(i in self.results for i in self.tasks[name].inputs)]
+                for name in ready:
+                    pending.remove(name)
+                    task = self.tasks[name]
+                    keys[name] = self.get_key(task, [keys[i] for i in task.inputs])
+                    cached = self._load_result(task, keys[name])
+                    if(cached is not None):
+                        self.results[name] = cached["result"]
+                        self.status[name] = "cached"
+                        continue
+                    args = (task.function, task.dataset, task.directed, self.cache_dir,
+                            [self.results[i] for i in task.inputs], task.params)
+                    if(executor is None):
+                        self._finish(name, keys[name], *_run_task(*args))
+                    else:
+                        running[executor.submit(_run_task, *args)] = name
+                if(ready):
+                    continue
+                if(not running):
+                    raise ValueError("The inputs of the tasks {} form a cycle".format(pending))
+
+                done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    self._finish(name, keys[name], *future.result())
+        finally:
+            if(executor is not None):
+                executor.shutdown()
+        return self.results
+
+    def _finish(self, name, key, result, time_taken):
+        self.results[name] = result
+        self.status[name] = time_taken
+        self._save_result(self.tasks[name], key, result)
@@ -0,0 +1,58 @@
+'''
+Benchmark of the approximate (sampled pivots) closeness centrality against the exact values
+
+The exact values are read from output_2_closeness.txt, so run `python gen_centrality.py` first.
+For every epsilon, the time taken, the errors of the estimates, the fraction of the exact values
+inside the confidence bounds and the overlap of the top 50 nodes (get_top_50_nodes) are printed.
+'''
+import os
+import time
+
+from gen_centrality import DATASET, OUTPUT_FILE_1, make_graph_from_dataset, get_approx_closeness_centrality, get_closeness_centrality, get_num_pivots, get_top_50_nodes
+
+EPSILONS = [0.5, 0.3, 0.2, 0.1, 0.05]
+DELTA = 0.1
+SEED = 0
+
+def read_closeness_from_output(output_file, V):
+    '''
+    Read the list of closeness centrality values written by gen_centrality.py
+    '''
+    closeness_centrality = [0]*V
+    with open(output_file, "r") as f:
+        for line in f:
+            node_ID, centrality_value = line.split()
+            closeness_centrality[int(node_ID)] = float(centrality_value)
+    return closeness_centrality
+
+if __name__ == "__main__":
+    with open(DATASET, "r") as file:
+        data = file.readlines()
+    rows, columns = map(int, data[0].strip().split(","))
+    graph = make_graph_from_dataset(data[1:], rows)
+
+    if(not os.path.exists(OUTPUT_FILE_1)):
+        raise FileNotFoundError("{} not found, run gen_centrality.py first".format(OUTPUT_FILE_1))
+    exact_closeness = read_closeness_from_output(OUTPUT_FILE_1, rows)
+    exact_top_50_nodes = set(get_top_50_nodes(exact_closeness))
+
+    start = time.perf_counter()
+    get_closeness_centrality(rows, graph)
+    exact_time = time.perf_counter() - start
+    print("Exact closeness centrality: {:.4f} s".format(exact_time))
+    print()
+
+    print("{:>8} {:>8} {:>10} {:>14} {:>14} {:>14} {:>14}".format(
+        "epsilon", "pivots", "time (s)", "max abs error", "mean abs error", "within bounds", "top 50 overlap"))
+    for epsilon in EPSILONS:
+        start = time.perf_counter()
+        closeness, lower_bounds, upper_bounds = get_approx_closeness_centrality(rows, graph, epsilon, DELTA, seed=SEED)
+        approx_time = time.perf_counter() - start
+
+        errors = [abs(approx - exact) for approx, exact in zip(closeness, exact_closeness)]
+        # Allowing for the rounding of the values written in the output file
+        within_bounds = sum(lower - 1e-12 <= exact <= upper + 1e-12 for lower, exact, upper in zip(lower_bounds, exact_closeness, upper_bounds))
+        overlap = len(set(get_top_50_nodes(closeness)) & exact_top_50_nodes)
+        print("{:>8} {:>8} {:>10.4f} {:>14.6f} {:>14.6f} {:>13.2f}% {:>14}".format(
+            epsilon, get_num_pivots(rows, epsilon, DELTA), approx_time, max(errors), sum(errors)/rows,
+            100*within_bounds/rows, "{}/50".format(overlap)))
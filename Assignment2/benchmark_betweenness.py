@@ -0,0 +1,82 @@
+'''
+Benchmark of the process-parallel betweenness centrality (get_betweenness_centrality)
+
+* The exact and the sampled (k sources) node and edge betweenness of the football and polbooks graphs
+  are checked against networkx's betweenness_centrality and edge_betweenness_centrality.
+* The exact betweenness of the imdb_prodco graph is timed with 1, 2, 4, ... worker processes (up to
+  the number of CPUs) and against networkx, printing the speedup over one worker.
+'''
+import math
+import os
+import time
+
+import networkx as nx
+
+from config import CONFIG
+from csr_graph import CSRGraph
+from gen_centrality import DATASET, make_graph_from_dataset, get_betweenness_centrality
+from gml_loader import load_gml
+
+GML_DATASETS = ["football.gml", "polbooks.gml"]
+SAMPLED_SOURCES = 20
+SEED = 0
+TOLERANCE = 1e-12
+
+def get_max_difference(values, expected):
+    '''
+    Largest absolute difference between two lists of values (nan only matches nan)
+    '''
+    max_difference = 0.0
+    for value, expected_value in zip(values, expected):
+        if(math.isnan(value) or math.isnan(expected_value)):
+            if(not (math.isnan(value) and math.isnan(expected_value))):
+                return math.inf
+            continue
+        max_difference = max(max_difference, abs(value - expected_value))
+    return max_difference
+
+def check_against_networkx(graph, k=None, seed=None, num_workers=None):
+    '''
+    Get the largest differences of the node and edge betweenness against networkx
+    '''
+    csr_graph, nodes = CSRGraph.from_networkx(graph)
+    node_betweenness, edges, edge_betweenness = get_betweenness_centrality(csr_graph, k, seed=seed, num_workers=num_workers)
+    expected_nodes = nx.betweenness_centrality(graph, k, seed=seed)
+    expected_edges = {frozenset(edge): value for edge, value in nx.edge_betweenness_centrality(graph, k, seed=seed).items()}
+    node_difference = get_max_difference(node_betweenness.tolist(), [expected_nodes[node] for node in nodes])
+    edge_difference = get_max_difference(edge_betweenness.tolist(), [expected_edges[frozenset((nodes[u], nodes[v]))] for u, v in edges.tolist()])
+    return node_difference, edge_difference
+
+if __name__ == "__main__":
+    num_cpus = os.cpu_count() or 1
+    for dataset in GML_DATASETS:
+        graph = load_gml(os.path.join(CONFIG["DATASET_DIR"], dataset)).to_networkx()
+        for k in (None, SAMPLED_SOURCES):
+            node_difference, edge_difference = check_against_networkx(graph, k, SEED, max(2, num_cpus))
+            assert node_difference < TOLERANCE and edge_difference < TOLERANCE, (dataset, k, node_difference, edge_difference)
+            print("{} (k = {}): max difference from networkx {:.2e} (nodes), {:.2e} (edges)".format(dataset, k, node_difference, edge_difference))
+    print()
+
+    with open(DATASET, "r") as file:
+        data = file.readlines()
+    rows, columns = map(int, data[0].strip().split(","))
+    graph = make_graph_from_dataset(data[1:], rows)
+
+    num_workers_list = [2**i for i in range(int(math.log2(num_cpus)) + 1)]
+    if(num_workers_list[-1] != num_cpus):
+        num_workers_list.append(num_cpus)
+    print("{:>8} {:>10} {:>8}".format("workers", "time (s)", "speedup"))
+    single_time = None
+    for num_workers in num_workers_list:
+        start = time.perf_counter()
+        get_betweenness_centrality(graph, num_workers=num_workers)
+        time_taken = time.perf_counter() - start
+        single_time = single_time or time_taken
+        print("{:>8} {:>10.4f} {:>8.2f}".format(num_workers, time_taken, single_time/time_taken))
+
+    nx_graph = nx.Graph()
+    nx_graph.add_nodes_from(range(rows))
+    nx_graph.add_edges_from(zip(graph.sources().tolist(), graph.targets.tolist()))
+    start = time.perf_counter()
+    nx.betweenness_centrality(nx_graph)
+    print("networkx betweenness_centrality: {:.4f} s".format(time.perf_counter() - start))
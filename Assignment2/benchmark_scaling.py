@@ -0,0 +1,216 @@
+'''
+Scaling benchmark of the closeness centrality and community methods on synthetic graphs.
+
+Seeded R-MAT, Barabasi-Albert and Erdos-Renyi graphs (see graph_generators.py, the edges are taken
+as undirected) of every size are made as the CSRGraph of gen_centrality.py and, for the networkx
+based methods, as a networkx graph. For every method the best time of the runs and the peak memory
+(a separate run under tracemalloc) are recorded.
+
+The results are written to a JSON file. If a baseline JSON file exists, every method of every graph
+whose time or peak memory grew by more than the threshold (as a fraction of the baseline) is reported
+as a regression and the script exits with status 1. Run with --save-baseline to store the results as
+the new baseline, and with --help for the other options.
+
+The methods too slow for the largest graphs are only run up to their max_edges. Girvan-Newman is
+benchmarked up to its first split only, which can still take many minutes on the 10^4 edge graphs
+(the edge betweenness is recomputed after every removal), so leave it out with --methods if needed.
+'''
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import networkx as nx
+from networkx.algorithms import community
+
+from csr_graph import CSRGraph
+from graph_generators import GENERATORS, get_edges, get_undirected_edges
+from gen_centrality import get_closeness_centrality, get_approx_closeness_centrality, get_top_k_closeness_nodes
+from gen_centrality import get_weighted_closeness_centrality, get_betweenness_centrality
+from girvan_newman import get_girvan_newman_levels
+from louvain import get_louvain_communities
+
+SIZES = [10**4, 10**5, 10**6, 10**7]
+SEED = 0
+THRESHOLD = 0.25
+# Times and peak memories below these are too noisy to be compared against the baseline
+MIN_TIME = 0.05
+MIN_MEMORY = 1 << 20
+RESULTS_LOCATION = "benchmark_results.json"
+BASELINE_LOCATION = "benchmark_baseline.json"
+
+
+def _get_first_split(graph):
+    # Girvan-Newman communities at one more than the number of components
+    return get_girvan_newman_levels(graph, [nx.number_connected_components(graph) + 1])
+
+
+# (name, graph type, method, max_edges)
+METHODS = [
+    ("gen_centrality.get_closeness_centrality", "csr", lambda graph: get_closeness_centrality(graph.num_nodes, graph), 10**6),
+    ("gen_centrality.get_approx_closeness_centrality", "csr", lambda graph: get_approx_closeness_centrality(graph.num_nodes, graph), None),
+    ("gen_centrality.get_top_k_closeness_nodes", "csr", lambda graph: get_top_k_closeness_nodes(graph.num_nodes, graph, 50), 10**6),
+    ("gen_centrality.get_weighted_closeness_centrality", "csr", lambda graph: get_weighted_closeness_centrality(graph.num_nodes, graph), 10**5),
+    ("gen_centrality.get_betweenness_centrality", "csr", lambda graph: get_betweenness_centrality(graph, num_workers=1), 10**4),
+    ("NEWMAN (girvan_newman.get_girvan_newman_levels)", "nx", _get_first_split, 10**4),
+    ("CLAUSET (greedy_modularity_communities)", "nx", lambda graph: community.greedy_modularity_communities(graph), 10**5),
+    ("LOUVAIN (louvain.get_louvain_communities)", "csr", lambda graph: get_louvain_communities(graph), None),
+]
+
+
+def get_graphs(generator, num_edges, seed=SEED):
+    '''
+    Get the makers of the graphs of a synthetic graph, by graph type ("csr" or "nx")
+    '''
+    num_nodes, src, dst = get_edges(generator, num_edges, seed)
+    src, dst = get_undirected_edges(num_nodes, src, dst)
+
+    def make_nx_graph():
+        graph = nx.Graph()
+        graph.add_nodes_from(range(num_nodes))
+        graph.add_edges_from(zip(src.tolist(), dst.tolist()))
+        return graph
+    return {"csr": lambda: CSRGraph.from_edges(num_nodes, src, dst), "nx": make_nx_graph}
+
+
+def measure(function, repeat=1, trace_memory=True):
+    '''
+    Get the best time (in seconds) of repeat calls of function() and its peak memory in bytes
+    (None if trace_memory is False)
+    '''
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+
+    peak_memory = None
+    if(trace_memory):
+        tracemalloc.start()
+        try:
+            function()
+            _, peak_memory = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return min(times), peak_memory
+
+
+def run_benchmarks(methods=METHODS, sizes=SIZES, generators=GENERATORS, seed=SEED, repeat=1, trace_memory=True, log=sys.stderr):
+    '''
+    Run every method on every synthetic graph
+
+    Returns the list of the records (dicts) of the runs
+    '''
+    records = []
+    for generator in generators:
+        for num_edges in sizes:
+            selected = [m for m in methods if m[3] is None or num_edges <= m[3]]
+            if(not selected):
+                continue
+            makers = get_graphs(generator, num_edges, seed)
+            graphs = {}
+            for name, graph_type, method, _ in selected:
+                if(graph_type not in graphs):
+                    graphs[graph_type] = makers[graph_type]()
+                graph = graphs[graph_type]
+                time_taken, peak_memory = measure(lambda: method(graph), repeat, trace_memory)
+                records.append({
+                    "generator": generator,
+                    "num_edges": num_edges,
+                    "num_graph_nodes": graph.number_of_nodes() if graph_type == "nx" else graph.num_nodes,
+                    "num_graph_edges": graph.number_of_edges() if graph_type == "nx" else graph.num_edges,
+                    "method": name,
+                    "time": time_taken,
+                    "peak_memory": peak_memory,
+                })
+                print("{} {} {}: {:.4f} s{}".format(generator, num_edges, name, time_taken,
+                      "" if peak_memory is None else ", {:.1f} MB".format(peak_memory/2**20)), file=log)
+    return records
+
+
+def _get_record_key(record):
+    return (record["generator"], record["num_edges"], record["method"])
+
+
+def get_regressions(records, baseline_records, threshold=THRESHOLD):
+    '''
+    Get the (record, measure, baseline value) of every time or peak memory which grew by more than
+    threshold (as a fraction) against the baseline record of the same generator, size and method
+    '''
+    baseline = {_get_record_key(record): record for record in baseline_records}
+    regressions = []
+    for record in records:
+        base = baseline.get(_get_record_key(record))
+        if(base is None):
+            continue
+        for measure_name, min_value in (("time", MIN_TIME), ("peak_memory", MIN_MEMORY)):
+            value, base_value = record[measure_name], base[measure_name]
+            if(value is None or base_value is None or max(value, base_value) < min_value):
+                continue
+            if(value > base_value*(1 + threshold)):
+                regressions.append((record, measure_name, base_value))
+    return regressions
+
+
+def get_environment():
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "networkx": nx.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scaling benchmark of the closeness centrality and community methods on synthetic graphs")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="Numbers of edges of the graphs")
+    parser.add_argument("--generators", nargs="+", default=list(GENERATORS), choices=GENERATORS)
+    parser.add_argument("--methods", nargs="+", default=None, help="Only run the methods whose names contain one of these")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--repeat", type=int, default=1, help="Number of timed runs of every method (the best is kept)")
+    parser.add_argument("--no-memory", action="store_true", help="Don't measure the peak memory (saves one run of every method)")
+    parser.add_argument("--output", default=RESULTS_LOCATION)
+    parser.add_argument("--baseline", default=BASELINE_LOCATION)
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="Allowed growth over the baseline (0.25 = 25%%)")
+    parser.add_argument("--save-baseline", action="store_true", help="Store the results as the new baseline")
+    args = parser.parse_args(argv)
+
+    methods = METHODS
+    if(args.methods):
+        methods = [m for m in METHODS if any(pattern in m[0] for pattern in args.methods)]
+    records = run_benchmarks(methods, args.sizes, args.generators, args.seed, args.repeat, not args.no_memory)
+    results = {"seed": args.seed, "environment": get_environment(), "records": records}
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=1)
+    print("Results written to {}".format(args.output))
+
+    if(args.save_baseline):
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=1)
+        print("Baseline saved to {}".format(args.baseline))
+        return 0
+    if(not os.path.exists(args.baseline)):
+        print("No baseline found at {}, nothing to compare".format(args.baseline))
+        return 0
+
+    with open(args.baseline, "r") as f:
+        baseline_records = json.load(f)["records"]
+    regressions = get_regressions(records, baseline_records, args.threshold)
+    for record, measure_name, base_value in regressions:
+        print("REGRESSION {} {} {}: {} {:.4g} (baseline {:.4g}, +{:.0f}%)".format(
+            record["generator"], record["num_edges"], record["method"], measure_name,
+            record[measure_name], base_value, 100*(record[measure_name]/base_value - 1)))
+    if(regressions):
+        return 1
+    print("No regressions beyond {:.0f}% of the baseline".format(100*args.threshold))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
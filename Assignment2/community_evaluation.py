@@ -0,0 +1,187 @@
+'''
+Evaluation of a partition of a graph into communities, from arrays of node labels.
+
+A partition is an array with the label (0..num_labels-1) of every node index of a CSRGraph. All the
+scores come from two tables, so scoring many partitions (e.g. from a parameter sweep) is cheap:
+
+* The edge table: one vectorized pass over the edges gives, for every detected community, the weight
+  of its internal edges and its total degree (coverage, performance and modularity).
+* The contingency table: n_ij is the number of nodes in the detected community i and the ground
+  truth community j (NMI, ARI and the best match Jaccard coefficient of every community). Only its
+  non zero entries are kept, so it stays small with thousands of communities.
+'''
+import numpy as np
+
+from csr_graph import CSRGraph
+
+
+def get_labels_from_communities(communities, nodes):
+    '''
+    Get the label array of a list of communities
+
+    communities: List of communities (iterables of nodes)
+    nodes: List with the node at every index (e.g. from CSRGraph.from_networkx)
+
+    Nodes not in any community get the label -1
+    '''
+    node_index = {node: i for i, node in enumerate(nodes)}
+    labels = np.full(len(nodes), -1, dtype=np.int64)
+    for label, community in enumerate(communities):
+        labels[[node_index[node] for node in community]] = label
+    return labels
+
+
+def get_labels_from_attribute(graph, nodes, attribute="value"):
+    '''
+    Get the label array of the ground truth communities given by a node attribute of a networkx graph
+
+    The nodes with the same value of the attribute are in the same community, and the labels are given
+    in the order in which the values first appear (as the ground truth communities of q1.ipynb).
+    '''
+    values = {}
+    labels = np.array([values.setdefault(graph.nodes[node].get(attribute), len(values)) for node in nodes], dtype=np.int64)
+    return labels
+
+
+def get_edge_table(graph, labels):
+    '''
+    Get the internal edge weight and the total degree of every community in one pass over the edges
+
+    graph: CSRGraph
+    labels: Array with the label of every node (-1 for nodes without a community)
+
+    Returns:
+    (internal_weight, community_degree): Arrays indexed by the label. The internal weight counts every
+    edge once (self loops included), the degree counts the edges to the outside as well.
+    '''
+    labels = np.asarray(labels, dtype=np.int64)
+    num_labels = int(labels.max()) + 1 if len(labels) else 0
+    sources = graph.sources()
+    weights = graph.weights.astype(float)
+    src_labels = labels[sources]
+    has_label = src_labels >= 0
+    internal = has_label & (src_labels == labels[graph.targets])
+    # Every edge (except a self loop) is stored in both the directions
+    loops = internal & (sources == graph.targets)
+    internal_weight = (np.bincount(src_labels[internal], weights=weights[internal], minlength=num_labels)
+                       + np.bincount(src_labels[loops], weights=weights[loops], minlength=num_labels))/2
+    community_degree = np.bincount(src_labels[has_label], weights=weights[has_label], minlength=num_labels)
+    community_degree += np.bincount(src_labels[loops], weights=weights[loops], minlength=num_labels)
+    return internal_weight, community_degree
+
+
+def get_contingency_table(labels, true_labels):
+    '''
+    Get the non zero entries of the contingency table of two partitions of the same nodes
+
+    Nodes with the label -1 in either partition are left out.
+
+    Returns:
+    (rows, cols, counts, sizes, true_sizes): counts[k] nodes are in the community rows[k] and in the true
+    community cols[k], and sizes, true_sizes are the sizes of the communities of both the partitions
+    '''
+    labels = np.asarray(labels, dtype=np.int64)
+    true_labels = np.asarray(true_labels, dtype=np.int64)
+    both = (labels >= 0) & (true_labels >= 0)
+    num_true_labels = int(true_labels.max()) + 1 if len(true_labels) else 0
+    keys, counts = np.unique(labels[both]*num_true_labels + true_labels[both], return_counts=True)
+    rows, cols = np.divmod(keys, num_true_labels) if num_true_labels else (keys, keys)
+    sizes = np.bincount(labels[both], minlength=int(labels.max()) + 1 if len(labels) else 0)
+    true_sizes = np.bincount(true_labels[both], minlength=num_true_labels)
+    return rows, cols, counts, sizes, true_sizes
+
+
+def _get_entropy(counts, total):
+    p = counts[counts > 0]/total
+    return float(-(p*np.log(p)).sum())
+
+
+def _get_num_pairs(counts):
+    counts = np.asarray(counts, dtype=float)
+    return float((counts*(counts - 1)/2).sum())
+
+
+def evaluate_partition(graph, labels, true_labels=None, resolution=1.0):
+    '''
+    Evaluate a partition of a CSRGraph (against the ground truth partition if given)
+
+    labels, true_labels: Arrays with the label of every node (-1 for nodes without a community)
+    resolution: Resolution of the modularity
+
+    Returns a dict with:
+    num_communities, sizes: Number of communities and the number of nodes of every community
+    coverage: Fraction of the edge weight inside the communities, and community_coverage for every
+        community (as in q1.ipynb, internal edges of the community / all the edges)
+    performance: Fraction of the node pairs correctly "classified" (an edge inside a community or no
+        edge between two communities), for unweighted graphs
+    modularity: Modularity of the partition
+    and with the ground truth:
+    nmi: Normalized mutual information (arithmetic mean of the entropies)
+    ari: Adjusted Rand index
+    best_jaccard, best_match: The best Jaccard coefficient of every community with a true community,
+        and the label of that true community (-1 if none)
+    '''
+    labels = np.asarray(labels, dtype=np.int64)
+    internal_weight, community_degree = get_edge_table(graph, labels)
+    total_weight = float(graph.weights.sum() + graph.weights[graph.sources() == graph.targets].sum())/2
+    sizes = np.bincount(labels[labels >= 0], minlength=len(internal_weight))
+
+    result = {"num_communities": len(sizes), "sizes": sizes}
+    result["community_coverage"] = internal_weight/total_weight if total_weight else np.zeros(len(sizes))
+    result["coverage"] = float(result["community_coverage"].sum())
+    result["modularity"] = float((result["community_coverage"]
+                                  - resolution*(community_degree/(2*total_weight))**2).sum()) if total_weight else 0.0
+
+    num_nodes = int(np.count_nonzero(labels >= 0))
+    num_pairs = num_nodes*(num_nodes - 1)/2
+    intra_pairs = _get_num_pairs(sizes)
+    intra_edges = float(internal_weight.sum())
+    inter_edges = float(community_degree.sum())/2 - intra_edges
+    result["performance"] = (intra_edges + (num_pairs - intra_pairs - inter_edges))/num_pairs if num_pairs else 1.0
+
+    if(true_labels is None):
+        return result
+
+    rows, cols, counts, sizes, true_sizes = get_contingency_table(labels, true_labels)
+    total = counts.sum()
+    if(total == 0):
+        result.update({"nmi": 0.0, "ari": 0.0, "best_jaccard": np.zeros(len(sizes)), "best_match": np.full(len(sizes), -1)})
+        return result
+
+    # Normalized mutual information
+    entropy = _get_entropy(sizes, total)
+    true_entropy = _get_entropy(true_sizes, total)
+    mutual_information = float((counts/total*np.log(counts*total/(sizes[rows]*true_sizes[cols].astype(float)))).sum())
+    mean_entropy = (entropy + true_entropy)/2
+    result["nmi"] = mutual_information/mean_entropy if mean_entropy > 0 else 1.0
+
+    # Adjusted Rand index
+    index = _get_num_pairs(counts)
+    row_pairs, col_pairs = _get_num_pairs(sizes), _get_num_pairs(true_sizes)
+    expected = row_pairs*col_pairs/_get_num_pairs([total]) if total > 1 else 0.0
+    max_index = (row_pairs + col_pairs)/2
+    result["ari"] = (index - expected)/(max_index - expected) if max_index != expected else 1.0
+
+    # Best match Jaccard coefficient of every community (the first true community for the ties)
+    jaccard = counts/(sizes[rows] + true_sizes[cols] - counts)
+    order = np.lexsort((cols, -jaccard, rows))
+    first = order[np.concatenate(([True], np.diff(rows[order]) != 0))]
+    best_jaccard = np.zeros(len(sizes))
+    best_match = np.full(len(sizes), -1, dtype=np.int64)
+    best_jaccard[rows[first]] = jaccard[first]
+    best_match[rows[first]] = cols[first]
+    result["best_jaccard"] = best_jaccard
+    result["best_match"] = best_match
+    return result
+
+
+def evaluate_communities(graph, communities, true_communities=None, resolution=1.0):
+    '''
+    Evaluate a list of communities of a networkx graph (see evaluate_partition)
+
+    true_communities: Optional list of the ground truth communities
+    '''
+    csr_graph, nodes = CSRGraph.from_networkx(graph)
+    labels = get_labels_from_communities(communities, nodes)
+    true_labels = None if true_communities is None else get_labels_from_communities(true_communities, nodes)
+    return evaluate_partition(csr_graph, labels, true_labels, resolution)
@@ -0,0 +1,285 @@
+'''
+Parameter sweep of the community detection methods over several datasets.
+
+Every (dataset, method, resolution) job is run once in a process pool, and all the requested numbers
+of communities are cut from that single run:
+
+* NEWMAN: the Girvan–Newman dendrogram is gone down once, up to the largest requested number of
+  communities, with get_girvan_newman_levels (see girvan_newman.py).
+* CLAUSET: the whole Clauset-Newman-Moore merge sequence is found once (get_cnm_merges), then replayed
+  up to every cut (get_cnm_cuts). A cut at k communities is the same as networkx's
+  greedy_modularity_communities(graph, cutoff=k, best_n=k) (networkx >= 2.7), and the cut None (the
+  merges kept while the modularity grows) the same as greedy_modularity_communities(graph).
+* LOUVAIN: one multilevel run per resolution (the number of communities is not a parameter).
+
+Every cut is scored with community_evaluation.py (against the `value` node attribute of the GML file
+as the ground truth, when it has one), and the records come back in the order of the datasets, the
+methods, the resolutions and the cuts as requested, whatever the order in which the jobs finish.
+'''
+import argparse
+import concurrent.futures
+import heapq
+import os
+
+from config import CONFIG
+from csr_graph import CSRGraph
+from community_evaluation import evaluate_partition, get_labels_from_attribute, get_labels_from_communities
+from girvan_newman import get_girvan_newman_levels
+from gml_loader import load_gml
+from louvain import get_communities_from_labels, get_louvain_communities
+
+METHODS = ["NEWMAN", "CLAUSET", "LOUVAIN"]
+LOUVAIN_SEED = 0
+GROUND_TRUTH_ATTRIBUTE = "value"
+
+
+def get_cnm_merges(graph, resolution=1.0, weight=None):
+    '''
+    Get the Clauset-Newman-Moore greedy modularity merge sequence of an undirected networkx graph
+
+    The merges are done until no two communities are joined by an edge. The modularity changes are
+    found with the same updates as networkx, and the ties are broken the same way (the pair (u, v)
+    with the smallest nodes first, u joining v).
+
+    Returns:
+    (nodes, merges): nodes is the list of the nodes of the graph (in its order), and merges the list of
+    (u, v, dq) with the community u (index of its first node) merged into the community v and the
+    change of modularity dq
+    '''
+    nodes = list(graph.nodes())
+    n = len(nodes)
+    node_index = {node: i for i, node in enumerate(nodes)}
+    # Rank of every node in the sorted order of the nodes (the tie break of networkx)
+    try:
+        rank = [0]*n
+        for i, node in enumerate(sorted(nodes)):
+            rank[node_index[node]] = i
+    except TypeError:
+        rank = list(range(n))
+
+    m = graph.size(weight)
+    if(m == 0):
+        return nodes, []
+    q0 = 1/m
+    a = [0.0]*n
+    for node, degree in graph.degree(weight=weight):
+        a[node_index[node]] = degree*q0*0.5
+
+    dq = [dict() for _ in range(n)]
+    for u, v, wt in graph.edges(data=weight, default=1):
+        u, v = node_index[u], node_index[v]
+        if(u == v):
+            continue
+        dq[u][v] = dq[u].get(v, 0.0) + wt
+        dq[v][u] = dq[v].get(u, 0.0) + wt
+    for u in range(n):
+        for v, wt in dq[u].items():
+            dq[u][v] = q0*wt - resolution*(a[u]*a[v] + a[u]*a[v])
+
+    heap = [(-value, rank[u], rank[v], u, v) for u in range(n) for v, value in dq[u].items()]
+    heapq.heapify(heap)
+    merges = []
+    while(heap):
+        negdq, _, _, u, v = heapq.heappop(heap)
+        # Skipping the entries of merged communities or of older values
+        if(dq[u].get(v) != -negdq):
+            continue
+        merges.append((u, v, -negdq))
+
+        u_nbrs, v_nbrs = dq[u], dq[v]
+        for w in (set(u_nbrs) | set(v_nbrs)) - {u, v}:
+            if(w in u_nbrs and w in v_nbrs):
+                dq_vw = v_nbrs[w] + u_nbrs[w]
+            elif(w in v_nbrs):
+                dq_vw = v_nbrs[w] - resolution*(a[u]*a[w] + a[w]*a[u])
+            else:
+                dq_vw = u_nbrs[w] - resolution*(a[v]*a[w] + a[w]*a[v])
+            dq[v][w] = dq[w][v] = dq_vw
+            heapq.heappush(heap, (-dq_vw, rank[v], rank[w], v, w))
+            heapq.heappush(heap, (-dq_vw, rank[w], rank[v], w, v))
+        for w in u_nbrs:
+            del dq[w][u]
+        dq[u] = {}
+        a[v] += a[u]
+        a[u] = 0
+    return nodes, merges
+
+
+def get_cnm_cuts(nodes, merges, nums_communities):
+    '''
+    Cut the merge sequence of get_cnm_merges at several numbers of communities, in one replay
+
+    nums_communities: Iterable of the numbers of communities wanted (None for the merges kept while the
+                      modularity does not decrease)
+
+    Returns a dict {number of communities: list of communities (frozensets of nodes)}, ordered as
+    networkx's greedy_modularity_communities (if the merges end with more communities than wanted,
+    the two largest communities are joined until there are as many). As in networkx, the cut 1 is
+    always all the nodes in one community, and without any merge (a graph without edges) the other
+    cuts are also made by joining the largest communities.
+    '''
+    n = len(nodes)
+    cuts = {}
+    pending = []
+    for num in set(nums_communities):
+        if(num is not None and not 1 <= num <= n):
+            raise ValueError("The number of communities must be between 1 and {}, got {}".format(n, num))
+        if(num == 1):
+            cuts[num] = [frozenset(nodes)]
+        else:
+            pending.append(num)
+    if(not pending):
+        return cuts
+
+    # Number of merges kept by the cut None: up to the first decrease of the modularity
+    num_best_merges = next((i for i, (_, _, dq) in enumerate(merges) if dq < 0), len(merges))
+    # Order of the cuts along the merge sequence
+    steps = sorted(pending, key=lambda num: num_best_merges if num is None else n - num)
+
+    members = [[node] for node in nodes]
+    alive = [True]*n
+    num_merges = 0
+    for num in steps:
+        target = num_best_merges if num is None else min(n - num, len(merges))
+        while(num_merges < target):
+            u, v, _ = merges[num_merges]
+            members[v].extend(members[u])
+            members[u] = None
+            alive[u] = False
+            num_merges += 1
+        communities = sorted((frozenset(members[i]) for i in range(n) if alive[i]), key=len, reverse=True)
+        while(num is not None and len(communities) > num):
+            # Joining the two largest communities (disjoint, so into their union)
+            communities = [communities[0] | communities[1]] + communities[2:]
+        cuts[num] = communities
+    return cuts
+
+
+def _get_cut_order(nums_communities):
+    # Requested numbers in the given order (repeats removed), then the cut None of the method
+    order = []
+    for num in list(nums_communities) + [None]:
+        if(num not in order):
+            order.append(num)
+    return order
+
+
+def run_sweep_job(dataset, method, resolution, nums_communities):
+    '''
+    Run one method on one dataset and score all the requested cuts
+
+    Returns the list of the records (dicts) of the cuts, in the order of nums_communities (then the
+    cut None of the method, for CLAUSET and LOUVAIN)
+    '''
+    gml = load_gml(dataset)
+    graph = gml.to_networkx()
+    csr_graph, nodes = CSRGraph.from_networkx(graph)
+    true_labels = None
+    if(GROUND_TRUTH_ATTRIBUTE in gml.node_attributes):
+        true_labels = get_labels_from_attribute(graph, nodes, GROUND_TRUTH_ATTRIBUTE)
+
+    if(method == "NEWMAN"):
+        cuts = get_girvan_newman_levels(graph, nums_communities)
+        order = _get_cut_order(nums_communities)[:-1]
+    elif(method == "CLAUSET"):
+        cnm_nodes, merges = get_cnm_merges(graph, resolution)
+        order = _get_cut_order(nums_communities)
+        cuts = get_cnm_cuts(cnm_nodes, merges, order)
+    elif(method == "LOUVAIN"):
+        labels, _ = get_louvain_communities(csr_graph, resolution, LOUVAIN_SEED)
+        cuts = {None: get_communities_from_labels(labels, nodes)}
+        order = [None]
+    else:
+        raise ValueError("Unknown method {} (expected one of {})".format(method, METHODS))
+
+    # The nodes of every community are listed in the order of the graph
+    node_index = {node: i for i, node in enumerate(nodes)}
+    records = []
+    for num in order:
+        communities = [sorted(community, key=node_index.__getitem__) for community in cuts[num]]
+        labels = get_labels_from_communities(communities, nodes)
+        evaluation = evaluate_partition(csr_graph, labels, true_labels, 1.0 if resolution is None else resolution)
+        record = {
+            "dataset": os.path.basename(str(dataset)),
+            "method": method,
+            "resolution": resolution,
+            "requested_communities": num,
+            "num_communities": len(communities),
+            "communities": communities,
+        }
+        for key in ("coverage", "performance", "modularity", "nmi", "ari"):
+            if(key in evaluation):
+                record[key] = evaluation[key]
+        records.append(record)
+    return records
+
+
+def sweep_communities(datasets, methods=METHODS, nums_communities=(), resolutions=(1.0,), num_workers=None):
+    '''
+    Run every method on every dataset in a process pool, cutting every run at all the requested
+    numbers of communities
+
+    Inputs:
+    datasets: Locations of the GML files
+    methods: Names of the methods (NEWMAN, CLAUSET, LOUVAIN)
+    nums_communities: Numbers of communities to cut the NEWMAN and CLAUSET runs at
+    resolutions: Resolutions of the modularity for CLAUSET and LOUVAIN (NEWMAN is run once)
+    num_workers: Number of worker processes (by default the number of CPUs, 0 runs in this process)
+
+    Returns the list of the records of all the cuts, in the order of the datasets, the methods, the
+    resolutions and the cuts
+    '''
+    nums_communities = list(nums_communities)
+    jobs = []
+    for dataset in datasets:
+        # Parsing (and caching) every dataset once here, so the workers only read the cache
+        load_gml(dataset)
+        for method in methods:
+            for resolution in ([None] if method == "NEWMAN" else resolutions):
+                if(method == "NEWMAN" and not nums_communities):
+                    continue
+                jobs.append((dataset, method, resolution, nums_communities))
+
+    if(num_workers == 0):
+        return [record for job in jobs for record in run_sweep_job(*job)]
+    records = []
+    with concurrent.futures.ProcessPoolExecutor(num_workers or os.cpu_count() or 1) as executor:
+        futures = [executor.submit(run_sweep_job, *job) for job in jobs]
+        # Collected in the order of the jobs, not of their completion
+        for future in futures:
+            records.extend(future.result())
+    return records
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep the community detection methods over the GML datasets")
+    parser.add_argument("--datasets", nargs="+", default=["football.gml", "polbooks.gml"], help="GML files in the datasets folder")
+    parser.add_argument("--methods", nargs="+", default=METHODS, choices=METHODS)
+    parser.add_argument("--communities", nargs="+", type=int, default=[2, 3, 4, 6, 8, 10, 12, 15], help="Numbers of communities of the cuts")
+    parser.add_argument("--resolutions", nargs="+", type=float, default=[1.0])
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes (0 runs in this process)")
+    parser.add_argument("--check", action="store_true", help="Check the CLAUSET cuts against networkx's greedy_modularity_communities")
+    args = parser.parse_args()
+
+    datasets = [os.path.join(CONFIG["DATASET_DIR"], dataset) for dataset in args.datasets]
+    records = sweep_communities(datasets, args.methods, args.communities, args.resolutions, args.workers)
+    print("{:<14} {:<8} {:>10} {:>9} {:>6} {:>10} {:>8} {:>8}".format("dataset", "method", "resolution", "requested", "found", "modularity", "nmi", "ari"))
+    for record in records:
+        print("{:<14} {:<8} {:>10} {:>9} {:>6} {:>10.4f} {:>8} {:>8}".format(
+            record["dataset"], record["method"], str(record["resolution"]), str(record["requested_communities"]),
+            record["num_communities"], record["modularity"],
+            "{:.4f}".format(record["nmi"]) if "nmi" in record else "-", "{:.4f}".format(record["ari"]) if "ari" in record else "-"))
+
+    if(args.check):
+        from networkx.algorithms import community
+
+        for dataset in datasets:
+            graph = load_gml(dataset).to_networkx()
+            for resolution in args.resolutions:
+                nodes, merges = get_cnm_merges(graph, resolution)
+                cuts = get_cnm_cuts(nodes, merges, args.communities + [None])
+                assert cuts[None] == list(community.greedy_modularity_communities(graph, resolution=resolution)), (dataset, resolution)
+                for num in args.communities:
+                    expected = community.greedy_modularity_communities(graph, resolution=resolution, cutoff=num, best_n=num)
+                    assert cuts[num] == [frozenset(c) for c in expected], (dataset, resolution, num)
+        print("CLAUSET cuts match networkx's greedy_modularity_communities")
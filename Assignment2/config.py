@@ -3,6 +3,7 @@ from pathlib import Path
 
 DATASET_DIR = Path("./datasets")
 PLOT_DIR = Path("./PLOT")
+CACHE_DIR = Path("./cache")
 
 if not os.path.exists(DATASET_DIR):
     os.mkdir(DATASET_DIR)
@@ -10,7 +11,11 @@ if not os.path.exists(DATASET_DIR):
 if not os.path.exists(PLOT_DIR):
     os.mkdir(PLOT_DIR)
 
+if not os.path.exists(CACHE_DIR):
+    os.mkdir(CACHE_DIR)
+
 CONFIG = {
     "DATASET_DIR": DATASET_DIR,
     "PLOT_DIR": PLOT_DIR,
+    "CACHE_DIR": CACHE_DIR,
 }
\ No newline at end of file
@@ -0,0 +1,87 @@
+import numpy as np
+
+
+class CSRGraph:
+    '''
+    Compact undirected weighted graph in CSR (compressed sparse row) form.
+
+    The neighbours of the node u are targets[offsets[u]:offsets[u+1]] and the weights of these
+    edges are at the same positions in weights. Every edge is stored in both the directions.
+    '''
+
+    def __init__(self, offsets, targets, weights):
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        self._sources = None
+
+    @classmethod
+    def from_edges(cls, num_nodes, src, dst, weights=None):
+        '''
+        Make an undirected graph from the arrays of the end nodes (and weights) of the edges
+        '''
+        src = np.asarray(src, dtype=np.int64)
+        dst = np.asarray(dst, dtype=np.int64)
+        if(weights is None):
+            weights = np.ones(len(src), dtype=np.int64)
+        weights = np.asarray(weights, dtype=np.int64)
+
+        # Storing every edge in both the directions (self loops only once)
+        not_loop = src != dst
+        all_src = np.concatenate((src, dst[not_loop]))
+        all_dst = np.concatenate((dst, src[not_loop]))
+        all_weights = np.concatenate((weights, weights[not_loop]))
+
+        # Stable sort by the source node keeps the neighbours in the order of the dataset
+        order = np.argsort(all_src, kind="stable")
+        offsets = np.zeros(num_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(all_src, minlength=num_nodes), out=offsets[1:])
+        return cls(offsets, all_dst[order], all_weights[order])
+
+    @classmethod
+    def from_networkx(cls, graph):
+        '''
+        Make a graph from a networkx graph (nodes can have any labels)
+
+        Returns:
+        (csr_graph, nodes): nodes[i] is the networkx node at the index i of the CSR graph
+        '''
+        nodes = list(graph.nodes())
+        node_index = {node: i for i, node in enumerate(nodes)}
+        src = np.fromiter((node_index[u] for u, _ in graph.edges()), dtype=np.int64, count=graph.number_of_edges())
+        dst = np.fromiter((node_index[v] for _, v in graph.edges()), dtype=np.int64, count=graph.number_of_edges())
+        return cls.from_edges(len(nodes), src, dst), nodes
+
+    @property
+    def num_nodes(self):
+        return len(self.offsets) - 1
+
+    @property
+    def num_edges(self):
+        num_self_loops = int(np.count_nonzero(self.sources() == self.targets))
+        return (len(self.targets) + num_self_loops) // 2
+
+    def degrees(self):
+        return np.diff(self.offsets)
+
+    def sources(self):
+        '''
+        Get the source node of every stored edge (the targets array gives the other end)
+        '''
+        # Expanded from the offsets only once, as many subgraph views reuse them
+        if(self._sources is None):
+            self._sources = np.repeat(np.arange(self.num_nodes, dtype=np.int64), self.degrees())
+        return self._sources
+
+    def neighbors(self, node):
+        return self.targets[self.offsets[node]:self.offsets[node + 1]]
+
+    def __getitem__(self, node):
+        '''
+        Get the list of (neighbour, weight) of a node, same as the old adjacency list
+        '''
+        start, end = self.offsets[node], self.offsets[node + 1]
+        return list(zip(self.targets[start:end].tolist(), self.weights[start:end].tolist()))
+
+    def __len__(self):
+        return self.num_nodes
@@ -0,0 +1,214 @@
+'''
+Closeness centrality kept up to date while edges are inserted into and deleted from the graph.
+
+The closeness of a source node s only depends on the BFS distances from s, so after a change only
+the sources whose distances change have to be recomputed. For an edge (u, v) and the graph G without
+it (the graph before an insertion, or after a deletion), the distances from s in G and in G + (u, v)
+are the same if and only if |d(s, u) - d(s, v)| <= 1 in G (both infinite counting as equal), as a
+shorter path through the edge would need the two ends to be at least 2 levels apart. As the graph is
+undirected, d(s, u) and d(s, v) for all the sources come from only two BFS, from u and from v.
+
+Every change of a batch is filtered this way on the graph as it is at that change (a source which
+keeps its distances at every step keeps them over the whole batch), and the union of the affected
+sources is recomputed once at the end with the 64-source BFS of gen_centrality.py. The top 50 nodes
+are then updated, and a validation mode compares everything against the full recomputation.
+
+The number of nodes stays fixed (the nodes of the changed edges must already be in the graph).
+'''
+import heapq
+import random
+import time
+
+import numpy as np
+
+from csr_graph import CSRGraph
+from gen_centrality import (get_bits, get_closeness_centrality, get_distance_sums_from_sources,
+                            get_normalized_closeness, get_top_50_nodes, iterate_bfs_levels)
+
+
+def get_distances_from_sources(sources, graph):
+    '''
+    Get the BFS distances from up to 64 sources at once
+
+    Returns a (len(sources), num_nodes) array of the distances, -1 for the unreachable nodes
+    '''
+    num_sources = len(sources)
+    dist = np.full((num_sources, graph.num_nodes), -1, dtype=np.int64)
+    dist[np.arange(num_sources), sources] = 0
+    for level, frontier in iterate_bfs_levels(sources, graph):
+        reached = np.flatnonzero(frontier)
+        bits = get_bits(frontier[reached])[:, :num_sources].astype(bool)
+        for i in range(num_sources):
+            dist[i, reached[bits[:, i]]] = level
+    return dist
+
+
+def get_affected_sources(u, v, graph):
+    '''
+    Get the sources whose distances change when the edge (u, v) is added to the graph (or, the same,
+    when it is removed from graph + (u, v))
+
+    graph: CSRGraph without the edge (u, v)
+
+    Returns the boolean array of the affected sources
+    '''
+    dist_u, dist_v = get_distances_from_sources(np.array([u, v]), graph)
+    reached_u, reached_v = dist_u >= 0, dist_v >= 0
+    return (reached_u != reached_v) | (reached_u & reached_v & (np.abs(dist_u - dist_v) >= 2))
+
+
+class DynamicCloseness:
+    '''
+    Closeness centrality (same values as get_closeness_centrality) and top k nodes of a graph
+    changing by batches of edge insertions and deletions
+
+    Attributes:
+    closeness: List of the closeness centrality of every node
+    top_nodes: List of the top k nodes (same order as get_top_50_nodes)
+    '''
+
+    def __init__(self, V, src, dst, weights=None, k=50):
+        '''
+        Inputs:
+        V: Number of total nodes in the graph
+        src, dst, weights: Arrays of the end nodes (and weights) of the edges
+        k: Number of top nodes kept
+        '''
+        self.V = V
+        self.k = k
+        self.src = np.asarray(src, dtype=np.int64)
+        self.dst = np.asarray(dst, dtype=np.int64)
+        self.weights = np.ones(len(self.src), dtype=np.int64) if weights is None else np.asarray(weights, dtype=np.int64)
+        self.graph = CSRGraph.from_edges(V, self.src, self.dst, self.weights)
+
+        self.num_reachable = np.ones(V, dtype=np.int64)
+        self.tot_shortest_paths = np.zeros(V, dtype=np.int64)
+        self.closeness = [0]*V
+        self._recompute(np.arange(V))
+        self.top_nodes = self._get_top_nodes()
+
+    @classmethod
+    def from_dataset(cls, data, V, k=50):
+        '''
+        Make it from the lines of the dataset (as make_graph_from_dataset)
+        '''
+        edges = np.loadtxt(data, delimiter=",", dtype=np.int64, ndmin=2).reshape(-1, 3)
+        return cls(V, edges[:, 0], edges[:, 1], edges[:, 2], k)
+
+    def _get_top_nodes(self):
+        # heapq.nlargest keeps the ties in the node order, same as the sort of get_top_50_nodes
+        return heapq.nlargest(self.k, range(self.V), key=self.closeness.__getitem__)
+
+    def _recompute(self, sources):
+        '''
+        Recompute the closeness centrality of the given source nodes (64 at a time)
+        '''
+        for batch_start in range(0, len(sources), 64):
+            batch = sources[batch_start:batch_start + 64]
+            num_reachable, tot_shortest_paths = get_distance_sums_from_sources(batch, self.graph)
+            self.num_reachable[batch] = num_reachable
+            self.tot_shortest_paths[batch] = tot_shortest_paths
+            for node, len_shortest_paths, tot in zip(batch.tolist(), num_reachable.tolist(), tot_shortest_paths.tolist()):
+                self.closeness[node] = get_normalized_closeness(len_shortest_paths, tot, self.V)
+
+    def _check_nodes(self, u, v):
+        if(not (0 <= u < self.V and 0 <= v < self.V)):
+            raise ValueError("Edge ({}, {}) has a node outside the graph of {} nodes".format(u, v, self.V))
+
+    def _set_edges(self, src, dst, weights):
+        self.src, self.dst, self.weights = src, dst, weights
+        self.graph = CSRGraph.from_edges(self.V, src, dst, weights)
+
+    def _insert_edge(self, u, v, weight, affected):
+        self._check_nodes(u, v)
+        if(u != v and not affected.all()):
+            affected |= get_affected_sources(u, v, self.graph)
+        self._set_edges(np.append(self.src, u), np.append(self.dst, v), np.append(self.weights, weight))
+
+    def _delete_edge(self, u, v, affected):
+        self._check_nodes(u, v)
+        matches = np.flatnonzero(((self.src == u) & (self.dst == v)) | ((self.src == v) & (self.dst == u)))
+        if(len(matches) == 0):
+            raise ValueError("Edge ({}, {}) is not in the graph".format(u, v))
+        keep = np.ones(len(self.src), dtype=bool)
+        keep[matches[0]] = False
+        self._set_edges(self.src[keep], self.dst[keep], self.weights[keep])
+        if(u != v and not affected.all()):
+            affected |= get_affected_sources(u, v, self.graph)
+
+    def apply_changes(self, insertions=(), deletions=(), validate=False):
+        '''
+        Apply a batch of edge changes and update the closeness centrality and the top k nodes
+
+        Inputs:
+        insertions: List of the added edges (u, v) or (u, v, weight)
+        deletions: List of the removed edges (u, v), removed before the insertions (one copy of the
+                   edge if it is in the dataset more than once)
+        validate: Compare the results against the full recomputation (raises RuntimeError if different)
+
+        Returns the array of the source nodes which were recomputed
+        '''
+        affected = np.zeros(self.V, dtype=bool)
+        old_edges = (self.src, self.dst, self.weights)
+        try:
+            for edge in deletions:
+                self._delete_edge(int(edge[0]), int(edge[1]), affected)
+            for edge in insertions:
+                self._insert_edge(int(edge[0]), int(edge[1]), int(edge[2]) if len(edge) > 2 else 1, affected)
+        except ValueError:
+            # A batch with a wrong edge is not applied at all
+            self._set_edges(*old_edges)
+            raise
+
+        sources = np.flatnonzero(affected)
+        old_top_nodes = set(self.top_nodes)
+        self._recompute(sources)
+
+        # The top k only has to be found again if one of its nodes changed or a changed node can enter it
+        threshold = self.closeness[self.top_nodes[-1]] if self.top_nodes else 0
+        if(len(self.top_nodes) < self.k or any(node in old_top_nodes or self.closeness[node] >= threshold for node in sources.tolist())):
+            self.top_nodes = self._get_top_nodes()
+
+        if(validate):
+            mismatches = self.validate()
+            if(mismatches):
+                raise RuntimeError("Dynamic closeness differs from the full recomputation at the nodes {}".format(mismatches[:10]))
+        return sources
+
+    def validate(self):
+        '''
+        Compare the closeness centrality and the top k nodes against the full recomputation
+
+        Returns the list of the nodes with different values (-1 added if the top k nodes differ)
+        '''
+        full_closeness = get_closeness_centrality(self.V, self.graph)
+        mismatches = [node for node in range(self.V) if self.closeness[node] != full_closeness[node]]
+        top_nodes = get_top_50_nodes(full_closeness) if self.k == 50 else heapq.nlargest(self.k, range(self.V), key=full_closeness.__getitem__)
+        if(self.top_nodes != top_nodes):
+            mismatches.append(-1)
+        return mismatches
+
+
+if __name__ == "__main__":
+    # Random batches of edge changes on the imdb_prodco graph, checked against the full recomputation
+    from gen_centrality import DATASET
+
+    with open(DATASET, "r") as file:
+        data = file.readlines()
+    rows, columns = map(int, data[0].strip().split(","))
+    dynamic = DynamicCloseness.from_dataset(data[1:], rows)
+
+    rng = random.Random(0)
+    for batch in range(20):
+        deletions = [(int(dynamic.src[i]), int(dynamic.dst[i])) for i in rng.sample(range(len(dynamic.src)), rng.randint(0, 3))]
+        insertions = [(rng.randrange(rows), rng.randrange(rows)) for _ in range(rng.randint(0, 3))]
+        start = time.perf_counter()
+        sources = dynamic.apply_changes(insertions, deletions)
+        update_time = time.perf_counter() - start
+        start = time.perf_counter()
+        mismatches = dynamic.validate()
+        full_time = time.perf_counter() - start
+        assert not mismatches, (batch, mismatches)
+        print("Batch {}: {} deletions, {} insertions, {} of {} sources recomputed in {:.3f} s (full recomputation {:.3f} s)".format(
+            batch, len(deletions), len(insertions), len(sources), rows, update_time, full_time))
+    print("Dynamic closeness matches the full recomputation after every batch")
@@ -1,12 +1,21 @@
 from pathlib import Path
 from collections import defaultdict, deque
+import concurrent.futures
 import os
+import heapq
+import math
+import random
+import tempfile
+import numpy as np
 import matplotlib.pyplot as plt
+from scipy.sparse import csgraph, csr_matrix
 import networkx as nx
 from networkx.algorithms import centrality
 
 # Configuring file locations of datasets, plots and output files
 from config import CONFIG
+from csr_graph import CSRGraph
+from results_store import ResultsWriter, render_text
 
 # Dataset
 DATASET = os.path.join(CONFIG["DATASET_DIR"], "imdb_prodco.adj")
@@ -15,15 +24,11 @@ DATASET = os.path.join(CONFIG["DATASET_DIR"], "imdb_prodco.adj")
 PLOT_DIR = CONFIG["PLOT_DIR"]
 
 # Output Text File
-OUTPUT_FILE_1 = Path(".\output_2_closeness.txt")
-OUTPUT_FILE_2 = Path(".\output_2.txt")
+OUTPUT_FILE_1 = Path("./output_2_closeness.txt")
+OUTPUT_FILE_2 = Path("./output_2.txt")
 
-# Making the blank output files
-with open(OUTPUT_FILE_1, "w") as f:
-    f.write("")
-# Making the blank output files
-with open(OUTPUT_FILE_2, "w") as f:
-    f.write("")
+# Store of the per-node results (output file 1 is rendered from it)
+RESULTS_STORE = os.path.join(CONFIG["CACHE_DIR"], "closeness_results")
 
 ###################################################
 
@@ -49,39 +54,584 @@ def get_shortest_length_path_from_source(node, graph):
                 dist.append(neigh_dist)
     return dist
 
+def iterate_bfs_levels(sources, graph):
+    '''
+    Run the BFS from up to 64 sources at once using bitset frontiers
+
+    Every node keeps a 64 bit mask of the sources which have reached it (bit i for sources[i]),
+    so one level of all the BFS is a single OR over the neighbours of every node (done over the
+    CSR arrays).
+
+    Yields (dist, frontier) for every level, where frontier[node] is the mask of the sources
+    reaching the node for the first time at the distance dist
+    '''
+    sources = np.asarray(sources, dtype=np.int64)
+    visited = np.zeros(graph.num_nodes, dtype=np.uint64)
+    visited[sources] = np.left_shift(np.uint64(1), np.arange(len(sources), dtype=np.uint64))
+    frontier = visited.copy()
+
+    # Only the nodes having neighbours take part in the reduction
+    has_nbrs = graph.degrees() > 0
+    starts = graph.offsets[:-1][has_nbrs]
+
+    dist = 0
+    while(frontier.any() and len(starts) > 0):
+        dist += 1
+        next_frontier = np.zeros(graph.num_nodes, dtype=np.uint64)
+        next_frontier[has_nbrs] = np.bitwise_or.reduceat(frontier[graph.targets], starts)
+        frontier = next_frontier & ~visited
+        visited |= frontier
+        if(not frontier.any()):
+            break
+        yield dist, frontier
+
+def get_bits(masks):
+    '''
+    Unpack an array of 64 bit masks into a (len(masks), 64) array of 0/1 (column i is bit i)
+    '''
+    masks = np.ascontiguousarray(masks, dtype="<u8")
+    return np.unpackbits(masks.view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+
+def get_distance_sums_from_sources(sources, graph):
+    '''
+    Get the sum of the shortest path lengths from up to 64 sources at once (see iterate_bfs_levels)
+
+    Inputs:
+    sources: Array of at most 64 distinct source nodes
+    graph: CSRGraph
+
+    Returns:
+    (num_reachable, tot_shortest_paths): Arrays with the number of nodes reachable from every
+    source (including itself) and the sum of the shortest path lengths to them
+    '''
+    num_sources = len(sources)
+    num_reachable = np.ones(num_sources, dtype=np.int64)
+    tot_shortest_paths = np.zeros(num_sources, dtype=np.int64)
+    for dist, frontier in iterate_bfs_levels(sources, graph):
+        # Counting the newly reached nodes for every source bit
+        bit_counts = get_bits(frontier[frontier != 0]).sum(axis=0, dtype=np.int64)[:num_sources]
+        num_reachable += bit_counts
+        tot_shortest_paths += dist*bit_counts
+    return num_reachable, tot_shortest_paths
+
+def get_normalized_closeness(len_shortest_paths, tot_shortest_paths, V):
+    '''
+    Closeness centrality of a node from the number of nodes reachable from it (including itself)
+    and the sum of the shortest path lengths to them
+    '''
+    node_closeness_centrality = 0
+    if(tot_shortest_paths>0 and V>1):
+        node_closeness_centrality = (len_shortest_paths - 1)/tot_shortest_paths
+        # Normalizing with respect to unconnected components
+        node_closeness_centrality *= (len_shortest_paths - 1)/(V - 1)
+    return node_closeness_centrality
+
 def get_closeness_centrality(V, graph):
     '''
     Calculate closeness_centrality of a graph
 
     Inputs:
     V: Number of total nodes in the graph
-    graph: Adjacency List
+    graph: CSRGraph (from make_graph_from_dataset)
 
     Returns:
     closeness_centrality: List of all the closeness_centrality of the nodes
     '''
     closeness_centrality = [0]*V
-    
-    for node in range(V):
-        shortest_path_lengths = get_shortest_length_path_from_source(node, graph)
-        tot_shortest_paths = sum(shortest_path_lengths)
-        len_shortest_paths = len(shortest_path_lengths)
-        node_closeness_centrality = 0
-        if(tot_shortest_paths>0 and V>1):
-            node_closeness_centrality = (len_shortest_paths - 1)/tot_shortest_paths
-            # Normalizing with respect to unconnected components
-            node_closeness_centrality *= (len_shortest_paths - 1)/(V - 1)
-        closeness_centrality[node] = node_closeness_centrality
+
+    # Running the BFS from 64 sources at a time
+    for batch_start in range(0, V, 64):
+        sources = np.arange(batch_start, min(batch_start + 64, V))
+        num_reachable, tot_shortest_paths = get_distance_sums_from_sources(sources, graph)
+        for node, len_shortest_paths, tot in zip(sources.tolist(), num_reachable.tolist(), tot_shortest_paths.tolist()):
+            closeness_centrality[node] = get_normalized_closeness(len_shortest_paths, tot, V)
     return closeness_centrality
 
-def make_graph_from_dataset(data):
-    # Returns a graph (adjacency list) from data read from dataset
-    graph = defaultdict(list)
-    for line in data:
-        u, v, w = map(int, line.strip().split(","))
-        graph[u].append((v, w))
-        graph[v].append((u, w))
-    return graph
+def get_connected_components(graph):
+    '''
+    Get the connected component label of every node and the sizes of the components
+
+    Returns:
+    (labels, sizes): labels[node] is the component of the node and sizes[label] its number of nodes
+    '''
+    n = graph.num_nodes
+    adjacency_matrix = csr_matrix((np.ones(len(graph.targets), dtype=np.int8), graph.targets, graph.offsets), shape=(n, n))
+    num_components, labels = csgraph.connected_components(adjacency_matrix, directed=False)
+    return labels, np.bincount(labels, minlength=num_components)
+
+def format_closeness(rows):
+    '''
+    Get the closeness values written to the output 1 file for a chunk of rows of the results store
+
+    The nodes without any reachable node (alone in their component) are written as 0, the integer
+    given for them by get_closeness_centrality, and the other nodes with their stored closeness.
+    '''
+    closeness = rows["closeness"].tolist()
+    component_sizes = rows["component_size"].tolist()
+    return [0 if component_size == 1 else value for value, component_size in zip(closeness, component_sizes)]
+
+def get_num_pivots(V, epsilon, delta):
+    '''
+    Number of pivots per component for which all the estimated average shortest path lengths are
+    within epsilon*diameter of the true values with probability at least 1-delta (Hoeffding + union bound)
+    '''
+    return max(1, math.ceil(math.log(2*V/delta)/(2*epsilon**2)))
+
+def get_approx_closeness_centrality(V, graph, epsilon=0.1, delta=0.1, num_pivots=None, seed=0):
+    '''
+    Estimate the closeness centrality of all the nodes from the BFS of sampled pivot nodes (Eppstein-Wang)
+
+    For every node, the average shortest path length to the nodes of its component is estimated by
+    the average length to the pivots sampled (uniformly, without replacement) from that component.
+    The graph is undirected, so one BFS from a pivot gives its distance to every node. Components
+    with at most num_pivots nodes use all their nodes as pivots, so their values are exact.
+    The Wasserman-Faust normalization of get_closeness_centrality is applied to the estimates.
+
+    Inputs:
+    V: Number of total nodes in the graph
+    graph: CSRGraph
+    epsilon, delta: Accuracy of the estimates (see get_num_pivots)
+    num_pivots: Number of pivots per component (overrides epsilon and delta), fewer pivots are faster
+    seed: Seed of the random sampling of the pivots
+
+    Returns:
+    (closeness_centrality, lower_bounds, upper_bounds): Lists of the estimated closeness centrality of
+    the nodes and the bounds holding with probability at least 1-delta
+    '''
+    if(num_pivots is None):
+        num_pivots = get_num_pivots(V, epsilon, delta)
+    labels, sizes = get_connected_components(graph)
+
+    # Sampling min(num_pivots, component size) pivots from every component
+    rng = np.random.default_rng(seed)
+    shuffled = rng.permutation(V)
+    shuffled = shuffled[np.argsort(labels[shuffled], kind="stable")]
+    component_starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    rank_in_component = np.arange(V) - component_starts[labels[shuffled]]
+    pivots = shuffled[rank_in_component < num_pivots]
+    component_pivots = np.minimum(sizes, num_pivots)
+
+    # Sum of the distances from all the pivots of its component to every node, and the eccentricities of the pivots
+    pivot_dist_sums = np.zeros(V, dtype=np.int64)
+    eccentricity = np.zeros(len(pivots), dtype=np.int64)
+    for batch_start in range(0, len(pivots), 64):
+        sources = pivots[batch_start:batch_start + 64]
+        for dist, frontier in iterate_bfs_levels(sources, graph):
+            reached_nodes = np.flatnonzero(frontier)
+            bits = get_bits(frontier[reached_nodes])
+            pivot_dist_sums[reached_nodes] += dist*bits.sum(axis=1, dtype=np.int64)
+            eccentricity[batch_start:batch_start + len(sources)][bits[:, :len(sources)].any(axis=0)] = dist
+
+    # Bounds of the diameter of every component: max(ecc) <= diameter <= 2*min(ecc)
+    diameter_lower = np.zeros(len(sizes), dtype=np.int64)
+    np.maximum.at(diameter_lower, labels[pivots], eccentricity)
+    diameter_upper = np.full(len(sizes), np.iinfo(np.int64).max, dtype=np.int64)
+    np.minimum.at(diameter_upper, labels[pivots], 2*eccentricity)
+    is_exact = component_pivots == sizes
+    diameter_upper = np.where(is_exact, diameter_lower, diameter_upper)
+
+    # Estimated average shortest path length (the node itself included) and its confidence interval
+    size = sizes[labels]
+    node_pivots = component_pivots[labels]
+    avg_length = pivot_dist_sums/node_pivots
+    half_width = diameter_upper[labels]*np.sqrt(math.log(2*V/delta)/(2*node_pivots))
+    half_width[is_exact[labels]] = 0
+    avg_length_lower = np.maximum(avg_length - half_width, (size - 1)/size)
+    avg_length_upper = np.minimum(avg_length + half_width, diameter_upper[labels]*(size - 1)/size)
+    avg_length_lower = np.minimum(avg_length_lower, avg_length)
+    avg_length_upper = np.maximum(avg_length_upper, avg_length)
+
+    def normalized_closeness(tot_shortest_paths):
+        # Same as get_normalized_closeness, for all the nodes at once
+        closeness = np.zeros(V)
+        valid = (tot_shortest_paths > 0) & (V > 1)
+        closeness[valid] = ((size[valid] - 1)/tot_shortest_paths[valid])*((size[valid] - 1)/(V - 1))
+        return closeness
+
+    # Using the exact integer sums for the exact components
+    tot_shortest_paths = np.where(is_exact[labels], pivot_dist_sums, avg_length*size)
+    closeness_centrality = normalized_closeness(tot_shortest_paths)
+    lower_bounds = np.where(is_exact[labels], closeness_centrality, normalized_closeness(avg_length_upper*size))
+    upper_bounds = np.where(is_exact[labels], closeness_centrality, normalized_closeness(avg_length_lower*size))
+    return closeness_centrality.tolist(), lower_bounds.tolist(), upper_bounds.tolist()
+
+def get_top_k_closeness_nodes(V, graph, k=50):
+    '''
+    Get the top k nodes with respect to closeness centrality without computing it fully for all the nodes
+
+    The nodes are processed in decreasing order of degree keeping the best k in a heap. The BFS from a
+    node is cut off as soon as an upper bound of its closeness centrality falls below the k-th best
+    value (Bergamini et al., Olsen et al.). The graph is undirected, so the number of nodes reachable
+    from a node is the size of its component, and after the level d with `reached` nodes seen, at most
+    sum(degree - 1) of the frontier nodes are at the distance d+1 and the rest are at least at d+2.
+
+    Inputs:
+    V: Number of total nodes in the graph
+    graph: CSRGraph
+    k: Number of top nodes
+
+    Returns:
+    (top_k_nodes, num_visited_edges): List of (node, closeness_centrality) of the top k nodes, same as
+    get_top_50_nodes on the full closeness centrality list (ties in the order of node IDs), and the
+    number of edges scanned by all the BFS
+    '''
+    labels, sizes = get_connected_components(graph)
+    component_size = sizes[labels].tolist()
+    targets = graph.targets.tolist()
+    offsets = graph.offsets.tolist()
+    adj = [targets[offsets[node]:offsets[node + 1]] for node in range(V)]
+    degree = [len(nbrs) for nbrs in adj]
+
+    heap = []
+    num_visited_edges = 0
+    visited_by = [-1]*V
+    for node in sorted(range(V), key=lambda node: -degree[node]):
+        len_component = component_size[node]
+        threshold = heap[0][0] if len(heap) == k else None
+
+        visited_by[node] = node
+        frontier = [node]
+        len_shortest_paths = 1
+        tot_shortest_paths = 0
+        dist = 0
+        pruned = False
+        while(frontier and len_shortest_paths < len_component):
+            if(threshold is not None):
+                # Lower bound of the final sum of the shortest path lengths
+                remaining = len_component - len_shortest_paths
+                if(dist == 0):
+                    next_level_max = degree[node]
+                else:
+                    next_level_max = sum(degree[u] for u in frontier) - len(frontier)
+                next_level_max = min(next_level_max, remaining)
+                tot_lower_bound = tot_shortest_paths + (dist + 1)*next_level_max + (dist + 2)*(remaining - next_level_max)
+                if(get_normalized_closeness(len_component, tot_lower_bound, V) < threshold):
+                    pruned = True
+                    break
+
+            dist += 1
+            next_frontier = []
+            for u in frontier:
+                num_visited_edges += degree[u]
+                for neigh in adj[u]:
+                    if(visited_by[neigh] != node):
+                        visited_by[neigh] = node
+                        next_frontier.append(neigh)
+            len_shortest_paths += len(next_frontier)
+            tot_shortest_paths += dist*len(next_frontier)
+            frontier = next_frontier
+        if(pruned):
+            continue
+
+        # Larger value first, and for the same value the smaller node ID first
+        item = (get_normalized_closeness(len_shortest_paths, tot_shortest_paths, V), -node)
+        if(len(heap) < k):
+            heapq.heappush(heap, item)
+        elif(item > heap[0]):
+            heapq.heapreplace(heap, item)
+
+    top_k_nodes = [(-neg_node, value) for value, neg_node in sorted(heap, reverse=True)]
+    return top_k_nodes, num_visited_edges
+
+def get_edge_lengths(graph, mode="distance"):
+    '''
+    Get the integer length of every stored edge of the graph from its weight
+
+    mode: "distance" (the weight is the length of the edge) or "inverse" (the length is 1/weight, so the
+    stronger ties are shorter); the inverse lengths are scaled by the lcm of the weights to be integers
+
+    Returns:
+    (lengths, scale): Array of the lengths (at the positions of graph.targets) and the number every
+    length was multiplied by
+    '''
+    weights = graph.weights.astype(np.int64)
+    if(len(weights) and weights.min() <= 0):
+        raise ValueError("The edge weights must be positive integers")
+    if(mode == "distance"):
+        return weights, 1
+    if(mode == "inverse"):
+        scale = 1
+        for weight in np.unique(weights).tolist():
+            scale = scale*weight//math.gcd(scale, weight)
+        return scale//weights, scale
+    raise ValueError("Unknown mode of the edge lengths: {}".format(mode))
+
+def get_weighted_distance_sums_from_sources(sources, graph, lengths):
+    '''
+    Get the sum of the weighted shortest path lengths from a batch of sources with Dial's bucket queue
+
+    The tentative distances of all the (source, node) pairs are kept in one array. The bucket queue is
+    a circular array of max_length + 1 buckets, the bucket of the distance d holding the pairs which got
+    the tentative distance d. Popping the bucket d settles all its pairs (the ones whose distance is
+    still d), and their edges are relaxed at once over the CSR arrays, pushing the improved pairs into
+    the buckets d+1..d+max_length.
+
+    Inputs:
+    sources: Array of distinct source nodes
+    graph: CSRGraph
+    lengths: Positive integer length of every stored edge (see get_edge_lengths)
+
+    Returns:
+    (num_reachable, tot_shortest_paths): Arrays with the number of nodes reachable from every source
+    (including itself) and the sum of the (integer) shortest path lengths to them
+    '''
+    sources = np.asarray(sources, dtype=np.int64)
+    n = graph.num_nodes
+    infinity = np.iinfo(np.int64).max
+    dist = np.full(len(sources)*n, infinity, dtype=np.int64)
+    start_keys = np.arange(len(sources), dtype=np.int64)*n + sources
+    dist[start_keys] = 0
+
+    num_buckets = (int(lengths.max()) if len(lengths) else 0) + 1
+    buckets = [[] for _ in range(num_buckets)]
+    buckets[0].append(start_keys)
+    num_pending = len(start_keys)
+    d = 0
+    while(num_pending > 0):
+        bucket = buckets[d % num_buckets]
+        if(bucket):
+            keys = np.concatenate(bucket)
+            bucket.clear()
+            num_pending -= len(keys)
+            # The stale pairs (improved since they were pushed) are skipped. A pair is pushed at most
+            # once with every distance, so the remaining pairs are distinct.
+            keys = keys[dist[keys] == d]
+
+            # Relaxing all the edges of the settled pairs
+            source_index, nodes = np.divmod(keys, n)
+            starts = graph.offsets[nodes]
+            counts = graph.offsets[nodes + 1] - starts
+            positions = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(int(counts.sum()))
+            nbr_keys = np.repeat(source_index*n, counts) + graph.targets[positions]
+            nbr_dist = d + lengths[positions]
+            improved = nbr_dist < dist[nbr_keys]
+            nbr_keys, nbr_dist = nbr_keys[improved], nbr_dist[improved]
+            np.minimum.at(dist, nbr_keys, nbr_dist)
+
+            # Pushing every improved pair (once) into the bucket of its new distance
+            nbr_keys = np.sort(nbr_keys)
+            nbr_keys = nbr_keys[np.concatenate(([True], nbr_keys[1:] != nbr_keys[:-1]))[:len(nbr_keys)]]
+            new_lengths = dist[nbr_keys] - d
+            for length in np.flatnonzero(np.bincount(new_lengths)).tolist():
+                buckets[(d + length) % num_buckets].append(nbr_keys[new_lengths == length])
+            num_pending += len(nbr_keys)
+        d += 1
+
+    dist = dist.reshape(len(sources), n)
+    reached = dist != infinity
+    num_reachable = reached.sum(axis=1, dtype=np.int64)
+    tot_shortest_paths = np.where(reached, dist, 0).sum(axis=1, dtype=np.int64)
+    return num_reachable, tot_shortest_paths
+
+def get_weighted_closeness_centrality(V, graph, mode="distance", max_batch_size=1 << 18):
+    '''
+    Calculate the closeness centrality of a graph using the edge weights (same normalization as
+    get_closeness_centrality)
+
+    Inputs:
+    V: Number of total nodes in the graph
+    graph: CSRGraph (from make_graph_from_dataset)
+    mode: "distance" or "inverse" (see get_edge_lengths)
+    max_batch_size: Maximum number of (source, node) distances kept at once, the sources are run in
+    batches of max_batch_size // V
+
+    Returns:
+    closeness_centrality: List of all the weighted closeness_centrality of the nodes
+    '''
+    lengths, scale = get_edge_lengths(graph, mode)
+    closeness_centrality = [0]*V
+    batch_size = max(1, max_batch_size // max(V, 1))
+    for batch_start in range(0, V, batch_size):
+        sources = np.arange(batch_start, min(batch_start + batch_size, V))
+        num_reachable, tot_shortest_paths = get_weighted_distance_sums_from_sources(sources, graph, lengths)
+        for node, len_shortest_paths, tot in zip(sources.tolist(), num_reachable.tolist(), tot_shortest_paths.tolist()):
+            closeness_centrality[node] = get_normalized_closeness(len_shortest_paths, tot/scale, V)
+    return closeness_centrality
+
+def get_simple_adjacency(graph):
+    '''
+    Get the CSR arrays of the simple version of the graph (no parallel edges and self loops) with the
+    id of the undirected edge of every stored edge
+
+    Returns:
+    (offsets, targets, slot_edge_ids, edges): slot_edge_ids[i] is the id of the edge stored at targets[i],
+    and edges the (num_edges, 2) array of the ends (u <= v) of every edge (self loops included)
+    '''
+    n = graph.num_nodes
+    src, dst = graph.sources(), np.asarray(graph.targets, dtype=np.int64)
+    edge_keys, slot_edge_ids = np.unique(np.minimum(src, dst)*n + np.maximum(src, dst), return_inverse=True)
+    edges = np.stack(np.divmod(edge_keys, n), axis=1) if n else np.zeros((0, 2), dtype=np.int64)
+
+    # Every (node, neighbour) pair once, sorted by the node
+    slot_keys, first = np.unique(src*n + dst, return_index=True)
+    not_loop = src[first] != dst[first]
+    slot_keys, first = slot_keys[not_loop], first[not_loop]
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(slot_keys // n, minlength=n), out=offsets[1:])
+    return offsets, slot_keys % n, slot_edge_ids[first], edges
+
+def add_betweenness_from_sources(sources, offsets, targets, slot_edge_ids, node_betweenness, edge_betweenness):
+    '''
+    Add the (unscaled) node and edge betweenness contributions of a batch of sources (Brandes)
+
+    The BFS from all the sources runs at once, level by level, over the (source, node) pairs, keeping the
+    edges of the shortest path DAG of every level. The dependencies are then accumulated back over these
+    edges from the last level to the first one.
+
+    Inputs:
+    sources: Array of distinct source nodes
+    offsets, targets, slot_edge_ids: Simple adjacency (see get_simple_adjacency)
+    node_betweenness, edge_betweenness: Arrays the contributions are added to
+    '''
+    sources = np.asarray(sources, dtype=np.int64)
+    n = len(offsets) - 1
+    dist = np.full(len(sources)*n, -1, dtype=np.int64)
+    sigma = np.zeros(len(sources)*n)
+    keys = np.arange(len(sources), dtype=np.int64)*n + sources
+    dist[keys] = 0
+    sigma[keys] = 1
+
+    # (parent keys, child keys, positions in targets) of the shortest path DAG edges of every level
+    levels = []
+    d = 0
+    while(len(keys)):
+        nodes = keys % n
+        starts = offsets[nodes]
+        counts = offsets[nodes + 1] - starts
+        positions = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(int(counts.sum()))
+        parents = np.repeat(keys, counts)
+        children = np.repeat(keys - nodes, counts) + targets[positions]
+        # The nodes of the next level are only found from this level, so the DAG edges are the ones
+        # to the pairs not reached before
+        in_dag = dist[children] < 0
+        parents, children, positions = parents[in_dag], children[in_dag], positions[in_dag]
+        dist[children] = d + 1
+        np.add.at(sigma, children, sigma[parents])
+        levels.append((parents, children, positions))
+        keys = np.sort(children)
+        keys = keys[np.concatenate(([True], keys[1:] != keys[:-1]))[:len(keys)]]
+        d += 1
+
+    delta = np.zeros(len(sources)*n)
+    for parents, children, positions in reversed(levels):
+        coeff = sigma[parents]/sigma[children]*(1 + delta[children])
+        np.add.at(delta, parents, coeff)
+        edge_betweenness += np.bincount(slot_edge_ids[positions], weights=coeff, minlength=len(edge_betweenness))
+
+    delta = delta.reshape(len(sources), n)
+    delta[np.arange(len(sources)), sources] = 0
+    node_betweenness += delta.sum(axis=0)
+
+# Adjacency arrays of the worker processes, memory-mapped once by every worker
+_shared_adjacency = {}
+
+def _init_betweenness_worker(array_locations):
+    for name, location in array_locations.items():
+        _shared_adjacency[name] = np.load(location, mmap_mode="r")
+
+def _get_betweenness_shard(sources, max_batch_size, adjacency=None):
+    '''
+    Get the (unscaled) node and edge betweenness contributions of a shard of sources, run in batches
+    '''
+    adjacency = adjacency or _shared_adjacency
+    offsets, targets, slot_edge_ids = adjacency["offsets"], adjacency["targets"], adjacency["slot_edge_ids"]
+    node_betweenness = np.zeros(len(offsets) - 1)
+    edge_betweenness = np.zeros(adjacency["num_edges"])
+    batch_size = max(1, max_batch_size // max(len(targets), 1))
+    for batch_start in range(0, len(sources), batch_size):
+        add_betweenness_from_sources(sources[batch_start:batch_start + batch_size], offsets, targets, slot_edge_ids,
+                                     node_betweenness, edge_betweenness)
+    return node_betweenness, edge_betweenness
+
+def get_betweenness_scale(n, normalized, k=None, endpoints=False):
+    '''
+    Scale of the betweenness values, same as networkx (_rescale) for undirected graphs
+
+    Returns:
+    (scale, source_scale): Scale of the nodes and of the sampled source nodes (the same unless the
+    sources are sampled and the endpoints are not counted)
+    '''
+    N = n if endpoints else n - 1
+    if(N < 2):
+        return 1.0, 1.0
+    if(k is None or endpoints):
+        K = N if k is None else k
+        scale = 1/(K*(N - 1)) if normalized else N/(K*2)
+        return scale, scale
+    if(normalized):
+        return 1/(k*(N - 1)), (1/((k - 1)*(N - 1)) if k > 1 else math.nan)
+    return N/(k*2), (N/((k - 1)*2) if k > 1 else math.nan)
+
+def get_betweenness_centrality(graph, k=None, normalized=True, seed=None, num_workers=None, max_batch_size=1 << 19):
+    '''
+    Calculate the node and edge betweenness centrality of a graph (same values as networkx's
+    betweenness_centrality and edge_betweenness_centrality, without weights)
+
+    The sources are split into shards run in a process pool. The workers memory-map one copy of the
+    adjacency arrays (saved as .npy files in a temporary directory) instead of getting pickled copies of
+    the graph, and their sums are added up with NumPy.
+
+    Inputs:
+    graph: CSRGraph (parallel edges and self loops are not considered)
+    k: Number of sampled source nodes (None to use all the nodes)
+    normalized: Normalize the values as networkx does
+    seed: Seed of the sampling (the same sources as networkx with the same seed and node order)
+    num_workers: Number of worker processes (by default the number of CPUs, 1 to run in this process)
+    max_batch_size: Maximum number of shortest path DAG edges kept at once (about), the sources of a
+    shard are run in batches of max_batch_size // (number of stored edges)
+
+    Returns:
+    (node_betweenness, edges, edge_betweenness): Array of the betweenness of every node, the (num_edges, 2)
+    array of the ends of every edge and the array of their betweenness
+    '''
+    n = graph.num_nodes
+    offsets, targets, slot_edge_ids, edges = get_simple_adjacency(graph)
+    if(k == n):
+        k = None
+    if(k is None):
+        sources = np.arange(n, dtype=np.int64)
+    else:
+        sources = np.array(random.Random(seed).sample(range(n), k), dtype=np.int64)
+
+    num_workers = num_workers or os.cpu_count() or 1
+    num_shards = min(len(sources), 4*num_workers) if num_workers > 1 else 1
+    shards = [shard for shard in np.array_split(sources, max(num_shards, 1)) if len(shard)]
+    node_betweenness = np.zeros(n)
+    edge_betweenness = np.zeros(len(edges))
+    if(num_workers <= 1 or len(shards) <= 1):
+        adjacency = {"offsets": offsets, "targets": targets, "slot_edge_ids": slot_edge_ids, "num_edges": len(edges)}
+        results = [_get_betweenness_shard(shard, max_batch_size, adjacency) for shard in shards]
+    else:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            array_locations = {}
+            for name, values in (("offsets", offsets), ("targets", targets), ("slot_edge_ids", slot_edge_ids),
+                                 ("num_edges", np.array(len(edges)))):
+                array_locations[name] = os.path.join(tmp_dir, name + ".npy")
+                np.save(array_locations[name], values)
+            with concurrent.futures.ProcessPoolExecutor(min(num_workers, len(shards)), initializer=_init_betweenness_worker,
+                                                        initargs=(array_locations,)) as executor:
+                results = list(executor.map(_get_betweenness_shard, shards, [max_batch_size]*len(shards)))
+    for shard_node_betweenness, shard_edge_betweenness in results:
+        node_betweenness += shard_node_betweenness
+        edge_betweenness += shard_edge_betweenness
+
+    scale, source_scale = get_betweenness_scale(n, normalized, k)
+    node_scales = np.full(n, scale)
+    if(k is not None):
+        node_scales[sources] = source_scale
+    edge_scale, _ = get_betweenness_scale(n, normalized, k, endpoints=True)
+    return node_betweenness*node_scales, edges, edge_betweenness*edge_scale
+
+def make_graph_from_dataset(data, V=None):
+    '''
+    Returns a graph (CSRGraph) from data read from dataset
+
+    V: Number of total nodes in the graph (by default the largest node ID + 1)
+    '''
+    edges = np.loadtxt(data, delimiter=",", dtype=np.int64, ndmin=2).reshape(-1, 3)
+    if(V is None):
+        V = int(edges[:, :2].max()) + 1 if len(edges) else 0
+    return CSRGraph.from_edges(V, edges[:, 0], edges[:, 1], edges[:, 2])
 
 def get_top_50_nodes(centrality_list):
     '''
@@ -92,66 +642,66 @@ def get_top_50_nodes(centrality_list):
     return top_50_nodes
 
 ###################################################
-print()
-print("Question 2")
-print("-----------")
-print()
 
-# Reading Dataset
-with open(DATASET, "r") as file:
-    data = file.readlines()
+if __name__ == "__main__":
+    print()
+    print("Question 2")
+    print("-----------")
+    print()
 
-rows, columns = map(int, data[0].strip().split(","))
-data = data[1:]     # Removing the first line containing the rows and columns
+    # Reading Dataset
+    with open(DATASET, "r") as file:
+        data = file.readlines()
 
-###################################################
+    rows, columns = map(int, data[0].strip().split(","))
+    data = data[1:]     # Removing the first line containing the rows and columns
 
-print("Part A")
-# Making adjacency list
-graph = make_graph_from_dataset(data)
-closeness_centrality_list = get_closeness_centrality(rows, graph)
+    ###################################################
 
-# Writing output to the output 1 file
-output = ""
-for node_ID, centrality_value in enumerate(closeness_centrality_list):
-    output += "{} {}".format(node_ID, centrality_value)
-    output += "\n"
-with open(OUTPUT_FILE_1, "w") as f:
-    f.write(output)
+    print("Part A")
+    # Making adjacency list
+    graph = make_graph_from_dataset(data, rows)
+    closeness_centrality_list = get_closeness_centrality(rows, graph)
 
-###################################################
+    # Storing the per-node results as columns and rendering the output 1 file from them
+    component_labels, component_sizes = get_connected_components(graph)
+    with ResultsWriter(RESULTS_STORE, {"node": np.int64, "closeness": np.float64, "degree": np.int64, "component": np.int64, "component_size": np.int64}) as writer:
+        writer.append(node=np.arange(rows), closeness=closeness_centrality_list, degree=graph.degrees(), component=component_labels, component_size=component_sizes[component_labels])
+    render_text(RESULTS_STORE, OUTPUT_FILE_1, "{} {}", ["node", "closeness"], {"closeness": format_closeness})
+
+    ###################################################
+
+    print("Part B")
+    # Making an undirected graph from the data read from dataset
+    G = nx.Graph()
+    for line in data:
+        u, v, w = map(int, line.strip().split(","))
+        G.add_edge(u, v)
+
+    print("a.")
+    closeness_centrality_dict_from_nx = centrality.closeness_centrality(G)
+    closeness_centrality_list_from_nx = [0]*rows
+    for key, value in closeness_centrality_dict_from_nx.items():
+        closeness_centrality_list_from_nx[key] = value
+
+    # Plotting the histogram
+    print("Plotting Closeness Centrality Values")
+    plt.title("Normalized Closeness Centrality")
+    plt.hist(closeness_centrality_list_from_nx, rwidth=0.2)
+    plt.xlabel("Closeness Centrality Values")
+    plt.ylabel("Frequency")
+    fig_destination = os.path.join(PLOT_DIR, "closeness_dist.png")
+    plt.savefig(fig_destination)
+    plt.close()
+    print("Plotting Done")
+    print()
+
+    print("b.")
+    top_50_nodes = get_top_50_nodes(closeness_centrality_list)
+    top_50_nodes_from_nx = get_top_50_nodes(closeness_centrality_list_from_nx)
+    overlapping_nodes = list(set(top_50_nodes) & set(top_50_nodes_from_nx))
 
-print("Part B")
-# Making an undirected graph from the data read from dataset
-G = nx.Graph()
-for line in data:
-    u, v, w = map(int, line.strip().split(","))
-    G.add_edge(u, v)
-
-print("a.")
-closeness_centrality_dict_from_nx = centrality.closeness_centrality(G)
-closeness_centrality_list_from_nx = [0]*rows
-for key, value in closeness_centrality_dict_from_nx.items():
-    closeness_centrality_list_from_nx[key] = value
-
-# Plotting the histogram
-print("Plotting Closeness Centrality Values")
-plt.title("Normalized Closeness Centrality")
-plt.hist(closeness_centrality_list_from_nx, rwidth=0.2)
-plt.xlabel("Closeness Centrality Values")
-plt.ylabel("Frequency")
-fig_destination = os.path.join(PLOT_DIR, "closeness_dist.png")
-plt.savefig(fig_destination)
-plt.close()
-print("Plotting Done")
-print()
-
-print("b.")
-top_50_nodes = get_top_50_nodes(closeness_centrality_list)
-top_50_nodes_from_nx = get_top_50_nodes(closeness_centrality_list_from_nx)
-overlapping_nodes = list(set(top_50_nodes) & set(top_50_nodes_from_nx))
-
-# Writing output to the output 2 file
-output = "#overlaps for Closeness Centrality: {}".format(len(overlapping_nodes))
-with open(OUTPUT_FILE_2, "w") as f:
-    f.write(output)
\ No newline at end of file
+    # Writing output to the output 2 file
+    output = "#overlaps for Closeness Centrality: {}".format(len(overlapping_nodes))
+    with open(OUTPUT_FILE_2, "w") as f:
+        f.write(output)
\ No newline at end of file
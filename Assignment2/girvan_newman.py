@@ -0,0 +1,173 @@
+'''
+Girvan–Newman community detection that stops as soon as the requested levels are found.
+
+networkx's girvan_newman recomputes the edge betweenness of the whole graph after every edge removal,
+and list(girvan_newman(graph)) goes down the whole dendrogram (to single nodes). Here:
+
+* Removing an edge only changes the shortest paths inside its own connected component, so the edge
+  betweenness is recomputed (Brandes, one BFS per source) only for the nodes of that component.
+  The other components keep their values, which are the same as a full recomputation would give.
+* The levels are generated one by one and get_girvan_newman_levels stops at the largest requested
+  number of communities, returning all the requested levels from this single run.
+
+The BFS and the accumulation go over the nodes and neighbours in the same order as networkx, and the
+edge with the highest betweenness is chosen with the same tie break (the first one in the order of
+graph.edges()), so the communities found are the same as with networkx.
+'''
+from collections import deque
+
+import networkx as nx
+
+
+def _add_edge_betweenness(adj, adj_edges, source, dist, sigma, betweenness):
+    '''
+    Add the edge betweenness contributions of the shortest paths from one source node (Brandes)
+
+    adj_edges[v][i] is the id of the edge to the neighbour adj[v][i]. dist and sigma are lists with -1
+    and 0.0 for every node, and are reset for the reached nodes before returning.
+    '''
+    dist[source] = 0
+    sigma[source] = 1.0
+    pred = {source: []}
+    order = []
+    queue = deque([source])
+    while(queue):
+        v = queue.popleft()
+        order.append(v)
+        next_dist = dist[v] + 1
+        sigma_v = sigma[v]
+        for w, edge_id in zip(adj[v], adj_edges[v]):
+            if(dist[w] < 0):
+                queue.append(w)
+                dist[w] = next_dist
+                pred[w] = []
+            if(dist[w] == next_dist):
+                sigma[w] += sigma_v
+                pred[w].append((v, edge_id))
+
+    delta = dict.fromkeys(order, 0)
+    while(order):
+        w = order.pop()
+        coeff = (1 + delta[w])/sigma[w]
+        for v, edge_id in pred[w]:
+            c = sigma[v]*coeff
+            betweenness[edge_id] += c
+            delta[v] += c
+        dist[w] = -1
+        sigma[w] = 0.0
+
+
+def _get_component(adj, node):
+    '''
+    Get the set of nodes reachable from a node
+    '''
+    component = {node}
+    queue = [node]
+    while(queue):
+        v = queue.pop()
+        for w in adj[v]:
+            if(w not in component):
+                component.add(w)
+                queue.append(w)
+    return component
+
+
+def girvan_newman(graph):
+    '''
+    Generate the levels of the Girvan–Newman dendrogram, same as networkx's girvan_newman
+
+    Every level is a tuple of the sets of nodes of the communities, with one more community than the
+    level before it. The edge betweenness is recomputed only in the component of the removed edge.
+    '''
+    g = graph.copy().to_undirected()
+    g.remove_edges_from(list(nx.selfloop_edges(g)))
+    if(g.number_of_edges() == 0):
+        yield tuple(nx.connected_components(g))
+        return
+
+    # Nodes are indexed in the order of the graph, the neighbour lists keep the order of the graph
+    nodes = list(g.nodes())
+    node_index = {node: i for i, node in enumerate(nodes)}
+    adj = [[node_index[w] for w in g[v]] for v in nodes]
+
+    # Edge ids in the order of g.edges() (the order in which networkx breaks the ties)
+    edge_ids = {}
+    edges = []
+    for u, v in g.edges():
+        u, v = node_index[u], node_index[v]
+        edge_ids[u, v] = edge_ids[v, u] = len(edges)
+        edges.append((u, v))
+    adj_edges = [[edge_ids[v, w] for w in adj[v]] for v in range(len(nodes))]
+
+    # Normalized edge betweenness, as networkx's edge_betweenness_centrality
+    n = len(nodes)
+    scale = 1/(n*(n - 1)) if n > 1 else 1
+    betweenness = [0.0]*len(edges)
+    raw = [0.0]*len(edges)
+    alive = [True]*len(edges)
+    dist = [-1]*n
+    sigma = [0.0]*n
+
+    def update_betweenness(component):
+        component_edges = [edge_id for u in component for edge_id in adj_edges[u]]
+        for edge_id in component_edges:
+            raw[edge_id] = 0.0
+        for source in sorted(component):
+            _add_edge_betweenness(adj, adj_edges, source, dist, sigma, raw)
+        for edge_id in component_edges:
+            betweenness[edge_id] = raw[edge_id]*scale
+
+    seen = set()
+    for node in range(n):
+        if(node not in seen):
+            component = _get_component(adj, node)
+            seen |= component
+            update_betweenness(component)
+
+    num_alive = len(edges)
+    while(num_alive > 0):
+        # First edge (in the order of g.edges()) with the highest betweenness
+        best = None
+        for edge_id in range(len(edges)):
+            if(alive[edge_id] and (best is None or betweenness[edge_id] > betweenness[best])):
+                best = edge_id
+        u, v = edges[best]
+        alive[best] = False
+        num_alive -= 1
+        for a, b in ((u, v), (v, u)):
+            i = adj[a].index(b)
+            del adj[a][i]
+            del adj_edges[a][i]
+        g.remove_edge(nodes[u], nodes[v])
+
+        # Only the component of the removed edge (now maybe split in two) has new shortest paths
+        component = _get_component(adj, u)
+        if(v in component):
+            update_betweenness(component)
+        else:
+            update_betweenness(component | _get_component(adj, v))
+            yield tuple(nx.connected_components(g))
+
+
+def get_girvan_newman_levels(graph, nums_communities):
+    '''
+    Get the Girvan–Newman communities for several numbers of communities from a single run
+
+    The run stops as soon as the largest requested number of communities is reached.
+
+    nums_communities: Iterable of the numbers of communities wanted
+
+    Returns a dict {number of communities: list of communities (sets of nodes)}, with the first level
+    having at least that many communities (the last level if there are never that many)
+    '''
+    pending = sorted(set(nums_communities))
+    levels = {}
+    communities = None
+    for communities in girvan_newman(graph):
+        while(pending and len(communities) >= pending[0]):
+            levels[pending.pop(0)] = list(communities)
+        if(not pending):
+            break
+    for num in pending:
+        levels[num] = list(communities)
+    return levels
@@ -0,0 +1,463 @@
+'''
+Streaming GML loader giving the CSR graph, the node labels and typed attribute columns.
+
+nx.read_gml tokenizes the whole file into Python objects and builds a dict of dicts graph, which is
+slow and heavy for large files. Here the file is read in chunks and every chunk is tokenized with a
+single regular expression into (key, value) pairs. Only the node and edge records (at the second
+level, graph [ node [ ... ] ]) are kept:
+
+* The node ids become the indices 0..n-1 in the order of the file, the labels are kept in an array
+  and the label to index mapping is a dict over it.
+* Every other node (and edge) key becomes a NumPy column: int64 if all its values are integers,
+  float64 if they are numbers (missing numbers are nan), else a string array (missing strings are "").
+  Nested lists (as graphics [ ... ]) are skipped.
+* The edge ends are converted to int64 arrays chunk by chunk and mapped to the node indices at the
+  end with a sort and a binary search.
+
+The graph is made as the undirected CSRGraph of csr_graph.py (with weights 1). The parsed arrays and
+the CSR arrays are saved as .npy files in CONFIG["CACHE_DIR"] (same checks as the snapshots of
+Assignment1: size and modification time, then the sha256 hash of the file), and the later loads
+memory-map them. Every write of the cache goes to a new data directory, and meta.json (replaced
+atomically) points to it last, so several processes can write the cache at once (the last one wins)
+and a reader never sees a half written or deleted version.
+'''
+import hashlib
+import html
+import json
+import os
+import re
+import shutil
+import sys
+import time
+import tracemalloc
+import uuid
+
+import numpy as np
+import networkx as nx
+
+from config import CONFIG
+from csr_graph import CSRGraph
+
+CACHE_VERSION = 2
+CHUNK_SIZE = 1 << 20
+# Age after which a cache directory still being written is taken as left by a failed write
+STALE_WRITE_SECONDS = 3600
+# One token is an edge record with only the source and the target (the most common record, read at
+# once), a key with its value (a number, a "string" or the [ opening a list), a ] closing a list, or
+# a comment line
+TOKEN = re.compile(r'edge\s*\[\s*source\s+([^\s\[\]"]+)\s+target\s+([^\s\[\]"]+)\s*\]'
+                   r'|([A-Za-z_][A-Za-z0-9_]*)\s+("[^"]*"|\[|[^\s\[\]]+)|(\])|#[^\n]*')
+# Line with only a key (or blank)
+LONE_KEY = re.compile(r'\s*([A-Za-z_][A-Za-z0-9_]*)?\s*')
+
+
+class GMLGraph:
+    '''
+    Graph read from a GML file
+
+    Attributes:
+    graph: CSRGraph (undirected) over the node indices 0..n-1
+    labels: Array of the label of every node (the id as a string if it has no label)
+    node_ids: Array of the GML id of every node
+    src, dst: Arrays of the node indices of the ends of every edge (in the order of the file)
+    node_attributes, edge_attributes: Dicts {key: array with the value of every node/edge}
+    directed, multigraph: Flags of the GML graph
+    '''
+
+    def __init__(self, node_ids, labels, src, dst, node_attributes, edge_attributes, directed=False, multigraph=False, graph=None):
+        self.node_ids = node_ids
+        self.labels = labels
+        self.src = src
+        self.dst = dst
+        self.node_attributes = node_attributes
+        self.edge_attributes = edge_attributes
+        self.directed = directed
+        self.multigraph = multigraph
+        self.graph = CSRGraph.from_edges(len(node_ids), src, dst) if graph is None else graph
+        self._label_ids = None
+
+    @property
+    def num_nodes(self):
+        return len(self.node_ids)
+
+    @property
+    def label_ids(self):
+        '''
+        Dict {label: node index}
+        '''
+        if(self._label_ids is None):
+            self._label_ids = {label: i for i, label in enumerate(self.labels.tolist())}
+        return self._label_ids
+
+    def to_networkx(self):
+        '''
+        Make the same networkx graph as nx.read_gml (nodes named by their labels, in the same order,
+        with their attributes)
+        '''
+        if(self.multigraph):
+            graph = nx.MultiDiGraph() if self.directed else nx.MultiGraph()
+        else:
+            graph = nx.DiGraph() if self.directed else nx.Graph()
+        labels = self.labels.tolist()
+        columns = [(key, values.tolist()) for key, values in self.node_attributes.items()]
+        graph.add_nodes_from((label, {key: values[i] for key, values in columns}) for i, label in enumerate(labels))
+        edge_columns = [(key, values.tolist()) for key, values in self.edge_attributes.items()]
+        graph.add_edges_from((labels[u], labels[v], {key: values[i] for key, values in edge_columns})
+                             for i, (u, v) in enumerate(zip(self.src.tolist(), self.dst.tolist())))
+        return graph
+
+
+class _Columns:
+    '''
+    Raw (string) values of the keys of the node or edge records, with None for the missing ones
+    '''
+
+    def __init__(self):
+        self.columns = {}
+        self.num_records = 0
+
+    def add(self, record):
+        if(not record and not self.columns):
+            self.num_records += 1
+            return
+        for key, value in record.items():
+            if(key not in self.columns):
+                self.columns[key] = [None]*self.num_records
+            self.columns[key].append(value)
+        self.num_records += 1
+        for values in self.columns.values():
+            if(len(values) < self.num_records):
+                values.append(None)
+
+    def get_arrays(self):
+        return {key: _get_typed_column(values) for key, values in self.columns.items()}
+
+
+def _get_string(value):
+    if(value.startswith('"')):
+        value = value[1:-1]
+        if("&" in value):
+            value = html.unescape(value)
+    return value
+
+
+def _get_typed_column(values):
+    '''
+    Make a NumPy array from the raw values of a key (int64, float64 or strings)
+    '''
+    present = [value for value in values if value is not None]
+    if(present and not any(value.startswith('"') for value in present)):
+        try:
+            if(len(present) == len(values)):
+                return np.array(values, dtype=np.int64)
+        except ValueError:
+            pass
+        try:
+            return np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+        except ValueError:
+            pass
+    return np.array(["" if value is None else _get_string(value) for value in values], dtype=str)
+
+
+def _read_chunks(location, chunk_size=CHUNK_SIZE):
+    # Chunks of whole lines, so that no token is split between two chunks
+    with open(location, "r", encoding="utf-8") as f:
+        remainder = ""
+        for chunk in iter(lambda: f.read(chunk_size), ""):
+            chunk = remainder + chunk
+            end = chunk.rfind("\n") + 1
+            # A key with its value on the next line (as edge followed by [) goes with the next chunk
+            while(end > 0):
+                line_start = chunk.rfind("\n", 0, end - 1) + 1
+                if(not LONE_KEY.fullmatch(chunk, line_start, end)):
+                    break
+                end = line_start
+            remainder = chunk[end:]
+            yield chunk[:end]
+        if(remainder):
+            yield remainder
+
+
+def parse_gml(location, chunk_size=CHUNK_SIZE):
+    '''
+    Parse a GML file into a GMLGraph (without the cache)
+    '''
+    node_records, edge_records = _Columns(), _Columns()
+    graph_keys = {}
+    src_chunks, dst_chunks = [], []
+    # Keys of the lists open at the current position, and the node or edge record being read
+    stack = []
+    record = None
+    for chunk in _read_chunks(location, chunk_size):
+        sources, targets = [], []
+        for source, target, key, value, close in TOKEN.findall(chunk):
+            if(source):
+                if(stack == ["graph"]):
+                    sources.append(source)
+                    targets.append(target)
+                    if(edge_records.columns):
+                        edge_records.add({})
+                    else:
+                        edge_records.num_records += 1
+            elif(close):
+                if(len(stack) == 2 and record is not None):
+                    if(stack[1] == "node"):
+                        node_records.add(record)
+                    elif("source" in record and "target" in record):
+                        sources.append(record.pop("source"))
+                        targets.append(record.pop("target"))
+                        edge_records.add(record)
+                    else:
+                        raise ValueError("Edge without source or target in {}".format(location))
+                    record = None
+                if(not stack):
+                    raise ValueError("Unbalanced ] in {}".format(location))
+                stack.pop()
+            elif(value == "["):
+                stack.append(key)
+                if(len(stack) == 2 and stack[0] == "graph" and key in ("node", "edge")):
+                    record = {}
+            elif(record is not None and len(stack) == 2):
+                record[key] = value
+            elif(len(stack) == 1 and stack[0] == "graph"):
+                graph_keys[key] = value
+        src_chunks.append(np.array(sources, dtype=np.int64))
+        dst_chunks.append(np.array(targets, dtype=np.int64))
+    if(stack):
+        raise ValueError("Unclosed list {} in {}".format(stack[-1], location))
+
+    node_columns = node_records.get_arrays()
+    edge_columns = edge_records.get_arrays()
+    if("id" not in node_columns or node_columns["id"].dtype != np.int64):
+        raise ValueError("Every node needs an integer id in {}".format(location))
+    node_ids = node_columns.pop("id")
+    labels = node_columns.pop("label", node_ids).astype(str)
+
+    # Mapping the ids of the edge ends to the node indices
+    order = np.argsort(node_ids, kind="stable")
+    sorted_ids = node_ids[order]
+    if(np.any(sorted_ids[1:] == sorted_ids[:-1])):
+        raise ValueError("Duplicated node id in {}".format(location))
+    src_ids, dst_ids = np.concatenate(src_chunks), np.concatenate(dst_chunks)
+    indices = []
+    for ids in (src_ids, dst_ids):
+        positions = np.minimum(np.searchsorted(sorted_ids, ids), max(len(sorted_ids) - 1, 0))
+        if(len(ids) and (len(sorted_ids) == 0 or np.any(sorted_ids[positions] != ids))):
+            raise ValueError("Edge to an unknown node id in {}".format(location))
+        indices.append(order[positions] if len(ids) else ids)
+    src, dst = indices
+
+    directed = graph_keys.get("directed", "0") == "1"
+    multigraph = graph_keys.get("multigraph", "0") == "1"
+    if(not multigraph):
+        # Same check as nx.read_gml
+        n = len(node_ids)
+        keys = np.sort(src*n + dst if directed else np.minimum(src, dst)*n + np.maximum(src, dst))
+        if(np.any(keys[1:] == keys[:-1])):
+            raise ValueError("Duplicated edge in {} (not a multigraph)".format(location))
+    return GMLGraph(node_ids, labels, src, dst, node_columns, edge_columns, directed, multigraph)
+
+
+def get_file_hash(file_location):
+    '''
+    Get the sha256 hash of a file (read in chunks)
+    '''
+    file_hash = hashlib.sha256()
+    with open(file_location, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+
+def get_cache_dir(location, cache_dir):
+    return os.path.join(cache_dir, os.path.basename(location) + ".arrays")
+
+
+def _read_cache_meta(gml_cache_dir):
+    meta_location = os.path.join(gml_cache_dir, "meta.json")
+    if(not os.path.exists(meta_location)):
+        return None
+    with open(meta_location, "r") as f:
+        return json.load(f)
+
+
+def _write_cache_meta(gml_cache_dir, meta):
+    # Written to a temporary file and renamed, so meta.json is always complete
+    tmp_location = os.path.join(gml_cache_dir, "meta.json.tmp-{}-{}".format(os.getpid(), uuid.uuid4().hex))
+    with open(tmp_location, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp_location, os.path.join(gml_cache_dir, "meta.json"))
+
+
+def _write_cache(gml, gml_cache_dir, meta):
+    arrays = {"node_ids": gml.node_ids, "labels": gml.labels, "src": gml.src, "dst": gml.dst,
+              "offsets": gml.graph.offsets, "targets": gml.graph.targets, "weights": gml.graph.weights}
+    for key, values in gml.node_attributes.items():
+        arrays["node_attribute." + key] = values
+    for key, values in gml.edge_attributes.items():
+        arrays["edge_attribute." + key] = values
+
+    # Every write goes to its own data directory (renamed from tmp- to data- once complete), so the
+    # arrays of another process (being written, or memory-mapped by a reader) are never touched
+    version_id = "{}-{}".format(os.getpid(), uuid.uuid4().hex)
+    tmp_dir = os.path.join(gml_cache_dir, "tmp-" + version_id)
+    data_dir = "data-" + version_id
+    os.makedirs(tmp_dir)
+    for name, values in arrays.items():
+        np.save(os.path.join(tmp_dir, name + ".npy"), values, allow_pickle=False)
+    os.replace(tmp_dir, os.path.join(gml_cache_dir, data_dir))
+    meta.update({
+        "data_dir": data_dir,
+        "arrays": list(arrays),
+        "node_attributes": list(gml.node_attributes),
+        "edge_attributes": list(gml.edge_attributes),
+        "directed": gml.directed,
+        "multigraph": gml.multigraph,
+    })
+
+    old_meta = _read_cache_meta(gml_cache_dir)
+    _write_cache_meta(gml_cache_dir, meta)
+
+    # Removing the versions older than the one just replaced (a reader may still be opening that one),
+    # the directories of the writes which never finished, and the arrays of the first cache layout
+    keep = {data_dir, (old_meta or {}).get("data_dir")}
+    for name in os.listdir(gml_cache_dir):
+        path = os.path.join(gml_cache_dir, name)
+        try:
+            if(name.startswith("data-") and name not in keep):
+                shutil.rmtree(path, ignore_errors=True)
+            elif(name.startswith("tmp-") and time.time() - os.path.getmtime(path) > STALE_WRITE_SECONDS):
+                shutil.rmtree(path, ignore_errors=True)
+            elif(name.endswith(".npy")):
+                os.remove(path)
+        except FileNotFoundError:
+            # Removed by another process at the same time
+            pass
+
+
+def _read_cache(gml_cache_dir, meta):
+    def load_array(name):
+        return np.load(os.path.join(gml_cache_dir, meta["data_dir"], name + ".npy"), mmap_mode="r")
+
+    return GMLGraph(load_array("node_ids"), load_array("labels"), load_array("src"), load_array("dst"),
+                    {key: load_array("node_attribute." + key) for key in meta["node_attributes"]},
+                    {key: load_array("edge_attribute." + key) for key in meta["edge_attributes"]},
+                    meta["directed"], meta["multigraph"],
+                    CSRGraph(load_array("offsets"), load_array("targets"), load_array("weights")))
+
+
+def load_gml(location, cache_dir=CONFIG["CACHE_DIR"]):
+    '''
+    Load a GML file as a GMLGraph, through the binary cache (made on the first load or when the file changed)
+
+    Inputs:
+    location: Location of the GML file
+    cache_dir: Directory of the cache (None to always parse the file)
+    '''
+    if(cache_dir is None):
+        return parse_gml(location)
+
+    gml_cache_dir = get_cache_dir(location, cache_dir)
+    stat = os.stat(location)
+    meta = _read_cache_meta(gml_cache_dir)
+    if(meta is not None and meta.get("version") == CACHE_VERSION):
+        try:
+            if(meta["size"] == stat.st_size and meta["mtime"] == stat.st_mtime_ns):
+                return _read_cache(gml_cache_dir, meta)
+            if(meta["size"] == stat.st_size and meta["sha256"] == get_file_hash(location)):
+                # Only the modification time changed
+                meta["mtime"] = stat.st_mtime_ns
+                _write_cache_meta(gml_cache_dir, meta)
+                return _read_cache(gml_cache_dir, meta)
+        except FileNotFoundError:
+            # The version was removed by other processes writing the cache at the same time
+            pass
+
+    gml = parse_gml(location)
+    os.makedirs(gml_cache_dir, exist_ok=True)
+    meta = {
+        "version": CACHE_VERSION,
+        "source": os.path.abspath(location),
+        "size": stat.st_size,
+        "mtime": stat.st_mtime_ns,
+        "sha256": get_file_hash(location),
+    }
+    _write_cache(gml, gml_cache_dir, meta)
+    return gml
+
+
+def write_gml_edges(location, num_nodes, src, dst, values=None):
+    '''
+    Write a GML file of an undirected graph, in the layout of the datasets (one key per line)
+
+    values: Optional array of the value of every node
+    '''
+    with open(location, "w") as f:
+        f.write('graph\n[\n  directed 0\n')
+        for node in range(num_nodes):
+            f.write('  node\n  [\n    id {}\n    label "n{}"\n'.format(node, node))
+            if(values is not None):
+                f.write('    value {}\n'.format(values[node]))
+            f.write('  ]\n')
+        for u, v in zip(src.tolist(), dst.tolist()):
+            f.write('  edge\n  [\n    source {}\n    target {}\n  ]\n'.format(u, v))
+        f.write(']\n')
+
+
+def measure(function):
+    '''
+    Get the result and the time (in seconds) of function(), and its peak memory in bytes (from a
+    second run under tracemalloc, which slows down the run)
+    '''
+    start = time.perf_counter()
+    result = function()
+    time_taken = time.perf_counter() - start
+    tracemalloc.start()
+    try:
+        function()
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, time_taken, peak_memory
+
+
+if __name__ == "__main__":
+    # Checking the datasets against nx.read_gml, then comparing the loading of a generated GML file
+    import tempfile
+
+    from graph_generators import get_edges, get_undirected_edges
+
+    for dataset in ("football.gml", "polbooks.gml"):
+        location = os.path.join(CONFIG["DATASET_DIR"], dataset)
+        expected = nx.read_gml(location)
+        graph = parse_gml(location).to_networkx()
+        assert list(graph.nodes(data=True)) == list(expected.nodes(data=True)), dataset
+        assert list(graph.edges()) == list(expected.edges()), dataset
+    print("Datasets parsed the same as nx.read_gml")
+
+    # Generating more edges until num_edges remain once the duplicates and self loops are removed
+    num_edges = int(sys.argv[1]) if len(sys.argv) > 1 else 10**6
+    num_generated = num_edges
+    while(True):
+        num_nodes, src, dst = get_edges("rmat", num_generated, 0)
+        src, dst = get_undirected_edges(num_nodes, src, dst)
+        if(len(src) >= num_edges):
+            break
+        num_generated = int(num_generated*num_edges/max(len(src), 1)) + 1
+    src, dst = src[:num_edges], dst[:num_edges]
+    assert len(src) == num_edges
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        location = os.path.join(tmp_dir, "generated_{}.gml".format(num_edges))
+        write_gml_edges(location, num_nodes, src, dst, np.arange(num_nodes) % 12)
+        print("Generated {} with {} nodes and {} edges".format(location, num_nodes, len(src)))
+
+        _, nx_time, nx_memory = measure(lambda: nx.read_gml(location))
+        print("nx.read_gml: {:.2f} s, {:.1f} MB".format(nx_time, nx_memory/2**20))
+        gml, parse_time, parse_memory = measure(lambda: parse_gml(location))
+        print("parse_gml: {:.2f} s, {:.1f} MB ({:.1f}x faster)".format(parse_time, parse_memory/2**20, nx_time/parse_time))
+        assert np.array_equal(gml.src, src) and np.array_equal(gml.dst, dst)
+        # The cache of the generated file is also kept in the temporary directory
+        load_gml(location, tmp_dir)
+        _, cache_time, cache_memory = measure(lambda: load_gml(location, tmp_dir))
+        print("load_gml (cached): {:.3f} s, {:.1f} MB ({:.0f}x faster)".format(cache_time, cache_memory/2**20, nx_time/cache_time))
@@ -0,0 +1,182 @@
+'''
+Multilevel (Louvain) modularity maximization over the CSR arrays of a graph.
+
+Every level has two phases:
+1. Local moving: the nodes are visited in a random (seeded) order and every node is moved to the
+   neighbouring community giving the largest modularity gain, until no node moves.
+2. Aggregation: every community becomes one node of the next level graph, and the edges between two
+   communities are added into one weighted edge (the internal edges become a self loop).
+
+As in Leiden, the communities are kept connected: after the local moving, a community which is not
+connected (a node can leave it and cut it in parts) is split into its connected parts, which never
+decreases the modularity. The levels stop when the local moving does not merge any more nodes.
+
+The modularity with the resolution g is Q = sum over the communities c of
+    in_c/2m - g*(tot_c/2m)^2
+where in_c is the total weight of the edges inside c (both the directions), tot_c the total degree
+of c and 2m the total degree of the graph.
+'''
+import time
+
+import numpy as np
+from scipy.sparse import csgraph, csr_matrix
+
+MIN_GAIN = 1e-12
+
+
+def _move_nodes(indptr, indices, data, labels, resolution, rng):
+    '''
+    Local moving phase. labels is changed in place, returns whether any node was moved
+    '''
+    num_nodes = len(indptr) - 1
+    degrees = np.bincount(np.repeat(np.arange(num_nodes), np.diff(indptr)), weights=data, minlength=num_nodes)
+    total_weight = float(degrees.sum())
+    if(total_weight == 0):
+        return False
+    community_degree = np.bincount(labels, weights=degrees, minlength=num_nodes).tolist()
+    degrees = degrees.tolist()
+    indptr, indices, data = indptr.tolist(), indices.tolist(), data.tolist()
+    node_labels = labels.tolist()
+    scale = resolution/total_weight
+
+    moved = False
+    changed = True
+    while(changed):
+        changed = False
+        for node in rng.permutation(num_nodes).tolist():
+            current = node_labels[node]
+            degree = degrees[node]
+            # Weight of the edges from the node to every neighbouring community
+            links = {}
+            for i in range(indptr[node], indptr[node + 1]):
+                neigh = indices[i]
+                if(neigh != node):
+                    links[node_labels[neigh]] = links.get(node_labels[neigh], 0.0) + data[i]
+
+            community_degree[current] -= degree
+            best = current
+            best_gain = links.get(current, 0.0) - scale*community_degree[current]*degree
+            for community, weight in links.items():
+                gain = weight - scale*community_degree[community]*degree
+                if(gain > best_gain + MIN_GAIN):
+                    best, best_gain = community, gain
+            community_degree[best] += degree
+            if(best != current):
+                node_labels[node] = best
+                changed = True
+                moved = True
+    labels[:] = node_labels
+    return moved
+
+
+def _split_disconnected(indptr, indices, labels):
+    '''
+    Relabel the communities (0, 1, ...) so that every community is connected
+    '''
+    num_nodes = len(indptr) - 1
+    sources = np.repeat(np.arange(num_nodes), np.diff(indptr))
+    internal = labels[sources] == labels[indices]
+    internal_graph = csr_matrix((np.ones(int(internal.sum())), (sources[internal], indices[internal])), shape=(num_nodes, num_nodes))
+    _, parts = csgraph.connected_components(internal_graph, directed=False)
+    return np.unique(parts, return_inverse=True)[1].astype(np.int64)
+
+
+def _aggregate(indptr, indices, data, labels, num_communities):
+    '''
+    Get the CSR arrays of the graph of the communities (the internal edges become self loops)
+    '''
+    num_nodes = len(indptr) - 1
+    sources = np.repeat(np.arange(num_nodes), np.diff(indptr))
+    matrix = csr_matrix((data, (labels[sources], labels[indices])), shape=(num_communities, num_communities))
+    matrix.sum_duplicates()
+    return matrix.indptr.astype(np.int64), matrix.indices.astype(np.int64), matrix.data.astype(float)
+
+
+def get_modularity(graph, labels, resolution=1.0):
+    '''
+    Get the modularity of a partition of a CSRGraph
+
+    labels: Array with the community (0..num_communities-1) of every node
+    '''
+    labels = np.asarray(labels, dtype=np.int64)
+    data = graph.weights.astype(float)
+    total_weight = data.sum()
+    if(total_weight == 0):
+        return 0.0
+    num_communities = int(labels.max()) + 1
+    sources = graph.sources()
+    internal = labels[sources] == labels[graph.targets]
+    internal_weight = np.bincount(labels[sources][internal], weights=data[internal], minlength=num_communities)
+    community_degree = np.bincount(labels[sources], weights=data, minlength=num_communities)
+    return float((internal_weight/total_weight - resolution*(community_degree/total_weight)**2).sum())
+
+
+def get_louvain_communities(graph, resolution=1.0, seed=0, max_levels=None):
+    '''
+    Get the communities of a CSRGraph with the multilevel (Louvain) method
+
+    resolution: Resolution of the modularity (larger values give smaller communities)
+    seed: Seed of the random order of the nodes in the local moving
+    max_levels: Optional limit on the number of levels
+
+    Returns:
+    (labels, levels): labels is the array with the community of every node, and levels a list with a
+    dict (num_communities, modularity, time) for every level
+    '''
+    rng = np.random.RandomState(seed)
+    indptr = graph.offsets.astype(np.int64)
+    indices = graph.targets.astype(np.int64)
+    data = graph.weights.astype(float)
+    labels = np.arange(graph.num_nodes, dtype=np.int64)
+    levels = []
+    while(max_levels is None or len(levels) < max_levels):
+        start = time.perf_counter()
+        num_nodes = len(indptr) - 1
+        level_labels = np.arange(num_nodes, dtype=np.int64)
+        if(not _move_nodes(indptr, indices, data, level_labels, resolution, rng)):
+            break
+        level_labels = _split_disconnected(indptr, indices, level_labels)
+        num_communities = int(level_labels.max()) + 1
+
+        # Community of every original node, and the graph of the communities for the next level
+        labels = level_labels[labels]
+        indptr, indices, data = _aggregate(indptr, indices, data, level_labels, num_communities)
+        levels.append({
+            "num_communities": num_communities,
+            "modularity": get_modularity(graph, labels, resolution),
+            "time": time.perf_counter() - start,
+        })
+        if(num_communities == num_nodes):
+            break
+    return labels, levels
+
+
+def get_communities_from_labels(labels, nodes=None):
+    '''
+    Get the list of communities (lists of nodes) from the community labels
+
+    nodes: Optional list with the node (e.g. networkx node) at every index
+    '''
+    labels = np.asarray(labels, dtype=np.int64)
+    order = np.argsort(labels, kind="stable")
+    splits = np.flatnonzero(np.diff(labels[order])) + 1
+    communities = np.split(order, splits) if len(order) else []
+    if(nodes is None):
+        return [community.tolist() for community in communities]
+    return [[nodes[i] for i in community.tolist()] for community in communities]
+
+
+if __name__ == "__main__":
+    # Communities of the imdb_prodco graph (weighted) used by gen_centrality.py
+    from gen_centrality import DATASET, make_graph_from_dataset
+
+    with open(DATASET, "r") as file:
+        data = file.readlines()
+    rows, columns = map(int, data[0].strip().split(","))
+    graph = make_graph_from_dataset(data[1:], rows)
+
+    start = time.perf_counter()
+    labels, levels = get_louvain_communities(graph)
+    print("Louvain method on {}: {:.3f} s".format(DATASET, time.perf_counter() - start))
+    for i, level in enumerate(levels):
+        print("Level {}: (number_of_communities = {}, modularity = {})".format(i+1, level["num_communities"], level["modularity"]))
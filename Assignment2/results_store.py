@@ -0,0 +1,285 @@
+'''
+Columnar store of per-node results (closeness, degree, component, community label, ...).
+
+Every column is one .npy file inside the store directory. The rows are appended in chunks, and the
+full chunks are written by a background thread (through a bounded queue, so the computation goes on
+while the previous chunk is written and at most a few chunks are held in memory). The .npy header
+has a fixed size and is written again with the final number of rows when the store is closed, then
+meta.json (columns, dtypes, number of rows) is written last, so a store without it is not complete.
+If the computation fails inside the with block, the writer is aborted instead: the chunks still queued
+are dropped and the partial column files are removed, without writing meta.json.
+
+The columns are read back memory-mapped (np.load with mmap_mode), and the text files of the
+assignment (one line per row) are rendered from them in chunks on demand.
+'''
+import itertools
+import json
+import os
+import queue
+import threading
+
+import numpy as np
+
+CHUNK_ROWS = 1 << 16
+QUEUE_CHUNKS = 4
+META_FILE = "meta.json"
+NPY_MAGIC = b"\x93NUMPY\x01\x00"
+NPY_HEADER_BYTES = 128
+
+
+def _get_npy_header(dtype, num_rows):
+    '''
+    Get the .npy (version 1.0) header of a 1-D array, padded to NPY_HEADER_BYTES
+    '''
+    header = "{{'descr': {!r}, 'fortran_order': False, 'shape': ({},), }}".format(np.lib.format.dtype_to_descr(dtype), num_rows)
+    header_len = NPY_HEADER_BYTES - len(NPY_MAGIC) - 2
+    if(len(header) + 1 > header_len):
+        raise ValueError("The dtype {} is not supported by the results store".format(dtype))
+    return NPY_MAGIC + header_len.to_bytes(2, "little") + (header.ljust(header_len - 1) + "\n").encode("latin1")
+
+
+class ResultsWriter:
+    '''
+    Writer of the columns of a results store, with the chunks written by a background thread
+
+    Use it as a context manager (or call close()) so the store is completed (or aborted on an exception):
+
+        with ResultsWriter(location, {"node": np.int64, "closeness": np.float64}) as writer:
+            writer.append(node=nodes, closeness=values)
+    '''
+
+    def __init__(self, location, columns, chunk_rows=CHUNK_ROWS):
+        '''
+        Inputs:
+        location: Directory of the store (made if needed, an older store there is overwritten)
+        columns: Dict of the column names and their (numeric) dtypes, in order
+        chunk_rows: Number of rows buffered before a chunk is handed to the writer thread
+        '''
+        self.location = str(location)
+        self.dtypes = {name: np.dtype(dtype) for name, dtype in columns.items()}
+        if(not self.dtypes):
+            raise ValueError("A results store needs at least one column")
+        for dtype in self.dtypes.values():
+            _get_npy_header(dtype, np.iinfo(np.int64).max)
+        self.chunk_rows = chunk_rows
+        self.num_rows = 0
+        self._pending = {name: [] for name in self.dtypes}
+        self._num_pending = 0
+        self._error = None
+        self._aborted = False
+        self._closed = False
+
+        os.makedirs(self.location, exist_ok=True)
+        meta_location = os.path.join(self.location, META_FILE)
+        if(os.path.exists(meta_location)):
+            os.remove(meta_location)
+        self._files = {}
+        for name, dtype in self.dtypes.items():
+            self._files[name] = open(os.path.join(self.location, "{}.npy".format(name)), "wb")
+            self._files[name].write(_get_npy_header(dtype, 0))
+
+        self._queue = queue.Queue(QUEUE_CHUNKS)
+        self._thread = threading.Thread(target=self._write_chunks, daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if(exc_type is None):
+            self.close()
+        else:
+            self.abort()
+
+    def _write_chunks(self):
+        while(True):
+            chunk = self._queue.get()
+            if(chunk is None):
+                break
+            if(self._error is not None or self._aborted):
+                continue
+            try:
+                for name, values in chunk.items():
+                    values.tofile(self._files[name])
+            except Exception as e:
+                self._error = e
+
+    def _check_error(self):
+        if(self._error is not None):
+            raise RuntimeError("Writing the results store {} failed".format(self.location)) from self._error
+
+    def append(self, **columns):
+        '''
+        Append rows, given as the arrays (or lists) of the values of every column (all the same length)
+        '''
+        if(self._closed):
+            raise ValueError("The results store {} is closed".format(self.location))
+        self._check_error()
+        if(set(columns) != set(self.dtypes)):
+            raise ValueError("Expected the columns {}, got {}".format(list(self.dtypes), list(columns)))
+        # Copies, so the caller can reuse its arrays while the chunk waits to be written
+        arrays = {name: np.array(values, dtype=self.dtypes[name]).reshape(-1) for name, values in columns.items()}
+        num_rows = {len(values) for values in arrays.values()}
+        if(len(num_rows) != 1):
+            raise ValueError("All the columns must have the same number of rows")
+        for name, values in arrays.items():
+            self._pending[name].append(values)
+        self._num_pending += num_rows.pop()
+        if(self._num_pending >= self.chunk_rows):
+            self._flush()
+
+    def _flush(self):
+        if(self._num_pending == 0):
+            return
+        chunk = {name: np.concatenate(parts) for name, parts in self._pending.items()}
+        self._pending = {name: [] for name in self.dtypes}
+        self.num_rows += self._num_pending
+        self._num_pending = 0
+        self._queue.put(chunk)
+
+    def close(self):
+        '''
+        Write the remaining rows, the final headers and meta.json
+        '''
+        if(self._closed):
+            return
+        self._closed = True
+        try:
+            self._flush()
+        finally:
+            self._queue.put(None)
+            self._thread.join()
+        try:
+            self._check_error()
+            for name, dtype in self.dtypes.items():
+                self._files[name].seek(0)
+                self._files[name].write(_get_npy_header(dtype, self.num_rows))
+        finally:
+            for file in self._files.values():
+                file.close()
+        meta = {
+            "columns": list(self.dtypes),
+            "dtypes": [np.lib.format.dtype_to_descr(dtype) for dtype in self.dtypes.values()],
+            "num_rows": self.num_rows,
+        }
+        with open(os.path.join(self.location, META_FILE), "w") as f:
+            json.dump(meta, f)
+
+    def abort(self):
+        '''
+        Stop the writer without completing the store (the partial column files are removed)
+        '''
+        if(self._closed):
+            return
+        self._closed = True
+        self._aborted = True
+        self._queue.put(None)
+        self._thread.join()
+        for name, file in self._files.items():
+            file.close()
+            if(os.path.exists(file.name)):
+                os.remove(file.name)
+
+
+def load_results(location, columns=None):
+    '''
+    Read the columns of a complete results store, memory-mapped
+
+    columns: Names of the columns to read (all of them if None)
+
+    Returns a dict of the column names and their (read only) arrays
+    '''
+    meta_location = os.path.join(str(location), META_FILE)
+    if(not os.path.exists(meta_location)):
+        raise FileNotFoundError("No complete results store at {}".format(location))
+    with open(meta_location, "r") as f:
+        meta = json.load(f)
+    dtypes = dict(zip(meta["columns"], meta["dtypes"]))
+    results = {}
+    for name in (meta["columns"] if columns is None else columns):
+        if(name not in dtypes):
+            raise KeyError("No column {} in the results store {}".format(name, location))
+        if(meta["num_rows"] == 0):
+            # Empty files can't be memory-mapped
+            results[name] = np.zeros(0, dtype=np.dtype(dtypes[name]))
+        else:
+            results[name] = np.load(os.path.join(str(location), "{}.npy".format(name)), mmap_mode="r")
+    return results
+
+
+def render_text(location, output_location, line_format, columns, formatters=None, chunk_rows=CHUNK_ROWS):
+    '''
+    Write a text file with one line per row of a results store, a chunk of rows at a time
+
+    Inputs:
+    location: Directory of the results store
+    output_location: Text file written
+    line_format: Format string of a line, filled with the values of the columns in order (e.g. "{} {}")
+    columns: Names of the columns used in the lines
+    formatters: Optional dict of the functions giving the values written for some columns, each called
+    with the dict of the arrays of all the columns of the store for a chunk of rows
+    '''
+    results = load_results(location)
+    formatters = formatters or {}
+    num_rows = len(results[columns[0]]) if columns else 0
+    line_format = line_format + "\n"
+    with open(output_location, "w") as f:
+        for chunk_start in range(0, num_rows, chunk_rows):
+            chunk = {name: values[chunk_start:chunk_start + chunk_rows] for name, values in results.items()}
+            values = []
+            for name in columns:
+                if(name in formatters):
+                    values.append(formatters[name](chunk))
+                else:
+                    values.append(chunk[name].tolist())
+            f.write("".join(itertools.starmap(line_format.format, zip(*values))))
+
+
+if __name__ == "__main__":
+    # Writing and reading back random columns in uneven appends
+    import tempfile
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = os.path.join(tmp_dir, "store")
+        nodes = np.arange(200003)
+        values = rng.random(len(nodes))
+        labels = rng.integers(0, 10, len(nodes)).astype(np.int32)
+        with ResultsWriter(store, {"node": np.int64, "value": np.float64, "label": np.int32}, chunk_rows=1000) as writer:
+            start = 0
+            while(start < len(nodes)):
+                end = min(len(nodes), start + int(rng.integers(1, 5000)))
+                writer.append(node=nodes[start:end], value=values[start:end], label=labels[start:end])
+                start = end
+        results = load_results(store)
+        assert isinstance(results["value"], np.memmap)
+        assert np.array_equal(results["node"], nodes) and np.array_equal(results["value"], values) and np.array_equal(results["label"], labels)
+
+        text_location = os.path.join(tmp_dir, "values.txt")
+        render_text(store, text_location, "{} {}", ["node", "value"], chunk_rows=999)
+        with open(text_location, "r") as f:
+            assert f.read() == "".join("{} {}\n".format(node, value) for node, value in zip(nodes.tolist(), values.tolist()))
+        # A formatter using another column of the rows
+        render_text(store, text_location, "{} {}", ["node", "value"], {"value": lambda chunk: np.where(chunk["label"] == 0, "-", chunk["value"].astype(str)).tolist()}, chunk_rows=999)
+        with open(text_location, "r") as f:
+            assert f.read() == "".join("{} {}\n".format(node, "-" if label == 0 else str(value)) for node, value, label in zip(nodes.tolist(), values, labels))
+
+        with ResultsWriter(store, {"node": np.int64}) as writer:
+            pass
+        assert len(load_results(store)["node"]) == 0
+
+        # A failure inside the with block leaves no complete store behind
+        failed_store = os.path.join(tmp_dir, "failed_store")
+        try:
+            with ResultsWriter(failed_store, {"node": np.int64}, chunk_rows=10) as writer:
+                writer.append(node=nodes[:1000])
+                raise KeyboardInterrupt
+        except KeyboardInterrupt:
+            pass
+        assert not os.listdir(failed_store)
+        try:
+            load_results(failed_store)
+            assert False
+        except FileNotFoundError:
+            pass
+    print("Results store round trip matches the written columns")
@@ -0,0 +1,147 @@
+'''
+Node-induced subgraph views over a CSRGraph.
+
+A view is only a boolean mask over the nodes of the graph, the adjacency is never copied. The number
+of nodes, the number of induced edges and the number of boundary edges (with only one end inside)
+are found in a single vectorized pass over the edge arrays. get_label_edge_stats does the same for
+all the communities of a partition at once.
+
+The views have the same methods and statistics as the ones of Assignment1 (num_nodes and num_edges,
+also as the networkx style number_of_nodes() and number_of_edges(), get_edge_stats and to_graph), so
+they can be used in place of graph.subgraph(nodes).copy() wherever only these are needed. The only
+difference is how the nodes are named: the CSR graphs here only have the node indices (the networkx
+nodes are mapped to them by get_subgraph_views), so the predicate of from_predicate is given the
+node indices.
+'''
+import numpy as np
+
+from csr_graph import CSRGraph
+
+
+class SubgraphView:
+    '''
+    Subgraph of a CSRGraph induced by the nodes selected by a boolean mask
+    '''
+
+    def __init__(self, graph, node_mask):
+        self.graph = graph
+        self.node_mask = np.asarray(node_mask, dtype=bool)
+        self._edge_stats = None
+
+    @classmethod
+    def from_predicate(cls, graph, predicate):
+        '''
+        Make a view of the nodes for which predicate(nodes) is True
+
+        predicate: Function taking the array of node indices and returning a boolean array
+        '''
+        return cls(graph, predicate(np.arange(graph.num_nodes)))
+
+    @classmethod
+    def from_nodes(cls, graph, nodes):
+        '''
+        Make a view of the given node indices (e.g. a community)
+        '''
+        node_mask = np.zeros(graph.num_nodes, dtype=bool)
+        node_mask[np.asarray(list(nodes), dtype=np.int64)] = True
+        return cls(graph, node_mask)
+
+    @property
+    def nodes(self):
+        return np.flatnonzero(self.node_mask)
+
+    @property
+    def num_nodes(self):
+        return int(np.count_nonzero(self.node_mask))
+
+    @property
+    def num_edges(self):
+        return self.get_edge_stats()["num_edges"]
+
+    def number_of_nodes(self):
+        return self.num_nodes
+
+    def number_of_edges(self):
+        return self.num_edges
+
+    def get_edge_stats(self):
+        '''
+        Get the statistics of the edges of the view
+
+        Returns a dict with:
+        num_nodes: Number of nodes in the view
+        num_edges: Number of edges with both the ends inside the view
+        num_boundary_edges: Number of edges with exactly one end inside the view
+        avg_degree: Average degree of the nodes inside the induced subgraph
+        density: Number of induced edges / maximum possible number of edges
+        '''
+        if(self._edge_stats is not None):
+            return self._edge_stats
+        src_inside = self.node_mask[self.graph.sources()]
+        dst_inside = self.node_mask[self.graph.targets]
+        internal = src_inside & dst_inside
+        # Every edge (except a self loop) is stored in both the directions
+        num_self_loops = int(np.count_nonzero(internal & (self.graph.sources() == self.graph.targets)))
+        num_edges = (int(np.count_nonzero(internal)) + num_self_loops) // 2
+        num_boundary_edges = int(np.count_nonzero(src_inside != dst_inside)) // 2
+
+        num_nodes = self.num_nodes
+        max_edges = num_nodes*(num_nodes - 1)//2
+        self._edge_stats = {
+            "num_nodes": num_nodes,
+            "num_edges": num_edges,
+            "num_boundary_edges": num_boundary_edges,
+            "avg_degree": 2*num_edges/num_nodes if num_nodes else 0,
+            "density": num_edges/max_edges if max_edges else 0,
+        }
+        return self._edge_stats
+
+    def to_graph(self):
+        '''
+        Make the induced subgraph as a new CSRGraph (the nodes of the view numbered in order)
+        '''
+        sources = self.graph.sources()
+        # Every edge once (the self loops are stored once)
+        internal = self.node_mask[sources] & self.node_mask[self.graph.targets] & (sources <= self.graph.targets)
+        new_index = np.cumsum(self.node_mask) - 1
+        return CSRGraph.from_edges(self.num_nodes, new_index[sources[internal]], new_index[self.graph.targets[internal]], self.graph.weights[internal])
+
+
+def get_label_edge_stats(graph, labels, num_labels=None):
+    '''
+    Get the node and edge counts of the subgraphs induced by every label, all in one pass
+
+    graph: CSRGraph
+    labels: Array with the label (0..num_labels-1) of every node, or -1 for nodes without a label
+
+    Returns:
+    (num_nodes, num_edges, num_boundary_edges): Arrays indexed by the label
+    '''
+    labels = np.asarray(labels, dtype=np.int64)
+    if(num_labels is None):
+        num_labels = int(labels.max()) + 1 if len(labels) else 0
+    num_nodes = np.bincount(labels[labels >= 0], minlength=num_labels)
+
+    sources = graph.sources()
+    src_labels = labels[sources]
+    dst_labels = labels[graph.targets]
+    internal = (src_labels == dst_labels) & (src_labels >= 0)
+    loops = internal & (sources == graph.targets)
+    # Every edge (except a self loop) is stored in both the directions
+    num_edges = (np.bincount(src_labels[internal], minlength=num_labels) + np.bincount(src_labels[loops], minlength=num_labels)) // 2
+
+    cut_src_labels = src_labels[src_labels != dst_labels]
+    num_boundary_edges = np.bincount(cut_src_labels[cut_src_labels >= 0], minlength=num_labels)
+    return num_nodes, num_edges, num_boundary_edges
+
+
+def get_subgraph_views(graph, communities):
+    '''
+    Get the subgraph views of a list of communities of a networkx graph
+
+    graph: networkx graph
+    communities: List of communities (each an iterable of networkx nodes)
+    '''
+    csr_graph, nodes = CSRGraph.from_networkx(graph)
+    node_index = {node: i for i, node in enumerate(nodes)}
+    return [SubgraphView.from_nodes(csr_graph, [node_index[node] for node in com]) for com in communities]